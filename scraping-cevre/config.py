@@ -2,28 +2,34 @@ import os
 import logging
 
 
-def setup_shared_logger(site_name: str) -> logging.Logger:
+def setup_shared_logger(site_name: str, log_root: str = "logs") -> logging.Logger:
     """
     Sets up a shared logger for multiple scrapers, creating directories for logging.
 
     Args:
         site_name (str): The name of the site (e.g., 'shared_log').
+        log_root (str): The directory the site's log folder is created in. Parallel workers pass
+            their own staging directory so that every job writes to its own log stream.
 
     Returns:
         logging.Logger: Configured shared logger instance.
     """
     # Define the log directory structure
-    log_dir = os.path.join("logs", site_name)
+    log_dir = os.path.join(log_root, site_name)
     os.makedirs(log_dir, exist_ok=True)
 
     # Create a log file name for shared logging
     log_file_name = f"{site_name}.log"
     log_file_path = os.path.join(log_dir, log_file_name)
 
-    # Create a shared logger for multiple scrapers
-    logger = logging.getLogger(site_name)
+    # Create a shared logger for multiple scrapers (keyed by directory so every log stream gets its own handlers)
+    logger = logging.getLogger(site_name if log_root == "logs" else log_dir)
     logger.setLevel(logging.INFO)
 
+    # A logger that is already set up keeps its handlers; opening another file here would leak it
+    if logger.handlers:
+        return logger
+
     # Create a file handler that logs to a specific file
     file_handler = logging.FileHandler(log_file_path)
     file_handler.setLevel(logging.INFO)
@@ -38,8 +44,20 @@ def setup_shared_logger(site_name: str) -> logging.Logger:
     stream_handler.setFormatter(formatter)
 
     # Add the handlers to the logger
-    if not logger.handlers:
-        logger.addHandler(file_handler)
-        logger.addHandler(stream_handler)
+    logger.addHandler(file_handler)
+    logger.addHandler(stream_handler)
 
     return logger
+
+
+def close_shared_logger(logger: logging.Logger) -> None:
+    """
+    Detaches and closes the handlers of a logger set up by `setup_shared_logger`, so that long-lived worker
+    processes do not keep the log files of finished jobs open.
+
+    Args:
+        logger (logging.Logger): The logger of a finished job.
+    """
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
@@ -5,7 +5,6 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-import time
 from typing import List, Tuple
 from bs4 import BeautifulSoup
 import json
@@ -13,9 +12,26 @@ import logging
 from config import setup_shared_logger
 
 from src.utils.baseScrapper import BaseScraper
+from src.utils.domExtract import Field
+from src.utils.waits import WaitProfile
 
 
 class Bundesanzeiger(BaseScraper):
+    # The rows of the search results and their name and date cells
+    result_row_selector = ("//div[contains(@class, 'container result_container global-search')]"
+                           "//div[@class='row back' or @class='row']")
+    result_fields = {
+        'name': Field('.first', 'text'),
+        'date': Field('.date', 'text'),
+    }
+    # The link to the next result page
+    next_page_xpath = "//a[@class='page-nav' and contains(@title, 'Zur nächsten Seite')]"
+    # The largest choice of the result list's page size dropdown, see `set_page_size`
+    page_size = 100
+
+    # Result pages are rendered on the server and answer slowly under load
+    wait_profile = WaitProfile(page_load=45, settle=15)
+
     def search_for_keyword(self, keyword):
         """
         Searches for the given keyword on the specific website.
@@ -31,7 +47,9 @@ class Bundesanzeiger(BaseScraper):
 
             search_box.clear()
             search_box.send_keys(keyword)
+            page = self.driver.find_element(By.TAG_NAME, 'html')
             search_box.send_keys(Keys.RETURN)
+            self.waits.page_turned(page)
             self.logger.info(f"Keyword '{keyword}' successfully entered and search initiated.")
         except Exception as e:
             self.logger.error(f"Failed to enter keyword '{keyword}' in the search box: {str(e)}")
@@ -54,15 +72,15 @@ class Bundesanzeiger(BaseScraper):
                 - name (str): The name or title of the document.
                 - description_text (str): A brief description or summary of the document.
         """
-        pdf_urls = []
-        non_pdf_urls = []
+        pdf_urls, non_pdf_urls = self.result_lists()
         matching_links = []
 
+        self.politeness.wait()
         self.driver.get(self.base_url)
 
         self.accept_cookies_button()
         self.search_for_keyword(keyword)
-        self.option_100()
+        self.set_page_size()
 
         page_number = 1
         if limited_page == 0:
@@ -70,22 +88,30 @@ class Bundesanzeiger(BaseScraper):
 
         while page_number <= limited_page:
             self.logger.info(f"Processing page {page_number}")
+            self.record_page(page_number)
 
-            row_elements = self.driver.find_elements(By.XPATH,
-                                                     "//div[contains(@class, 'container result_container global-search')]//div[@class='row back' or @class='row']")
+            # Names and dates of every row are read with a single execute_script call
+            rows = self.extract_result_rows()
 
             try:
 
-                for row_index in range(len(row_elements) - 1):
-                    row_elements = self.driver.find_elements(By.XPATH,
-                                                             "//div[contains(@class, 'container result_container global-search')]//div[@class='row back' or @class='row']")
+                for row_index in range(len(rows) - 1):
+                    name = self.extract_name_from_row(rows[row_index])
+                    date = self.extract_date_from_row(rows[row_index])
+
+                    # Row links are session bound, so known results are recognised by date and name instead
+                    discovery_key = self.discovery_key(date, name)
+                    if self.is_known_url(discovery_key):
+                        continue
+
+                    # Only rows that are opened are looked up as elements; the page is reloaded after each one
+                    row_elements = self.driver.find_elements(By.XPATH, self.result_row_selector)
                     current_row = row_elements[row_index]
 
-                    name = self.extract_name_from_row(current_row)
-                    date = self.extract_date_from_row(current_row)
                     url, description = self.extract_url_from_row(current_row)
                     if url == "":
                         continue
+                    self.add_discovery_key(url, discovery_key)
 
                     unique_name = f"{date}-{name}".replace('/', '_').replace(':', '').replace(' ', '_').replace('\n', '_')
 
@@ -104,14 +130,17 @@ class Bundesanzeiger(BaseScraper):
 
                     # Go back to the main page and find row_elements again
                     self.driver.back()
+                    self.waits.elements((By.XPATH, self.result_row_selector))
                     self.logger.info("\n**************************************************\n")
 
                 # Page navigation
                 try:
-                    next_button = self.driver.find_elements(By.XPATH,
-                                                            "//a[@class='page-nav' and contains(@title, 'Zur nächsten Seite')]")
+                    next_button = self.driver.find_elements(By.XPATH, self.next_page_xpath)
                     if next_button and next_button[0].get_attribute('href'):
+                        page = self.driver.find_element(By.TAG_NAME, 'html')
+                        self.politeness.wait()
                         next_button[0].click()  # Move to the next page
+                        self.waits.page_turned(page)
                         page_number += 1
                     else:
                         self.logger.info("Reached the last page. No href attribute found for the 'Next' button.")
@@ -129,6 +158,19 @@ class Bundesanzeiger(BaseScraper):
 
         return pdf_urls, non_pdf_urls
 
+    def discovery_key(self, date: str, name: str) -> str:
+        """
+        Builds the dedup key of a search result row from its date and name.
+
+        Args:
+            date (str): The date of the row, formatted as YYYY-MM-DD.
+            name (str): The name or title of the row.
+
+        Returns:
+            str: The key stored next to the result URL in the ledger.
+        """
+        return f"bundesanzeiger:{date}:{' '.join(name.split())}"
+
     def is_security_check_present(self) -> bool:
         """
         Checks if the security check (e.g., 'Sicherheitsabfrage') is present on the page.
@@ -164,23 +206,20 @@ class Bundesanzeiger(BaseScraper):
             self.logger.error(f"Failed to extract additional data: {str(e)}")
             return ""
 
-    def extract_name_from_row(self, row_element) -> str:
+    def extract_name_from_row(self, row: dict) -> str:
         """
-        Extracts the name or title from a given row element.
+        Extracts the name or title from a given row.
 
         Args:
-            row_element (WebElement): The row element to extract the name from.
+            row (dict): The row values read by `extract_result_rows`.
 
         Returns:
             str: The extracted name or title.
         """
-        try:
-            name_element = row_element.find_element(By.CLASS_NAME, "first")
-            name = name_element.text.strip()
-            return name
-        except Exception as e:
-            self.logger.error(f"Failed to extract name from row: {str(e)}")
+        if row['name'] is None:
+            self.logger.error("Failed to extract name from row: no element with class 'first'")
             return ""
+        return row['name'].strip()
 
     def extract_url_from_row(self, row_element) -> Tuple[str, str]:
         """
@@ -195,12 +234,15 @@ class Bundesanzeiger(BaseScraper):
         """
         try:
             url_element = row_element.find_element(By.TAG_NAME, "a")
+            self.politeness.wait()
             url_element.click()
 
             # Check for security check
             if self.is_security_check_present():
                 self.logger.warning(f"Security check found, skipping URL: {url_element}")
                 self.driver.back()
+                # The check renews the session cookies; downloads need the new ones
+                self.sync_browser_session(force=True)
                 return "", ""
 
             # Check if it's a PDF
@@ -213,7 +255,7 @@ class Bundesanzeiger(BaseScraper):
             description_text = self.extract_description_text()
 
             # Extract the new URL from the newly opened page
-            new_url = self.driver.current_url
+            new_url = self.canonicalize(self.driver.current_url)
             self.logger.info(f"Extracted URL after click: {new_url}")
 
             return new_url, description_text
@@ -232,7 +274,7 @@ class Bundesanzeiger(BaseScraper):
             # Search for the PDF link with a general XPath
             pdf_element = self.driver.find_element(By.XPATH,
                                                    "//a[contains(@aria-label, 'Publikation im PDF-Format öffnen')]")
-            pdf_url = pdf_element.get_attribute("href")
+            pdf_url = self.canonicalize(pdf_element.get_attribute("href"))
             return pdf_url
         except Exception as e:
             self.logger.error(f"No PDF link found")
@@ -256,25 +298,20 @@ class Bundesanzeiger(BaseScraper):
             self.logger.error(f"Failed to extract description text: {str(e)}")
             return ""
 
-    def extract_date_from_row(self, row_element) -> str:
+    def extract_date_from_row(self, row: dict) -> str:
         """
-        Extracts the date from a given row element.
+        Extracts the date from a given row.
 
         Args:
-            row_element (WebElement): The row element to extract the date from.
+            row (dict): The row values read by `extract_result_rows`.
 
         Returns:
             str: The extracted date, formatted as YYYY-MM-DD.
         """
-        try:
-            date_element = row_element.find_element(By.CLASS_NAME,
-                                                    "date")
-            raw_date = date_element.text.strip()
-            formatted_date = self.format_date(raw_date)
-            return formatted_date
-        except Exception as e:
-            self.logger.error(f"Failed to extract date from row: {str(e)}")
+        if row['date'] is None:
+            self.logger.error("Failed to extract date from row: no element with class 'date'")
             return ""
+        return self.format_date(row['date'].strip())
 
     def format_date(self, raw_date: str) -> str:
         """
@@ -293,9 +330,21 @@ class Bundesanzeiger(BaseScraper):
             self.logger.error(f"Failed to format date: {str(e)}")
             return raw_date
 
-    def option_100(self):
+    def set_page_size(self) -> bool:
+        """
+        The search URLs are session bound, so the page size is chosen in the result list's dropdown.
+
+        Returns:
+            bool: True if 100 results per page were selected.
+        """
+        return self.option_100()
+
+    def option_100(self) -> bool:
         """
         Selects the option to display 100 results per page.
+
+        Returns:
+            bool: True if the option was selected.
         """
         try:
             dropdown_arrow = WebDriverWait(self.driver, 10).until(
@@ -309,10 +358,19 @@ class Bundesanzeiger(BaseScraper):
             option_100 = WebDriverWait(self.driver, 10).until(
                 EC.element_to_be_clickable((By.XPATH, "/html/body/span/span/span[2]/ul/li[text()='100']"))
             )
+            rows_before = len(self.driver.find_elements(By.XPATH, self.result_row_selector))
+            full_page = bool(self.driver.find_elements(By.XPATH, self.next_page_xpath))
             option_100.click()
+            # A full first page grows to 100 rows; a shorter one is only rendered again
+            if full_page:
+                self.waits.count_changed((By.XPATH, self.result_row_selector), rows_before)
+            else:
+                self.waits.settled()
             self.logger.info("Option 100 per page selected")
+            return True
         except Exception as e:
             self.logger.error("Option 100 per page not found or not clickable:", e)
+            return False
 
     def accept_cookies_button(self):
         """
@@ -324,6 +382,8 @@ class Bundesanzeiger(BaseScraper):
             )
             accept_cookies_button.click()
             self.logger.info("Cookies accepted")
+            # The consent cookie has to travel with the downloads as well
+            self.sync_browser_session(force=True)
         except Exception as e:
             self.logger.error("Cookie acceptance not found or not clickable:", e)
 
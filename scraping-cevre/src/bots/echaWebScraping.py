@@ -1,5 +1,3 @@
-import time
-
 from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
@@ -7,16 +5,43 @@ from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 from typing import List, Tuple
 from src.utils.baseScrapper import BaseScraper
+from src.utils.devtools import BrowserProfile
+from src.utils.domExtract import Field
 from urllib.parse import urljoin
 
 
 
 class EchaWebScraper(BaseScraper):
-    def __init__(self, key_words: List[str], base_url: str, limited_pages: int, driver):
+    # Detay sayfaları statik HTML; içerik bu sınıftaki div'lerde
+    detail_selector = 'div.journal-content-article'
+
+    # Her sonuç bağlantısı bir satırdır; tarih bağlantının hücresinden sonraki hücrededir
+    result_row_selector = "//div[contains(@class, 'search-result-title')]//a[@href]"
+    result_fields = {
+        'link': Field('', 'href'),
+        'name': Field('', 'text'),
+        'date': Field('../../following-sibling::td', 'text'),
+    }
+
+    # Her adımda öğeler beklenir; sayfaların load olayını beklemeye gerek yok
+    browser_profile = BrowserProfile(eager=True)
+
+    # Arama portlet'inin sonuç sayfası; anahtar kelime, tarih filtresi ve sıralama URL parametreleridir
+    search_url_template = ('/search?p_p_id=echasearch_WAR_echaportlet&p_p_lifecycle=0'
+                           '&_echasearch_WAR_echaportlet_searchText={query}'
+                           '&_echasearch_WAR_echaportlet_updatedFrom=09%2F08%2F2012'
+                           '&_echasearch_WAR_echaportlet_sortingType=modified')
+    # Sayfa başına sonuç sayısı arama konteynerinin `delta` parametresidir
+    page_size = 100
+    page_size_param = '_echasearch_WAR_echaportlet_delta'
+    # 'Next' gerçek bir bağlantıdır; sonraki sayfa mevcut sayfa işlenirken ikinci sekmede yüklenebilir
+    next_page_link = "//a[contains(text(), 'Next')]"
+
+    def __init__(self, key_words: List[str], base_url: str, limited_pages: int, driver, **kwargs):
         """
         Initializes the EchaWebScraper class with keywords for searching and Selenium WebDriver.
         """
-        super().__init__(key_words, base_url, limited_pages, driver, site_name="ECHA")
+        super().__init__(key_words, base_url, limited_pages, driver, site_name="ECHA", **kwargs)
         self.driver.get(self.base_url)
 
     def search_for_keyword(self, keyword: str):
@@ -60,6 +85,20 @@ class EchaWebScraper(BaseScraper):
         )
         day_element.click()
 
+    def page_url(self, keyword: str, page: int) -> str:
+        """
+        Arama portlet'inin sonuç sayfaları `cur` parametresiyle adreslenir.
+        """
+        return f"{self.search_url(keyword)}&_echasearch_WAR_echaportlet_cur={page}"
+
+    def date_filter_applied(self) -> bool:
+        """
+        URL ile açılan sonuç sayfasında tarih filtresinin gerçekten uygulandığını kontrol eder.
+        """
+        date_inputs = self.driver.find_elements(By.XPATH,
+                                                "//input[contains(@id, '_echasearch_WAR_echaportlet_updatedFrom')]")
+        return bool(date_inputs) and '2012' in (date_inputs[0].get_attribute('value') or '')
+
     def sort_by_last_modified(self):
         """
         Arama sonuçlarını "Son Düzenlenme" tarihine göre sıralar.
@@ -78,49 +117,53 @@ class EchaWebScraper(BaseScraper):
         """
         Arama sonuçlarından PDF ve PDF olmayan URL'leri toplar.
         """
-        pdf_urls = []
-        non_pdf_urls = []
+        pdf_urls, non_pdf_urls = self.result_lists()
         matching_links = []
 
-
-        self.driver.get(self.base_url)
-
         try:
             self.logger.info(f"Retrieving URLs for keyword: {keyword}")
-            self.search_for_keyword(keyword)
-            self.select_date(2012, 8, 9)
-            self.sort_by_last_modified()
-            time.sleep(3)
-            page_number = 1
-
-            while True:
+            # Sonuç sayfası doğrudan açılamazsa arama formu kullanılır
+            by_url = self.open_search_results(keyword) and self.date_filter_applied()
+            if not by_url:
+                self.politeness.wait()
+                self.driver.get(self.base_url)
+                self.search_for_keyword(keyword)
+                self.select_date(2012, 8, 9)
+                self.sort_by_last_modified()
+                # Sıralama sonuç listesini yeniden yükler; sabit bir bekleme yerine sayfanın oturmasını bekleyin
+                self.waits.settled()
+
+            # URL ile açılan aramada sonraki sayfalar sekmelerde birlikte yüklenir, yoksa 'Next' tıklanır;
+            # her sayfadaki tüm satırlar tek bir execute_script çağrısıyla okunur
+            for page_number, results in self.result_pages(keyword, limited_page, self.click_next_page, by_url):
                 self.logger.info(f"Processing page number: {page_number}")
-                results = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_all_elements_located(
-                        (By.XPATH, "//div[contains(@class, 'search-result-title')]//a[@href]"))
-                )
-                dates = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_all_elements_located(
-                        (By.XPATH,
-                         "//div[contains(@class, 'search-result-title')]//a[@href]/../../following-sibling::td"))
-                )
-                descriptions = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_all_elements_located((By.XPATH, "//div[contains(@class, 'search-result-content')]"))
-                )
-
-                for result, date, description in zip(results, dates, descriptions):
-                    link = result.get_attribute("href")
-                    name = result.text.strip()
-                    # Linke gidip içerikten veri çekme
-                    description_text = self.get_description_from_link(link, keyword)
-
-
-                    if link.startswith('/'):
-                        link = 'https://echa.europa.eu' + link
-                    formatted_date = date.text.strip().replace('/', '-')
+                self.record_page(page_number)
+
+                page_items = []
+                rows = []
+                for result in results:
+                    if not result['date']:
+                        continue
+                    # Göreli ve mutlak bağlantılar aynı kanonik URL'ye dönüşür
+                    link = self.canonicalize(result['link'])
+                    name = result['name'].strip()
+
+                    formatted_date = result['date'].strip().replace('/', '-')
                     day, month, year = formatted_date.split('-')
                     year = '20' + year
                     formatted_date = f"{year}-{month}-{day}"
+                    page_items.append((link, formatted_date))
+
+                    # Daha önce işlenen linkler için sayfa yüklemeyin
+                    if self.is_known_url(link):
+                        continue
+                    rows.append((link, name, formatted_date))
+
+                # Detay sayfaları birlikte yüklenir; HTTP ile alınamayanlar tarayıcıda açılır
+                detail_pages = self.load_detail_pages([link for link, _, _ in rows if not self.is_pdf_link(link)])
+
+                for link, name, formatted_date in rows:
+                    description_text = self.get_description_from_link(link, keyword, detail_pages.get(link))
 
                     unique_name = f"{formatted_date}-{name}".replace('/', '_').replace(':', '').replace(' ', '_').replace('\n',
                                                                                                                 '_')
@@ -132,69 +175,74 @@ class EchaWebScraper(BaseScraper):
                         unique_name = f"{base_name}-{counter}"
                         counter += 1
 
-                    if link.split('/')[-2].endswith('.pdf'):
+                    if self.is_pdf_link(link):
                         pdf_urls.append((link, formatted_date, unique_name, description_text))
                     else:
                         non_pdf_urls.append((link, formatted_date, unique_name, description_text))
 
                 self.logger.info(f"Found {len(pdf_urls)} PDF URLs and {len(non_pdf_urls)} non-PDF URLs.")
 
-                if limited_page == 0:
-                    limited_page = float('inf')
-
-                if page_number < limited_page:
-                    page_number += 1
-                    # 'Next' butonunu bulun
-                    next_buttons = self.driver.find_elements(By.XPATH, "//a[contains(text(), 'Next')]")
-                    if next_buttons:
-                        next_button = next_buttons[0]
-                        # 'Next' butonunun etkin olup olmadığını kontrol edin
-                        if next_button.is_enabled() and next_button.get_attribute('href') != "javascript:;":
-                            try:
-                                self.driver.execute_script("arguments[0].scrollIntoView();", next_button)
-                                next_button.click()
-                                time.sleep(2)
-                            except Exception as e:
-                                self.logger.info("Cannot click on 'Next' button. Ending the scraping process.")
-                                self.log_error(e, self.driver.current_url)
-                                break  # 'Next' butonuna tıklanamazsa döngüden çıkın
-                        else:
-                            self.logger.info(
-                                "'Next' button is not enabled or points to 'javascript:;'. Ending the scraping process.")
-                            break  # 'Next' butonu etkin değilse döngüden çıkın
-                    else:
-                        self.logger.info("No 'Next' button found. Ending the scraping process.")
-                        break  # 'Next' butonu bulunamazsa döngüden çıkın
-                else:
-                    break  # Sayfa limitine ulaşıldıysa döngüden çıkın
+                # Sonuçlar son düzenlenme tarihine göre sıralı; sayfadaki her şey daha önce görüldüyse durun
+                if self.page_is_stale(keyword, page_items):
+                    self.logger.info("Every result on this page was seen in an earlier run. Ending the scraping process.")
+                    break
 
         except Exception as e:
             self.log_error(e, self.driver.current_url)
 
         return pdf_urls, non_pdf_urls
 
-    def get_description_from_link(self, link: str, keyword: str) -> str:
-        self.logger.info(f"Visiting link: {link}")
+    def click_next_page(self) -> bool:
+        """
+        'Next' butonuna tıklayıp bir sonraki sonuç sayfasının yüklenmesini bekler.
 
+        Returns:
+            bool: Sonraki sayfa açıldıysa True, son sayfada veya tıklanamazsa False.
+        """
+        # 'Next' butonunu bulun
+        next_buttons = self.driver.find_elements(By.XPATH, "//a[contains(text(), 'Next')]")
+        if not next_buttons:
+            self.logger.info("No 'Next' button found. Ending the scraping process.")
+            return False
+        next_button = next_buttons[0]
+        # 'Next' butonunun etkin olup olmadığını kontrol edin
+        if not next_button.is_enabled() or next_button.get_attribute('href') == "javascript:;":
+            self.logger.info("'Next' button is not enabled or points to 'javascript:;'. Ending the scraping process.")
+            return False
+        try:
+            self.driver.execute_script("arguments[0].scrollIntoView();", next_button)
+            page = self.driver.find_element(By.TAG_NAME, 'html')
+            self.politeness.wait()
+            next_button.click()
+            self.waits.page_turned(page)
+            return True
+        except Exception as e:
+            self.logger.info("Cannot click on 'Next' button. Ending the scraping process.")
+            self.log_error(e, self.driver.current_url)
+            return False
+
+    def is_pdf_link(self, link: str) -> bool:
+        """
+        ECHA belge linkleri `/documents/10162/<ad>.pdf/<id>` biçimindedir.
+        """
+        return link.split('/')[-2].endswith('.pdf')
+
+    def get_description_from_link(self, link: str, keyword: str, page_source: str = None) -> str:
+        """
+        Detay sayfasının `journal-content-article` bloklarından açıklamayı çıkarır.
+        page_source, `load_detail_pages` ile yüklenen HTML'dir.
+        """
         # PDF linklerini kontrol edin
-        if link.split('/')[-2].endswith('.pdf'):
+        if self.is_pdf_link(link):
             self.logger.info(f"Link is a PDF, setting description accordingly: {link}")
             return 'this is a pdf link'
 
+        if page_source is None:
+            return ''
+
         try:
-            # Mevcut pencereyi kaydedin ve yeni bir sekme açın
-            current_window = self.driver.current_window_handle
-            self.driver.execute_script("window.open('');")
-            self.driver.switch_to.window(self.driver.window_handles[-1])
-            self.driver.get(link)
-
-            # Sayfanın yüklenmesini bekleyin
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.TAG_NAME, 'body'))
-            )
-
-            # Sayfa kaynağını alın ve BeautifulSoup ile parse edin
-            page_source = self.driver.page_source
+            # Tablolar daha sonra bu kaynaktan çıkarılır, sayfa ikinci kez indirilmez
+            self.capture_html(link, page_source)
             soup = BeautifulSoup(page_source, 'html.parser')
 
             # script, style ve diğer istenmeyen etiketleri kaldırın
@@ -218,24 +266,8 @@ class EchaWebScraper(BaseScraper):
             description_texts = list(set(description_texts))
 
             # Metinleri birleştirin
-            description_text = '\n'.join(description_texts)
-
-            # Sekmeyi kapatın ve ana pencereye dönün
-            self.driver.close()
-            self.driver.switch_to.window(current_window)
-
-            return description_text
+            return '\n'.join(description_texts)
 
         except Exception as e:
             self.log_error(e, link)
-            # Sekmeyi kapatın ve ana pencereye dönün
-            self.driver.close()
-            self.driver.switch_to.window(current_window)
             return ''
-
-
-
-
-
-
-
@@ -5,20 +5,48 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time
 from typing import List, Tuple
 import logging
 
+from bs4 import BeautifulSoup
 from config import setup_shared_logger
 from src.utils.baseScrapper import BaseScraper
+from src.utils.devtools import BrowserProfile
+from src.utils.domExtract import Field
 
 
 class EurWebScraper(BaseScraper):
-    def __init__(self, key_words: List[str], base_url: str, limited_page: int, driver):
+    # HTML sonuçları statik belgelerdir; belge metni (#document1 veya #text) yoksa sayfa tarayıcıda açılır
+    detail_selector = '#document1, #text'
+
+    # Her arama sonucu bir satırdır; adlar, tarihler ve bağlantılar sıralarıyla eşleştirilir
+    result_row_selector = "//div[@id='EurlexContent']//div[@class='SearchResult']"
+    result_fields = {
+        'names': Field(".//a[starts-with(@id, 'cellar_') and @href]", 'text', True),
+        'dates': Field(".//dd[contains(text(), '/')]", 'text', True),
+        'pdf_links': Field(".//a[starts-with(@title, 'pdf') and @href]", 'href', True),
+        'html_links': Field(".//a[starts-with(@title, 'html') and @href]", 'href', True),
+    }
+
+    # Her adımda öğeler beklenir; sayfaların load olayını beklemeye gerek yok
+    browser_profile = BrowserProfile(eager=True)
+
+    # Hızlı aramanın sonuç sayfası, belge tarihine göre yeniden eskiye sıralı
+    search_url_template = '/search.html?scope=EURLEX&text={query}&lang=en&type=quick&sortOne=DD&sortOneOrder=desc'
+    # 'Next Page' gerçek bir bağlantıdır; sonraki sayfa mevcut sayfa işlenirken ikinci sekmede yüklenebilir
+    next_page_link = "//div[@class='ResultsTools']//a[@title='Next Page']"
+
+    def __init__(self, key_words: List[str], base_url: str, limited_page: int, driver, **kwargs):
         """
         EurWebScraper sınıfı BaseScraper'dan miras alır.
         """
-        super().__init__(key_words, base_url, limited_page, driver, site_name="eur_lex")
+        super().__init__(key_words, base_url, limited_page, driver, site_name="eur_lex", **kwargs)
+
+    def page_url(self, keyword: str, page: int) -> str:
+        """
+        Hızlı aramanın sonuç sayfaları `page` parametresiyle adreslenir.
+        """
+        return f"{self.search_url(keyword)}&page={page}"
 
     def search_for_keyword(self, keyword: str):
         """
@@ -30,8 +58,11 @@ class EurWebScraper(BaseScraper):
         )
         search_box.clear()
         search_box.send_keys(keyword)
+        page = self.driver.find_element(By.TAG_NAME, 'html')
+        self.politeness.wait()
         search_box.send_keys(Keys.RETURN)
-        time.sleep(3)
+        # Arama formu gönderilir; sonuç sayfasının yüklenmesini bekle
+        self.waits.page_turned(page)
 
     def sort_by_last_modified(self):
         """
@@ -49,7 +80,8 @@ class EurWebScraper(BaseScraper):
                 EC.presence_of_element_located((By.XPATH, "//option[@value='DD']"))
             )
             last_modified_option.click()
-            time.sleep(1)
+            # Sıralama sayfayı yeniden yükler; ağın ve DOM'un durulmasını bekle
+            self.waits.settled()
         except Exception as e:
             error_message = "No results found for this keyword."
             self.logger.error(f"{error_message} Error: {str(e).splitlines()[0]}")
@@ -60,28 +92,31 @@ class EurWebScraper(BaseScraper):
         """
         Anahtar kelimeye göre PDF ve PDF olmayan URL'leri çıkarır.
         """
-        pdf_urls = []
-        non_pdf_urls = []
-
-        self.driver.get(self.base_url)
-        time.sleep(1)
+        pdf_urls, non_pdf_urls = self.result_lists()
 
         try:
-            self.search_for_keyword(keyword)
-            self.sort_by_last_modified()
-            self.current_page = 1
-            while True:
+            # Sonuç sayfası doğrudan açılamazsa arama formu kullanılır
+            by_url = self.open_search_results(keyword)
+            if not by_url:
+                self.politeness.wait()
+                self.driver.get(self.base_url)
+                self.search_for_keyword(keyword)
+                self.sort_by_last_modified()
+            # URL ile açılan aramada sonraki sayfalar sekmelerde birlikte yüklenir, yoksa 'Next Page' tıklanır;
+            # her sayfadaki sonuçlar tek bir execute_script çağrısıyla okunur
+            for page_number, search_results in self.result_pages(
+                    keyword, limited_pages, lambda: self.click_next_button(limited_pages), by_url):
+                self.current_page = page_number
                 self.logger.info(f"Processing page {self.current_page}")
-                search_results = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_all_elements_located(
-                        (By.XPATH, "//div[@id='EurlexContent']//div[@class='SearchResult']")
-                    )
-                )
+                self.record_page(self.current_page)
 
-                pdf_urls.extend(self.extract_links(search_results, 'pdf'))
-                non_pdf_urls.extend(self.extract_links(search_results, 'html'))
+                page_items = []
+                pdf_urls.extend(self.extract_links(search_results, 'pdf', page_items))
+                non_pdf_urls.extend(self.extract_links(search_results, 'html', page_items))
 
-                if not self.click_next_button(limited_pages):
+                # Sonuçlar en son değiştirilme tarihine göre sıralı; sayfadaki her şey daha önce görüldüyse dur
+                if self.page_is_stale(keyword, page_items):
+                    self.logger.info("Every result on this page was seen in an earlier run. Stopping pagination.")
                     break
 
         except Exception as e:
@@ -89,57 +124,69 @@ class EurWebScraper(BaseScraper):
 
         return pdf_urls, non_pdf_urls
 
-    def extract_links(self, search_results, link_type: str) -> List[Tuple[str, str, str, str]]:
+    def extract_links(self, search_results: List[dict], link_type: str,
+                      page_items: List[Tuple[str, str]] = None) -> List[Tuple[str, str, str, str]]:
         """
-        Belirtilen türdeki (PDF veya HTML) bağlantıları arama sonuçlarından çıkarır
-        ve açıklamaları bağlantılara girerek çeker.
+        Belirtilen türdeki (PDF veya HTML) bağlantıları `extract_result_rows` ile okunan arama sonuçlarından
+        çıkarır ve açıklamaları bağlantılara girerek çeker.
+
+        page_items verilirse, atlananlar dahil sayfadaki her sonucun (url, tarih) çifti buna eklenir.
         """
         self.logger.info(f"Extracting {link_type} links from results.")
         urls = []
+        rows = []
         for result in search_results:
-            name_elements = result.find_elements(By.XPATH, ".//a[starts-with(@id, 'cellar_') and @href]")
-            links = result.find_elements(By.XPATH, f".//a[starts-with(@title, '{link_type}') and @href]")
-            dates = result.find_elements(By.XPATH, ".//dd[contains(text(), '/')]")
-
-            for name_element, date, link in zip(name_elements, dates, links):
-                name_text = name_element.text.strip()[:20]
-                date_text = self.format_date(date.text.strip())
+            for name, date, link in zip(result['names'], result['dates'], result[f'{link_type.lower()}_links']):
+                url = self.canonicalize(link)
+                name_text = name.strip()[:20]
+                date_text = self.format_date(date.strip())
                 day, month, year = date_text.split('-')
                 date_text = f"{year}-{month}-{day}"
+                if page_items is not None:
+                    page_items.append((url, date_text))
+
+                # Daha önce işlenen bağlantılar için sayfa yükleme
+                if self.is_known_url(url):
+                    continue
+                rows.append((url, name_text, date_text))
 
-                url = link.get_attribute("href")
-
-                if link_type.lower() == 'html':
-                    # Bağlantıya giderek sayfanın tüm içeriğini al
-                    current_window = self.driver.current_window_handle
-                    self.driver.execute_script("window.open('');")
-                    self.driver.switch_to.window(self.driver.window_handles[-1])
-                    self.driver.get(url)
-                    try:
-                        # Sayfanın tüm metin içeriğini al
-                        description_text = self.driver.find_element(By.TAG_NAME, 'body').text.strip()
-                    except Exception as e:
-                        self.logger.error(f"Error fetching description from {url}: {e}")
-                        description_text = ""
-                    # Yeni sekmeyi kapat ve orijinal pencereye geri dön
-                    self.driver.close()
-                    self.driver.switch_to.window(current_window)
-                else:
-                    # PDF'ler için açıklamayı "this is a pdf url" olarak ayarla
-                    description_text = "this is a pdf url"
-
-                unique_name = f"{date_text}-{name_text}".replace('/', '_').replace(':', '').replace(' ', '_')
-
-                counter = 1
-                base_name = unique_name
-                while any(unique_name in item for item in urls):
-                    unique_name = f"{base_name}-{counter}"
-                    counter += 1
-
-                urls.append((url, date_text, unique_name, description_text))
+        # HTML sonuçlarının sayfaları birlikte yüklenir
+        detail_pages = self.load_detail_pages([url for url, _, _ in rows]) if link_type.lower() == 'html' else {}
+
+        for url, name_text, date_text in rows:
+            if link_type.lower() == 'html':
+                # Sayfanın tüm metin içeriğini al
+                description_text = self.get_page_text(url, detail_pages.get(url))
+            else:
+                # PDF'ler için açıklamayı "this is a pdf url" olarak ayarla
+                description_text = "this is a pdf url"
+
+            unique_name = f"{date_text}-{name_text}".replace('/', '_').replace(':', '').replace(' ', '_')
+
+            counter = 1
+            base_name = unique_name
+            while any(unique_name in item for item in urls):
+                unique_name = f"{base_name}-{counter}"
+                counter += 1
+
+            urls.append((url, date_text, unique_name, description_text))
 
         return urls
 
+    def get_page_text(self, url: str, page_source: str) -> str:
+        """
+        Sayfanın görünen metnini döndürür; sayfa daha sonra tablolar için yeniden indirilmez.
+        """
+        if page_source is None:
+            self.logger.error(f"Error fetching description from {url}")
+            return ""
+        self.capture_html(url, page_source)
+        soup = BeautifulSoup(page_source, 'html.parser')
+        for element in soup(['script', 'style', 'noscript']):
+            element.decompose()
+        body = soup.body or soup
+        return body.get_text(separator='\n', strip=True)
+
     def click_next_button(self, limited_page: int) -> bool:
         """
         Sonraki sayfa düğmesine tıklayıp tıklamamak için kontrol yapar.
@@ -153,8 +200,10 @@ class EurWebScraper(BaseScraper):
                 next_button = self.driver.find_element(By.XPATH, "//div[@class='ResultsTools']//a[@title='Next Page']")
                 if 'disabled' not in next_button.get_attribute('class') and next_button.get_attribute(
                         'href') != "javascript:;":
+                    page = self.driver.find_element(By.TAG_NAME, 'html')
+                    self.politeness.wait()
                     next_button.click()
-                    time.sleep(1)
+                    self.waits.page_turned(page)
                     return True
         except Exception as e:
             self.logger.error(f"Error clicking next button: {e}")
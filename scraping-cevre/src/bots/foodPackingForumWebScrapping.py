@@ -1,23 +1,42 @@
 import os
-import time
 import requests
 import json
 import logging
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import NoSuchElementException
-from selenium.webdriver.chrome.options import Options
 from typing import List, Tuple
 from bs4 import BeautifulSoup
 from config import setup_shared_logger
 from src.utils.baseScrapper import BaseScraper
+from src.utils.domExtract import Field
+from src.utils.waits import WaitProfile
 
 
 class FoodPackingForum(BaseScraper):
+    # Article pages are static; their text is in the entry-content block
+    detail_selector = '.entry-content'
+    # The site always got two seconds between two article requests
+    politeness_delay = 2.0
+
+    # The article cards of the search results
+    result_row_selector = "//article[contains(@class, 'blog-entry')]"
+    result_fields = {
+        'title': Field('.entry-title', 'text'),
+        'link': Field('.entry-title a', 'href'),
+        'date': Field('.entry-date', 'text'),
+        'description': Field('.entry-content', 'text'),
+    }
+
+    # The WordPress pages load many scripts; the search results page can take a while
+    wait_profile = WaitProfile(page_load=40)
+
+    # The WordPress search results page, which skips the menu toggle of the search form
+    search_url_template = '/?s={query}'
+
     def search_for_keyword(self, keyword):
         """
         Searches for the given keyword on the specific website.
@@ -37,14 +56,17 @@ class FoodPackingForum(BaseScraper):
             actions = ActionChains(self.driver)
             actions.move_to_element(element).click().perform()
 
-        search_box = WebDriverWait(self.driver, 20).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "form[role='search'] input.form-control.top-search-field"))
+        # The search box is usable once the toggle animation has shown it
+        search_box = self.waits.element(
+            (By.CSS_SELECTOR, "form[role='search'] input.form-control.top-search-field"), clickable=True
         )
-        time.sleep(2)
         search_box.clear()
         search_box.send_keys(keyword)
+        page = self.driver.find_element(By.TAG_NAME, 'html')
+        self.politeness.wait()
         search_box.send_keys(Keys.RETURN)
-        time.sleep(10)
+        # The search is a form submit; wait for the results page instead of a fixed delay
+        self.waits.page_turned(page)
 
     def get_urls(self, keyword: str, limited_page: int) -> Tuple[
         List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]:
@@ -64,18 +86,23 @@ class FoodPackingForum(BaseScraper):
                 - name (str): The name or title of the document.
                 - description_text (str): A brief description or summary of the document.
         """
-        pdf_urls = []
+        pdf_urls, non_pdf_urls_desc = self.result_lists()
         non_pdf_urls = []
 
-        self.driver.get(self.base_url)
-        time.sleep(5)
+        # Open the search results directly, or the base URL and its search form if that fails
+        if not self.open_search_results(keyword):
+            self.politeness.wait()
+            self.driver.get(self.base_url)
+            # The menu is set up by scripts after the load event
+            self.waits.dom_settled()
 
-        self.search_for_keyword(keyword)
+            self.search_for_keyword(keyword)
         # Site-specific URL retrieval logic goes here.
         if limited_page == 0:
             limited_page = 999
         for page in range(0, limited_page):
             print(f"Scraping page {page}")
+            self.record_page(page + 1)
             try:
                 articles_exist = self.driver.find_elements(By.CSS_SELECTOR, ".blog-entry")
                 print(articles_exist)
@@ -83,76 +110,72 @@ class FoodPackingForum(BaseScraper):
                     break
             except:
                 pass
-            # Find all article elements
-            articles = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_all_elements_located((By.XPATH, "//article[contains(@class, 'blog-entry')]"))
+            # Wait for the article elements
+            WebDriverWait(self.driver, 10).until(
+                EC.presence_of_all_elements_located((By.XPATH, self.result_row_selector))
             )
             try:
-                for article in articles:
+                # Read every article of the page with a single execute_script call
+                for article in self.extract_result_rows():
                     # Extract link and title
-                    title_element = article.find_element(By.CLASS_NAME, "entry-title")
-                    link = title_element.find_element(By.TAG_NAME, "a").get_attribute("href")
-                    name = title_element.text.strip()
+                    link = self.canonicalize(article['link'])
+                    name = article['title'].strip()
                     # Extract date
-                    date_element = article.find_element(By.CLASS_NAME, "entry-date")
-                    formatted_date = self.format_date(date_element.text.strip())
+                    formatted_date = self.format_date(article['date'].strip())
                     unique_name = f"{formatted_date}-{name}".replace('/', '_').replace(':', '').replace(' ', '_').replace('\n', '_')
 
                     # Extract description
-                    description_element = article.find_element(By.CLASS_NAME, "entry-content")
-                    description_text = description_element.text.strip()
+                    description_text = article['description'].strip()
 
                     # Append to appropriate list
                     if link.lower().endswith('.pdf'):
                         pdf_urls.append((link, formatted_date, unique_name, description_text))
 
                     non_pdf_urls.append((link, formatted_date, unique_name, description_text))
-            except:
-                pass
+            except Exception as e:
+                self.log_error(e, self.driver.current_url)
             # Check if there's a next page and navigate to it
             try:
                 next_page = self.driver.find_element(By.CSS_SELECTOR, "a.nextpostslink")
+                page = self.driver.find_element(By.TAG_NAME, 'html')
+                self.politeness.wait()
                 next_page.click()
-                time.sleep(3)  # Wait for the new page to load
+                self.waits.page_turned(page)  # Wait for the new page to load
             except NoSuchElementException:
                 print("No more pages to scrape")
                 break
         if len(non_pdf_urls) > 0 :
-            non_pdf_urls_desc = []
-            drivers = self.setup_driver()
-            try:
-                for url, date, title, _ in non_pdf_urls:
-                    print(url)
-                    new_description = self.fetch_article_content(drivers, url)
-                    non_pdf_urls_desc.append((url, date, title, new_description))
-                    time.sleep(2)  # Add a delay between requests to be polite
-            finally:
-                drivers.quit()
-        else:
-            non_pdf_urls_desc = non_pdf_urls
+            new_urls = [item for item in non_pdf_urls if not self.is_known_url(item[0])]
+            # Articles are fetched concurrently over HTTP; only those missing entry-content open in the browser
+            article_pages = self.load_detail_pages([url for url, _, _, _ in new_urls])
+            for url, date, title, _ in new_urls:
+                print(url)
+                new_description = self.fetch_article_content(url, article_pages.get(url))
+                non_pdf_urls_desc.append((url, date, title, new_description))
 
         return pdf_urls, non_pdf_urls_desc
 
-    def fetch_article_content(self, driver, url: str) -> str:
+    def fetch_article_content(self, url: str, page_source: str) -> str:
         """
         Fetch all content in specify url to add as decriptions
 
         Args:
-            driver : Headless driver.
             url (str): Url to fetch content
+            page_source (str): HTML of the article, loaded by `load_detail_pages`.
         Returns:
             Return full content of url page.
         """
         try:
-            driver.get(url)
-            # Wait for the content to load
-            wait = WebDriverWait(driver, 10)
-            content = wait.until(EC.presence_of_element_located((By.CLASS_NAME, "entry-content")))
+            if page_source is None:
+                raise ValueError("the page could not be loaded")
+            # The page is reused for the table extraction instead of being downloaded again
+            self.capture_html(url, page_source)
+            content = BeautifulSoup(page_source, 'html.parser').select_one(self.detail_selector)
 
-            paragraphs = content.find_elements(By.TAG_NAME, "p")
+            paragraphs = content.find_all("p")
 
             # Extract and join the text from all paragraphs
-            full_content = ' '.join([p.text.strip() for p in paragraphs])
+            full_content = ' '.join([p.get_text().strip() for p in paragraphs])
             return full_content
         except Exception as e:
             print(f"Error fetching {url}: {e}")
@@ -164,13 +187,4 @@ class FoodPackingForum(BaseScraper):
         """
         from datetime import datetime
         date_obj = datetime.strptime(date_string, "%B %d, %Y")
-        return date_obj.strftime("%Y-%m-%d")
-
-    def setup_driver(self):
-        """
-        Setup headless driver to read all the content in the urls
-        """
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        driver = webdriver.Chrome(options=chrome_options)
-        return driver
\ No newline at end of file
+        return date_obj.strftime("%Y-%m-%d")
\ No newline at end of file
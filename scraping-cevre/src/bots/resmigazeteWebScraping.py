@@ -5,7 +5,6 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time
 from typing import List, Tuple
 from bs4 import BeautifulSoup
 import json
@@ -13,14 +12,45 @@ import logging
 
 from config import setup_shared_logger
 from src.utils.baseScrapper import BaseScraper
+from src.utils.devtools import BrowserProfile
+from src.utils.domExtract import Field
+from src.utils.waits import WaitProfile
+
+# Sonuç tablosunun DataTables sayfa uzunluğunu büyütür; tablo henüz kurulmadıysa null, zaten yeterince uzunsa
+# 'kept', büyütüldüyse 'changed' döner
+PAGE_LENGTH_SCRIPT = """
+if (!(window.jQuery && jQuery.fn.dataTable && jQuery.fn.dataTable.isDataTable('#filterTable'))) {
+    return null;
+}
+const table = jQuery('#filterTable').DataTable();
+if (table.page.len() < 0 || table.page.len() >= arguments[0]) {
+    return 'kept';
+}
+table.page.len(arguments[0]).draw(false);
+return 'changed';
+"""
 
 
 class ResmiWebScraper(BaseScraper):
-    def __init__(self, key_words: List[str], base_url: str, limited_page: int, driver):
+    # Sonuç sayfasındaki her bağlantı bir satırdır
+    result_row_selector = "//a[@href]"
+    result_fields = {
+        'href': Field('', 'href'),
+        'text': Field('', 'text'),
+    }
+
+    # Arama tablosu DataTables ile parça parça çizilir; DOM'un daha uzun süre sakin kalması beklenir
+    wait_profile = WaitProfile(settle=15, quiet=1.0)
+    # Arama ve tablo öğeleri beklenir; sayfaların load olayını beklemeye gerek yok
+    browser_profile = BrowserProfile(eager=True)
+    # Sonuç tablosu DataTables'ın `page.len` API'siyle 100 satıra çıkarılır, bkz. `set_page_size`
+    page_size = 100
+
+    def __init__(self, key_words: List[str], base_url: str, limited_page: int, driver, **kwargs):
         """
         ResmiWebScraper sınıfı BaseScraper'dan miras alır.
         """
-        super().__init__(key_words, base_url, limited_page, driver, site_name="resmigazete")
+        super().__init__(key_words, base_url, limited_page, driver, site_name="resmigazete", **kwargs)
 
     def search_for_keyword(self, keyword: str):
         """
@@ -32,7 +62,6 @@ class ResmiWebScraper(BaseScraper):
                                             "body > div.container-fluid.mb-3 > div > div > div > div > div.col-12.col-md-8 > div > button"))
         )
         search_button.click()
-        time.sleep(1)
 
         search_bar = WebDriverWait(self.driver, 20).until(
             EC.element_to_be_clickable((By.ID, "genelaranacakkelime"))
@@ -40,9 +69,29 @@ class ResmiWebScraper(BaseScraper):
         search_bar.click()
         search_bar.clear()
         search_bar.send_keys(keyword)
-        time.sleep(1)
+        page = self.driver.find_element(By.TAG_NAME, 'html')
+        self.politeness.wait()
         search_bar.send_keys(Keys.RETURN)
-        time.sleep(1)
+        # Sonuç sayfasının yüklenmesini bekle
+        self.waits.page_turned(page)
+
+    def set_page_size(self) -> bool:
+        """
+        Sonuç tablosunu sayfa başına `page_size` satır gösterecek şekilde yeniden çizer.
+        """
+        # Tablo arama sonrası betiklerle kurulur; kurulmasını bekle
+        result = self.waits.until('result table',
+                                  lambda driver: driver.execute_script(PAGE_LENGTH_SCRIPT, self.page_size),
+                                  self.wait_profile.settle, required=False)
+        if not result:
+            self.logger.info("The result table is not a DataTables table, keeping its page length.")
+            return False
+        changed = result == 'changed'
+        if changed:
+            # DataTables satırları yeniden çizer; DOM'un durulmasını bekle
+            self.waits.dom_settled()
+            self.logger.info(f"Result table shows {self.page_size} rows per page.")
+        return changed
 
     def get_urls(self, keyword: str, limited_pages: int) -> Tuple[
         List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]:
@@ -50,40 +99,50 @@ class ResmiWebScraper(BaseScraper):
         Anahtar kelimeye göre PDF ve PDF olmayan URL'leri çıkarır.
         """
         matching_links = []
-        pdf_urls = []
-        non_pdf_urls = []
+        pdf_urls, non_pdf_urls = self.result_lists()
 
-        self.driver.get(self.base_url)
+        # Arama adresi bir kez öğrenildiyse sonuç tablosu doğrudan açılır, yoksa arama formu kullanılır
+        if not self.open_search_results(keyword, "//table[@id='filterTable']//a[@href]"):
+            self.politeness.wait()
+            self.driver.get(self.base_url)
 
-        self.search_for_keyword(keyword)
+            self.search_for_keyword(keyword)
+            self.learn_search_url(keyword)
+        self.set_page_size()
         current_page = 1
         while True:
             self.logger.info(f"Processing page {current_page}")
+            self.record_page(current_page)
             try:
                 result_links = WebDriverWait(self.driver, 10).until(
                     EC.presence_of_all_elements_located((By.XPATH, "//table[@id='filterTable']//a[@href]"))
                 )
 
-                dates = WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_all_elements_located(
-                        (By.XPATH,
-                         "//table[@id='filterTable']//a[@href]/../../following-sibling::td"))
+                date_cells = "//table[@id='filterTable']//a[@href]/../../following-sibling::td"
+                WebDriverWait(self.driver, 20).until(
+                    EC.presence_of_all_elements_located((By.XPATH, date_cells))
                 )
-                dates = [td.text for td in dates if len(td.text.strip()) == 10]
+                # Tarih hücreleri tek bir execute_script çağrısıyla okunur
+                dates = [row['text'] for row in self.extract_result_rows(date_cells, {'text': Field()})]
+                dates = [date for date in dates if len(date.strip()) == 10]
 
                 for result, date in zip(result_links, dates):
                     try:
+                        handles_before = len(self.driver.window_handles)
+                        self.politeness.wait()
                         result.click()
-                        time.sleep(1)
 
-                        self.driver.switch_to.window(self.driver.window_handles[-1])
-                        links = WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_all_elements_located((By.XPATH, "//a[@href]")))
+                        # Bağlantı yeni sekmede açılır; sekmenin açılmasını bekle
+                        self.driver.switch_to.window(self.waits.new_window(handles_before))
+                        WebDriverWait(self.driver, 10).until(
+                            EC.presence_of_all_elements_located((By.XPATH, self.result_row_selector)))
+                        # Sayfadaki tüm bağlantılar tek bir execute_script çağrısıyla okunur
+                        links = self.extract_result_rows()
 
                         for link in links:
                             # Linke tıklamadan önce gerekli bilgileri al
-                            link_url = link.get_attribute("href")
-                            link_text = link.text.strip()
+                            link_url = self.canonicalize(link['href'])
+                            link_text = link['text'].strip()
                             name_text = link_text[:20]
                             date_text = self.format_date(date)
                             day, month, year = date_text.split('-')
@@ -102,31 +161,37 @@ class ResmiWebScraper(BaseScraper):
 
                             # Öncelikle link metninde anahtar kelimeyi ara
                             if re.search(r'\b' + re.escape(keyword) + r'\b', link_text, re.IGNORECASE):
+                                # Daha önce işlenen linkler için sekme açma
+                                if self.is_known_url(link_url):
+                                    continue
+
                                 # Anahtar kelime bulunduysa linkin içine gir
                                 original_window = self.driver.current_window_handle
                                 self.driver.execute_script("window.open('');")
                                 self.driver.switch_to.window(self.driver.window_handles[-1])
+                                # Sayfa yalnızca okunur; stil dosyaları da engellenir
+                                self.apply_browser_profile('stylesheet')
+                                self.politeness.wait()
                                 self.driver.get(link_url)
 
                                 # Sayfanın yüklenmesini bekle
-                                try:
-                                    WebDriverWait(self.driver, 10).until(
-                                        lambda driver: driver.execute_script('return document.readyState') == 'complete'
-                                    )
-                                except Exception as e:
-                                    self.logger.error(f"Page did not load properly: {e}")
+                                if not self.waits.ready_state():
+                                    self.logger.error(f"Page did not load properly: {link_url}")
 
                                 # Sayfa içeriğini al
                                 page_content = self.driver.page_source
+                                # Tablolar daha sonra bu kaynaktan çıkarılır, sayfa ikinci kez indirilmez
+                                if not link_url.endswith('.pdf'):
+                                    self.capture_html(link_url, page_content)
 
                                 # BeautifulSoup ile sayfa içeriğini işle
                                 soup = BeautifulSoup(page_content, 'html.parser')
                                 description_text = soup.get_text(separator=' ', strip=True)
 
-                                # Açılan sekmeyi kapat ve önceki pencereye dön
+                                # Tarayıcının yüklediği PDF'i al, açılan sekmeyi kapat ve önceki pencereye dön
+                                self.collect_browser_pdfs()
                                 self.driver.close()
                                 self.driver.switch_to.window(original_window)
-                                time.sleep(1)
 
                                 # Elde ettiğimiz bilgileri listelere ekle
                                 if link_url.endswith('.pdf'):
@@ -136,7 +201,6 @@ class ResmiWebScraper(BaseScraper):
                         # İç sayfayı kapat ve ana pencereye dön
                         self.driver.close()
                         self.driver.switch_to.window(self.driver.window_handles[0])
-                        time.sleep(1)
 
                     except Exception as e:
                         self.logger.error(f"An error occurred: {e}. Continuing with the next iteration.")
@@ -160,8 +224,11 @@ class ResmiWebScraper(BaseScraper):
                     next_button = self.driver.find_elements(By.ID, "filterTable_next")
                     if next_button and 'paginate_button page-item next disabled' not in next_button[0].get_attribute(
                             'class') and next_button[0].get_attribute('href') != "javascript:;":
+                        # DataTables tabloyu yeniden çizer; eski satırların kaybolmasını bekle
+                        first_row = self.driver.find_element(By.XPATH, "//table[@id='filterTable']//tbody/tr")
+                        self.politeness.wait()
                         next_button[0].click()
-                        time.sleep(5)
+                        self.waits.page_turned(first_row)
                     else:
                         break
                 else:
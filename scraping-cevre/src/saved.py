@@ -1,19 +1,209 @@
+import mimetypes
+import os
+import re
+import shutil
+from collections import defaultdict
+from multiprocessing import util
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from azure.storage.blob import ContentSettings
+
+from config import close_shared_logger
 from src.bots import EchaWebScraper, EurWebScraper, ResmiWebScraper, Enhesa
-from selenium import webdriver
 from src.bots.bundesanzeigerWebScraping import Bundesanzeiger
 from src.bots.foodPackingForumWebScrapping import FoodPackingForum
+from src.utils.documentStore import link_or_copy
+from src.utils.driverPool import DriverPool
+from src.utils.mail_trigger import get_blob_service_client
+from src.utils.watermark import WatermarkStore
+
+# The DriverPool of a worker process, created by `init_worker`
+_worker_pool = None
+
+
+def create_scraper(script, link, keyword, limited_page, driver, **options):
+    """
+    Create the scraper that handles the given script for a single keyword.
+
+    Parameters:
+    script (str): The name of the script to run.
+    link (str): The base URL or link to be used in the script.
+    keyword (str): The keyword to process with the script.
+    limited_page (int): The page limit for scraping (if applicable).
+    driver (webdriver.Chrome): The driver the scraper works with.
+    options (dict): Extra BaseScraper options such as `work_dir`, `log_root` and `upload_state`.
+
+    Returns:
+    BaseScraper: The scraper instance, or None if the script is unknown.
+    """
+    if script == 'echaWebScraping.py':
+        return EchaWebScraper(key_words=[keyword], base_url=link, limited_pages=limited_page,
+                              driver=driver, **options)
+    elif script == 'eur_lexWebScraping.py':
+        return EurWebScraper(key_words=[keyword], base_url=link, limited_page=limited_page,
+                             driver=driver, **options)
+    elif script == 'resmigazeteWebScraping.py':
+        return ResmiWebScraper(key_words=[keyword], base_url=link, limited_page=limited_page,
+                               driver=driver, **options)
+    elif script == 'bundesanzeigerWebScraping.py':
+        return Bundesanzeiger(key_words=[keyword],
+                              base_url=link,
+                              limited_pages=limited_page,
+                              driver=driver,
+                              site_name="bundesanzeiger",
+                              **options
+                              )
+    elif script == 'foodPackingForumWebScrapping.py':
+        return FoodPackingForum(key_words=[keyword],
+                                base_url=link,
+                                limited_pages=limited_page,
+                                driver=driver,
+                                site_name="foodPackingForum",
+                                **options
+                                )
+    elif script == 'enhesaWebScraping.py':
+        return Enhesa(key_words=[keyword],
+                      base_url=link,
+                      limited_pages=limited_page,
+                      driver=driver,
+                      site_name="enhesa",
+                      **options
+                      )
+    return None
+
+
+# The bot class of each script, for what is needed before the scraper exists
+SCRAPER_CLASSES = {
+    'echaWebScraping.py': EchaWebScraper,
+    'eur_lexWebScraping.py': EurWebScraper,
+    'resmigazeteWebScraping.py': ResmiWebScraper,
+    'bundesanzeigerWebScraping.py': Bundesanzeiger,
+    'foodPackingForumWebScrapping.py': FoodPackingForum,
+    'enhesaWebScraping.py': Enhesa,
+}
+
+
+def page_load_strategy(script, block_resources=True):
+    """
+    Return the page load strategy of the browser a script runs in: 'eager' where the bot's browser profile
+    allows it and the lean browser profiles are enabled, 'normal' otherwise.
+
+    Parameters:
+    script (str): The name of the script to run.
+    block_resources (bool): Whether the lean browser profiles are enabled.
+
+    Returns:
+    str: The page load strategy to borrow a browser with.
+    """
+    scraper_class = SCRAPER_CLASSES.get(script)
+    if block_resources and scraper_class is not None and scraper_class.browser_profile.eager:
+        return 'eager'
+    return 'normal'
+
+
+def job_directory(staging_root, job):
+    """
+    Return the private staging directory of a (site, keyword) job.
+
+    Parameters:
+    staging_root (str): The directory holding the staging areas of all jobs.
+    job (tuple): A (job index, script name, link, keyword, limited page number) tuple.
+
+    Returns:
+    str: The staging directory of the job.
+    """
+    index, script, _, keyword, _ = job
+    slug = re.sub(r'[^\w-]+', '_', f"{os.path.splitext(script)[0]}-{keyword}")
+    return os.path.join(staging_root, f"{index:04d}-{slug}")
+
+
+def init_worker(max_jobs_per_driver):
+    """
+    Initialize a worker process with a single warm browser that is reused by every job of the process.
+
+    Parameters:
+    max_jobs_per_driver (int): Number of jobs after which the browser is replaced by a fresh one.
+    """
+    global _worker_pool
+    _worker_pool = DriverPool(size=1, max_jobs_per_driver=max_jobs_per_driver)
+    # Worker processes leave through os._exit, so atexit handlers would never quit Chrome
+    util.Finalize(None, _worker_pool.close, exitpriority=10)
+
+
+def run_job(job, staging_root, ledger_dir, documents_dir, scraper_options):
+    """
+    Run a single (site, keyword) job inside a worker process.
+
+    The job borrows the warm headless Chrome of its worker process and gets its own `raw` staging
+    area and its own log stream, both below `job_directory(staging_root, job)`, so that concurrent
+    jobs never share files. Only the per-site URL ledgers and the document store are shared, through
+    `ledger_dir` and `documents_dir`.
+
+    Parameters:
+    job (tuple): A (job index, script name, link, keyword, limited page number) tuple.
+    staging_root (str): The directory holding the staging areas of all jobs.
+    ledger_dir (str): The directory holding the per-site ledger databases.
+    documents_dir (str): The root of the content-addressed document store.
+    scraper_options (dict): Extra BaseScraper options shared by all jobs.
+
+    Returns:
+    tuple: The job and an error message, which is None when the job succeeded.
+    """
+    _, script, link, keyword, limited_page = job
+    work_dir = job_directory(staging_root, job)
+    scraper = None
+
+    print(f'Running {script} with link {link} and keyword: {keyword} in {work_dir}')
+
+    try:
+        strategy = page_load_strategy(script, scraper_options.get('block_resources', True))
+        with _worker_pool.driver(strategy) as driver:
+            scraper = create_scraper(script, link, keyword, limited_page, driver,
+                                     work_dir=work_dir,
+                                     log_root=os.path.join(work_dir, 'logs'),
+                                     upload_state=False,
+                                     ledger_dir=ledger_dir,
+                                     documents_dir=documents_dir,
+                                     **scraper_options)
+            if scraper:
+                scraper.start()
+        return job, None
+    except Exception as e:
+        return job, str(e)
+    finally:
+        # The worker process outlives the job; its log stream does not
+        if scraper:
+            close_shared_logger(scraper.logger)
 
 
 class ScriptRunner:
 
-    def __init__(self):
+    def __init__(self, workers=1, max_sessions_per_site=1, staging_root=os.path.join('data', 'parallel'),
+                 max_jobs_per_driver=20, scraper_options=None, ledger_dir=os.path.join('data', 'ledger'),
+                 documents_dir=os.path.join('data', 'documents')):
         """
         Initialize the ScriptRunner.
 
         Parameters:
-        script_keywords_file (str): Path to the text file containing script names,
-                                    links, and associated keywords.
+        workers (int): Number of worker processes. With 1 worker the scripts run one after another
+                       in the current process.
+        max_sessions_per_site (int): Maximum number of jobs that may run against the same site at once.
+        staging_root (str): Directory holding the private staging areas of parallel jobs.
+        max_jobs_per_driver (int): Number of keywords a warm browser serves before it is recycled.
+        scraper_options (dict): Extra BaseScraper options passed to every scraper, such as
+                                `pipeline_workers` and `pipeline_queue_size`.
+        ledger_dir (str): Directory holding the per-site URL ledgers, shared by parallel jobs.
+        documents_dir (str): Root of the content-addressed document store, shared by parallel jobs.
         """
+        if max_sessions_per_site < 1:
+            raise ValueError(f"max_sessions_per_site must be at least 1, got {max_sessions_per_site}")
+        self.workers = workers
+        self.max_sessions_per_site = max_sessions_per_site
+        self.staging_root = staging_root
+        self.max_jobs_per_driver = max_jobs_per_driver
+        self.scraper_options = scraper_options or {}
+        self.ledger_dir = ledger_dir
+        self.documents_dir = documents_dir
 
     def read_scripts_from_file(self, filepath):
         """
@@ -64,8 +254,16 @@ class ScriptRunner:
         scripts (list): A list of tuples where each tuple contains:
                         (script name, link, list of keywords, limited page number).
         """
-        for script, link, keywords, limited_page in scripts:
-            self.run_script(script, link, keywords, limited_page)
+        if self.workers > 1:
+            self.run_parallel(scripts)
+            return
+
+        self.driver_pool = DriverPool(size=1, max_jobs_per_driver=self.max_jobs_per_driver)
+        try:
+            for script, link, keywords, limited_page in scripts:
+                self.run_script(script, link, keywords, limited_page)
+        finally:
+            self.driver_pool.close()
 
     def run_script(self, script, link, keywords, limited_page):
         """
@@ -80,58 +278,150 @@ class ScriptRunner:
 
         for keyword in keywords:
 
-            chrome_options = webdriver.ChromeOptions()
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--remote-debugging-port=9222")
-            chrome_options.add_argument("--window-size=1920,1080")
-
-            driver = webdriver.Chrome(options=chrome_options)
-
             print(f'Running {script} with link {link} and keyword: {keyword}')
 
             try:
-                if script == 'echaWebScraping.py':
-                    scraper = EchaWebScraper(key_words=[keyword], base_url=link, limited_pages=limited_page,
-                                             driver=driver)
-                    scraper.start()
-                elif script == 'eur_lexWebScraping.py':
-                    scraper = EurWebScraper(key_words=[keyword], base_url=link, limited_page=limited_page,
-                                            driver=driver)
-                    scraper.start()
-                elif script == 'resmigazeteWebScraping.py':
-                    scraper = ResmiWebScraper(key_words=[keyword], base_url=link, limited_page=limited_page,
-                                              driver=driver)
-                    scraper.start()
-                elif script == 'bundesanzeigerWebScraping.py':
-                    scraper = Bundesanzeiger(key_words=[keyword],
-                                             base_url=link,
-                                             limited_pages=limited_page,
-                                             driver=driver,
-                                             site_name="bundesanzeiger"
-                                             )
-                    scraper.start()
-                elif script == 'foodPackingForumWebScrapping.py':
-                    scraper = FoodPackingForum(key_words=[keyword],
-                                               base_url=link,
-                                               limited_pages=limited_page,
-                                               driver=driver,
-                                               site_name="foodPackingForum"
-                                               )
-                    scraper.start()
-                elif script == 'enhesaWebScraping.py':
-                    scraper = Enhesa(key_words=[keyword],
-                                     base_url=link,
-                                     limited_pages=limited_page,
-                                     driver=driver,
-                                     site_name="enhesa"
-                                     )
-                    scraper.start()
+                # The pool resets the browser after each keyword and recycles it when it crashed
+                strategy = page_load_strategy(script, self.scraper_options.get('block_resources', True))
+                with self.driver_pool.driver(strategy) as driver:
+                    scraper = create_scraper(script, link, keyword, limited_page, driver,
+                                             ledger_dir=self.ledger_dir, documents_dir=self.documents_dir,
+                                             **self.scraper_options)
+                    if scraper:
+                        scraper.start()
             except Exception as e:
                 print(f"Error occurred while running {script} with keyword {keyword}: {e}")
-            finally:
-                driver.quit()  # Make sure to close the driver after each keyword
 
+    def build_jobs(self, scripts):
+        """
+        Flatten the scripts into (site, keyword) jobs, numbered in file order.
+
+        Parameters:
+        scripts (list): A list of (script name, link, list of keywords, limited page number) tuples.
+
+        Returns:
+        list: A list of (job index, script name, link, keyword, limited page number) tuples.
+        """
+        jobs = []
+        for script, link, keywords, limited_page in scripts:
+            for keyword in keywords:
+                jobs.append((len(jobs), script, link, keyword, limited_page))
+        return jobs
+
+    def run_parallel(self, scripts):
+        """
+        Fan the (site, keyword) jobs out over a pool of worker processes.
+
+        Jobs are submitted in file order, but a job is held back while its site already has
+        `max_sessions_per_site` jobs running. Once every job has finished, the staging areas are
+        merged into `data` in job order so the result does not depend on completion order.
+
+        Parameters:
+        scripts (list): A list of (script name, link, list of keywords, limited page number) tuples.
+        """
+        jobs = self.build_jobs(scripts)
+        if not self.scraper_options.get('resume'):
+            # A resumed run keeps the staging areas of the interrupted run next to their checkpoints
+            shutil.rmtree(self.staging_root, ignore_errors=True)
+        os.makedirs(self.staging_root, exist_ok=True)
+
+        pending = list(jobs)
+        running = {}
+        sessions = defaultdict(int)
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                 initargs=(self.max_jobs_per_driver,)) as executor:
+            while pending or running:
+                for job in list(pending):
+                    if len(running) >= self.workers:
+                        break
+                    if sessions[job[1]] >= self.max_sessions_per_site:
+                        continue
+                    pending.remove(job)
+                    sessions[job[1]] += 1
+                    running[executor.submit(run_job, job, self.staging_root, self.ledger_dir,
+                                             self.documents_dir, self.scraper_options)] = job
+
+                if not running:
+                    # Nothing runs that could free a session, so waiting would never end
+                    raise RuntimeError(f"No job could be started for {len(pending)} pending jobs "
+                                       f"with max_sessions_per_site={self.max_sessions_per_site}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    sessions[job[1]] -= 1
+                    try:
+                        _, error = future.result()
+                    except Exception as e:
+                        error = str(e)
+                    if error:
+                        print(f"Error occurred while running {job[1]} with keyword {job[3]}: {error}")
+
+        self.merge_staging(jobs)
 
+    def merge_staging(self, jobs, work_dir='data', log_root='logs'):
+        """
+        Merge the staging areas of finished jobs back into the regular layout, in job order.
+
+        Raw files are copied to `<work_dir>/raw`, log streams are appended to the site logs and the
+        watermarks of all jobs are merged into `<work_dir>/watermarks.json`, which is uploaded once. The
+        URL ledgers need no merging: jobs upload their own append-only segments.
+
+        Parameters:
+        jobs (list): The jobs returned by `build_jobs`.
+        work_dir (str): The regular data directory.
+        log_root (str): The regular log directory.
+        """
+        watermarks = WatermarkStore(os.path.join(work_dir, 'watermarks.json'))
+
+        for job in jobs:
+            job_dir = job_directory(self.staging_root, job)
+            if not os.path.isdir(job_dir):
+                continue
+
+            raw_dir = os.path.join(job_dir, 'raw')
+            if os.path.isdir(raw_dir):
+                # PDFs are links into the shared document store; keep them links
+                shutil.copytree(raw_dir, os.path.join(work_dir, 'raw'), dirs_exist_ok=True,
+                                copy_function=link_or_copy)
+
+            job_log_root = os.path.join(job_dir, 'logs')
+            if os.path.isdir(job_log_root):
+                for site_log in sorted(os.listdir(job_log_root)):
+                    source = os.path.join(job_log_root, site_log, f"{site_log}.log")
+                    if not os.path.exists(source):
+                        continue
+                    os.makedirs(os.path.join(log_root, site_log), exist_ok=True)
+                    with open(source, 'r', encoding='utf-8') as src, \
+                            open(os.path.join(log_root, site_log, f"{site_log}.log"), 'a', encoding='utf-8') as dst:
+                        shutil.copyfileobj(src, dst)
+
+            job_watermarks = WatermarkStore(os.path.join(job_dir, 'watermarks.json'))
+            job_watermarks.load()
+            watermarks.merge(job_watermarks)
+
+        if watermarks.watermarks:
+            watermarks.save()
+            self.upload_state_file(watermarks.path)
+
+    def upload_state_file(self, local_file_path, container_name="ds-sisecam-urls"):
+        """
+        Upload a merged state file (`watermarks.json`) to Azure Blob Storage.
+
+        Parameters:
+        local_file_path (str): Local path of the merged file.
+        container_name (str): The container holding the state files.
+        """
+        try:
+            blob_service_client = get_blob_service_client(os.getenv("account_name"), os.getenv("account_key"),
+                                                          os.getenv("account_url"))
+            blob_client = blob_service_client.get_blob_client(container=container_name,
+                                                              blob=os.path.basename(local_file_path))
+            _, extension = os.path.splitext(local_file_path)
+            content_type = mimetypes.types_map.get(extension, 'application/octet-stream')
+            with open(local_file_path, 'rb') as f:
+                blob_client.upload_blob(data=f, content_settings=ContentSettings(content_type=content_type),
+                                        overwrite=True, timeout=300)
+            print(f"Uploaded merged {local_file_path} to Azure Blob Storage.")
+        except Exception as e:
+            print(f"Error while uploading {local_file_path}: {e}")
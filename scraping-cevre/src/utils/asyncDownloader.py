@@ -0,0 +1,184 @@
+import asyncio
+import importlib.util
+import time
+from typing import Any, Callable, Iterable, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.utils.documentStore import DocumentStore
+from src.utils.httpCache import HttpCache
+from src.utils.httpClient import RETRY_STATUSES, HttpClient
+from src.utils.waits import RateLimiter
+
+# HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`)
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+
+class AsyncDownloader:
+    """
+    Fetches many documents concurrently on an asyncio event loop with `httpx`.
+
+    The number of requests in flight is bounded globally and per host, so EUR-Lex and ECHA, which serve most
+    of the documents, get several parallel downloads without one slow host taking every slot. HTTP/2 is
+    negotiated when `h2` is installed, multiplexing the requests to a host over one connection.
+
+    Timeouts, retries, backoff and metrics follow the given `HttpClient`, so both engines behave the same.
+    The completion callbacks run on the event loop thread one at a time; they may use the ledger and write
+    files without further locking.
+    """
+
+    def __init__(self, http_client: HttpClient, concurrency: int = 16, per_host_concurrency: int = 4,
+                 http2: bool = True, chunk_size: int = 256 * 1024, logger=None):
+        """
+        :param http_client: The client whose timeouts, retry policy, headers, cookies and metrics are used.
+        :param concurrency: The maximum number of requests in flight.
+        :param per_host_concurrency: The maximum number of requests in flight to one host.
+        :param http2: Use HTTP/2 where the server supports it and `h2` is installed.
+        :param chunk_size: Bytes of a streamed body held in memory at a time.
+        :param logger: The logger retries and errors are reported to.
+        """
+        self.http = http_client
+        self.concurrency = max(1, concurrency)
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.chunk_size = chunk_size
+        self.logger = logger
+        if http2 and not HTTP2_AVAILABLE and logger:
+            logger.info("The h2 package is not installed, downloading over HTTP/1.1.")
+
+    def download_to_store(self, jobs: Iterable[Tuple[str, Any]], store: DocumentStore,
+                          on_done: Callable[[Any, str, int], None], on_error: Callable[[Any, Exception], None],
+                          cache: HttpCache = None):
+        """
+        Streams the documents into the document store.
+
+        :param jobs: `(url, item)` pairs; the item is handed back to the callbacks.
+        :param store: The store the bodies are written to.
+        :param on_done: Called with the item, the content hash and the size of each stored document.
+        :param on_error: Called with the item and the exception when a download or `on_done` fails.
+        :param cache: The validator cache; cached documents are requested conditionally and a 304 answer
+                      reports the stored object.
+        """
+        async def consume(url, response):
+            writer = store.open_writer()
+            try:
+                async for chunk in response.aiter_bytes(self.chunk_size):
+                    writer.write(chunk)
+            except BaseException:
+                writer.abort()
+                raise
+            self.http.record_bytes(url, writer.size)
+            content_hash = writer.commit()
+            if cache:
+                cache.update(url, response.headers, content_hash, writer.size)
+            return content_hash, writer.size
+
+        self.run(jobs, consume, lambda item, result: on_done(item, *result), on_error, cache,
+                 cache.not_modified if cache else None)
+
+    def fetch(self, jobs: Iterable[Tuple[str, Any]], on_done: Callable[[Any, bytes], None],
+              on_error: Callable[[Any, Exception], None], cache: HttpCache = None, politeness: RateLimiter = None):
+        """
+        Fetches small bodies, like HTML detail pages, into memory.
+
+        :param jobs: `(url, item)` pairs; the item is handed back to the callbacks.
+        :param on_done: Called with the item and the body of each page.
+        :param on_error: Called with the item and the exception when a request or `on_done` fails.
+        :param cache: The validator cache; cached pages are requested conditionally and a 304 answer is
+                      served from the document store.
+        :param politeness: The rate limit of the site every request and retry waits for, as browser page
+                           loads do.
+        """
+        async def consume(url, response):
+            content = await response.aread()
+            self.http.record_bytes(url, len(content))
+            if cache:
+                cache.update_content(url, response.headers, content)
+            return content
+
+        self.run(jobs, consume, on_done, on_error, cache, cache.read if cache else None, politeness)
+
+    def run(self, jobs: Iterable[Tuple[str, Any]], consume, on_done: Callable[[Any, Any], None],
+            on_error: Callable[[Any, Exception], None], cache: HttpCache = None,
+            not_modified: Callable[[str], Any] = None, politeness: RateLimiter = None):
+        """
+        Runs the jobs to completion on a new event loop.
+
+        :param jobs: `(url, item)` pairs.
+        :param consume: A coroutine function reading a successful `(url, response)` into a result.
+        :param on_done: Called with the item and the result of `consume`.
+        :param on_error: Called with the item and the exception when a request, `consume` or `on_done` fails.
+        :param cache: The validator cache the conditional request headers come from.
+        :param not_modified: Turns the URL of a 304 response into the result handed to `on_done`.
+        :param politeness: The rate limit every request waits for; none by default.
+        """
+        jobs = list(jobs)
+        if jobs:
+            asyncio.run(self._run(jobs, consume, on_done, on_error, cache, not_modified, politeness))
+
+    async def _run(self, jobs, consume, on_done, on_error, cache, not_modified, politeness):
+        connect_timeout, read_timeout = self.http.timeout
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        global_slots = asyncio.Semaphore(self.concurrency)
+        host_slots = {}
+
+        async with httpx.AsyncClient(http2=self.http2, limits=limits, follow_redirects=True,
+                                     timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                                     headers=self.http.shared_headers,
+                                     cookies=self.http.session.cookies) as client:
+            async def job(url, item):
+                host = urlsplit(url).netloc
+                slots = host_slots.setdefault(host, asyncio.Semaphore(self.per_host_concurrency))
+                try:
+                    headers = cache.headers(url) if cache else {}
+                    result = await self._get(client, url, host, global_slots, slots, consume, headers, not_modified,
+                                             politeness)
+                    on_done(item, result)
+                except Exception as e:
+                    on_error(item, e)
+
+            await asyncio.gather(*(job(url, item) for url, item in jobs))
+
+    async def _get(self, client, url, host, global_slots, host_slots, consume, headers, not_modified, politeness):
+        attempt = 0
+        while True:
+            # Slots are held per attempt, so a request waiting for its retry does not block others
+            async with global_slots, host_slots:
+                if politeness:
+                    await politeness.wait_async()
+                start = time.monotonic()
+                answered = False
+                try:
+                    async with client.stream('GET', url, headers=headers) as response:
+                        answered = True
+                        retry = response.status_code in RETRY_STATUSES and attempt < self.http.max_retries
+                        self.http.record_request(host, time.monotonic() - start,
+                                                 failed=response.status_code >= 400 and not retry)
+                        if response.status_code == 304 and headers and not_modified:
+                            return not_modified(url)
+                        if not retry:
+                            response.raise_for_status()
+                            return await consume(url, response)
+                        delay = self.http.retry_after(response)
+                        if delay is None:
+                            delay = self.http.backoff(attempt)
+                        error = f"HTTP {response.status_code}"
+                except httpx.TransportError as e:
+                    # Connection errors and timeouts, also those in the middle of a body
+                    if not answered:
+                        self.http.record_request(host, time.monotonic() - start,
+                                                 failed=attempt >= self.http.max_retries)
+                    if attempt >= self.http.max_retries:
+                        raise
+                    delay = self.http.backoff(attempt)
+                    error = type(e).__name__
+
+            self.http.record_retry(host)
+            message = f"{error} from {url}, retrying in {delay:.1f}s ({attempt + 1}/{self.http.max_retries})."
+            if self.logger:
+                self.logger.warning(message)
+            else:
+                print(message)
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -1,16 +1,37 @@
+import hashlib
 import json
 import os
 from abc import ABC, abstractmethod
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, UnicodeDammit
 import logging
-from typing import List, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from azure.storage.blob import BlobServiceClient, ContentSettings
 from azure.storage.blob import generate_account_sas, ResourceTypes, AccountSasPermissions
 from datetime import datetime, timedelta
 import mimetypes
+import threading
+import time
+from urllib.parse import parse_qsl, quote_plus, urljoin, urlsplit, urlunsplit
 from dotenv import load_dotenv
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
 from config import setup_shared_logger
+from src.utils.capturedPages import CapturedPages
+from src.utils.checkpoint import Checkpoint
+from src.utils.devtools import NAVIGATION_TIMING_SCRIPT, BrowserProfile, PageLoadStats, block_urls
+from src.utils.documentStore import DocumentStore
+from src.utils.domExtract import Field, extract_rows, locator
+from src.utils.httpCache import HttpCache
+from src.utils.httpClient import get_http_client
+from src.utils.asyncDownloader import AsyncDownloader
+from src.utils.pager import ResultPager
+from src.utils.pdfCapture import PdfCapture
+from src.utils.pipeline import DownloadPipeline, ResultList
+from src.utils.sessionBridge import SessionBridge
+from src.utils.urlCanonical import canonical_url, document_key, legacy_keys
+from src.utils.urlLedger import UrlLedger
+from src.utils.waits import PageWaits, RateLimiter, WaitProfile
+from src.utils.watermark import WatermarkStore
 
 
 class BaseScraper(ABC):
@@ -19,7 +40,44 @@ class BaseScraper(ABC):
     saving metadata, processing non-PDF URLs, and interacting with Azure Blob Storage.
     """
 
-    def __init__(self, key_words, base_url, limited_pages, driver, site_name):
+    # Bytes of a PDF held in memory at a time while it is streamed to disk
+    download_chunk_size = 256 * 1024
+
+    # How detail pages are loaded: 'http' fetches them with the HTTP client and renders them in Selenium only
+    # when `detail_selector` is missing, 'selenium' always renders them in a browser tab
+    detail_fetch_engine = 'http'
+    # CSS selector of the content a bot reads from its detail pages
+    detail_selector = 'body'
+    # The minimum seconds between two requests to the site, browser page loads and detail page fetches alike,
+    # where --politeness-delay sets none
+    politeness_delay = 0.0
+
+    # The search results URL relative to `base_url`, with the URL-encoded keyword as '{query}', so a search
+    # costs one page load instead of the homepage and the search form; see `open_search_results`
+    search_url_template = None
+    # The most results per page the site serves, and the query parameter that asks for it in the search URL;
+    # sites without such a parameter set it in the UI with `set_page_size`
+    page_size = None
+    page_size_param = None
+    # XPath or CSS selector of the 'Next' link, where its href leads to the next result page; see `result_pages`
+    next_page_link = None
+
+    # The result rows of a search page and the values read from each, see `extract_result_rows`
+    result_row_selector = None
+    result_fields: Dict[str, Field] = {}
+
+    # The timeouts of the page waits on this site, see `waits.PageWaits`
+    wait_profile = WaitProfile()
+    # The resources the browser skips on this site and its page load strategy, see `devtools.BrowserProfile`
+    browser_profile = BrowserProfile()
+
+    def __init__(self, key_words, base_url, limited_pages, driver, site_name, work_dir='data', log_root='logs',
+                 upload_state=True, pipeline_workers=0, pipeline_queue_size=100, resume=False,
+                 checkpoint_upload_interval=60, ledger_dir=None, documents_dir=None, http_timeout=60,
+                 http_retries=4, download_concurrency=16, per_host_concurrency=4, http2=True,
+                 spill_captured_html=False, detail_fetch_engines=None, politeness_delays=None,
+                 block_resources=True, capture_pdfs=False, share_browser_session=True, direct_search=True,
+                 page_tabs=4, prefetch_pages=True):
         """
         Initializes the BaseScraper with the given parameters and Azure Blob Storage client.
 
@@ -28,13 +86,66 @@ class BaseScraper(ABC):
         :param limited_pages: The maximum number of pages to process.
         :param driver: A Selenium WebDriver instance.
         :param site_name: The name of the site being scraped.
+        :param work_dir: The directory holding the `raw` staging area, `watermarks.json` and the checkpoints.
+        :param log_root: The directory the site log folder is created in.
+        :param upload_state: Whether `watermarks.json` is uploaded back to Blob Storage at the end of `start`.
+                             Parallel workers disable this and let the runner merge and upload once. Ledger
+                             segments are always uploaded, since they never conflict.
+        :param pipeline_workers: Number of download/parse threads consuming results while pagination
+                                 continues. 0 keeps the phased discover-then-download flow.
+        :param pipeline_queue_size: Maximum number of discovered results waiting for a download thread.
+        :param resume: Continue every keyword from its last checkpoint instead of starting from scratch.
+        :param checkpoint_upload_interval: Minimum number of seconds between two checkpoint uploads.
+        :param ledger_dir: The directory holding the per-site ledger databases, `<work_dir>/ledger` by default.
+                           Parallel jobs share one directory.
+        :param documents_dir: The root of the content-addressed document store, `<work_dir>/documents` by
+                              default. Parallel jobs share one directory.
+        :param http_timeout: Read timeout in seconds of document downloads.
+        :param http_retries: Number of retries of a download after a connection error, 429 or 5xx answer.
+        :param download_concurrency: Number of documents of a keyword downloaded at the same time by the async
+                                     engine. 1 downloads them one by one with the blocking client.
+        :param per_host_concurrency: Number of those downloads allowed against one host.
+        :param http2: Let the async engine use HTTP/2 where the server and the installed packages support it.
+        :param spill_captured_html: Keep the detail pages rendered during discovery gzip-compressed on disk
+                                    instead of in memory until they are processed.
+        :param detail_fetch_engines: The `detail_fetch_engine` per site name, '*' for every site not listed.
+                                     Sites missing from it keep the engine their bot declares.
+        :param politeness_delays: The minimum number of seconds between two page loads of the browser or detail
+                                  page fetches per site name, '*' for every site not listed. Sites missing from
+                                  it keep the `politeness_delay` their bot declares.
+        :param block_resources: Block the resources `browser_profile` excludes in the browser.
+        :param capture_pdfs: Keep the PDFs the browser loads during discovery instead of downloading them again,
+                             and load PDFs the HTTP client fails on through the browser, with its cookies.
+        :param share_browser_session: Hand the browser's cookies, User-Agent and Accept-Language over to the
+                                      HTTP client, see `sync_browser_session`.
+        :param direct_search: Open the search results through `search_url_template` instead of the search form.
+        :param page_tabs: Result pages loaded at the same time where they are addressable by URL, see
+                          `result_pages`.
+        :param prefetch_pages: Load the page the 'Next' link leads to while the current page is processed,
+                               on sites that declare `next_page_link`.
         """
         self.key_words = key_words
         self.base_url = base_url
         self.limited_pages = limited_pages
         self.driver = driver
         self.site_name = site_name
-        self.logger = setup_shared_logger(f"{site_name}_log")
+        self.work_dir = work_dir
+        self.raw_dir = os.path.join(work_dir, 'raw', site_name)
+        self.upload_state = upload_state
+        self.pipeline_workers = pipeline_workers
+        self.pipeline_queue_size = pipeline_queue_size
+        self.result_sink = None
+        self._url_lock = threading.Lock()
+        self.resume = resume
+        self.checkpoint_upload_interval = checkpoint_upload_interval
+        self.checkpoint = None
+        # Results restored from a checkpoint; discovery skips them like processed URLs
+        self.resumed_urls = set()
+        # Document keys of the results in the checkpoint, see `publish_url`
+        self.checkpoint_keys = set()
+        self._last_checkpoint_upload = 0.0
+        os.makedirs(work_dir, exist_ok=True)
+        self.logger = setup_shared_logger(f"{site_name}_log", log_root=log_root)
 
         load_dotenv()
 
@@ -45,9 +156,74 @@ class BaseScraper(ABC):
 
         self.blob_service_client = self.create_blob_service_client()
 
-        self.local_url_file_path = os.path.join('data', 'all_urls.txt')
+        # The flat URL list the ledger replaced, imported once per site
+        self.legacy_url_blob = 'all_urls.txt'
+        ledger_dir = ledger_dir or os.path.join(work_dir, 'ledger')
+        self.ledger = UrlLedger(os.path.join(ledger_dir, f"{site_name}.sqlite"),
+                                site_name,
+                                self.blob_service_client.get_container_client(self.container_name),
+                                self.logger)
+
+        # Shared by every scraper of the process, so connections to a host are reused across keywords
+        self.http = get_http_client(read_timeout=http_timeout, max_retries=http_retries)
+        self.document_store = DocumentStore(documents_dir or os.path.join(work_dir, 'documents'))
+        # ETag / Last-Modified of fetched URLs, so reprocessed URLs are requested conditionally
+        self.http_cache = HttpCache(os.path.join(ledger_dir, f"{site_name}.http.sqlite"), site_name,
+                                    self.document_store)
+        self.download_concurrency = download_concurrency
+        self.downloader = AsyncDownloader(self.http, concurrency=download_concurrency,
+                                          per_host_concurrency=per_host_concurrency, http2=http2,
+                                          chunk_size=self.download_chunk_size, logger=self.logger)
+
+        self.watermarks = WatermarkStore(os.path.join(work_dir, 'watermarks.json'))
+        # Newest (date, url) seen per keyword in this run, saved as the keyword's watermark at the end
+        self.newest_seen = {}
+
+        # Document keys queued in the ledger during this run by pipeline workers
+        self.new_urls = set()
+        # Extra dedup keys stored next to a result URL, for sites whose result links are session bound
+        self.discovery_keys = {}
+        self.skipped_known_urls = 0
+        detail_fetch_engines = detail_fetch_engines or {}
+        self.detail_fetch_engine = detail_fetch_engines.get(site_name,
+                                                            detail_fetch_engines.get('*', self.detail_fetch_engine))
+        # Detail pages rendered during discovery, see `capture_html`
+        self.captured_pages = CapturedPages(os.path.join(work_dir, 'captured', site_name)
+                                            if spill_captured_html else None)
+        # Condition-driven waits instead of fixed sleeps, and the politeness delay as a separate rate limit
+        self.waits = PageWaits(driver, self.wait_profile, self.logger)
+        politeness_delays = politeness_delays or {}
+        self.politeness = RateLimiter(politeness_delays.get(site_name,
+                                                            politeness_delays.get('*', self.politeness_delay)))
+
+        # Network cost of the result pages, read from the DevTools events the waits already follow
+        self.block_resources = block_resources
+        self.page_stats = PageLoadStats()
+        self.waits.network.listeners.append(self.page_stats)
+        # pages, requests, blocked requests, bytes, documents loaded, seconds to DOMContentLoaded
+        self.page_totals = [0, 0, 0, 0, 0, 0.0]
+        self._last_document = None
+        self.apply_browser_profile()
 
-        self.processed_urls = set()
+        # PDF bodies taken from the browser's network layer, see `pdfCapture.PdfCapture`
+        self.pdf_capture = None
+        if capture_pdfs:
+            self.pdf_capture = PdfCapture(driver, self.document_store, self.canonicalize, self.logger,
+                                          self.download_chunk_size)
+            self.waits.network.listeners.append(self.pdf_capture)
+
+        # The browser session handed over to the HTTP client, see `sessionBridge.SessionBridge`
+        self.session_bridge = SessionBridge(driver, self.http, self.logger) if share_browser_session else None
+
+        # Searches opened by URL; the URL form is given up after `direct_search_attempts` failures in a row
+        self.direct_search = direct_search
+        self.direct_search_attempts = 2
+        self._direct_search_failures = 0
+        self.page_tabs = page_tabs
+        self.prefetch_pages = prefetch_pages
+        # Result pages read per keyword, see `finish_discovery`
+        self.keyword_pages = {}
+        self._pages_read = 0
 
     def create_blob_service_client(self):
         """
@@ -69,76 +245,743 @@ class BaseScraper(ABC):
         """
         self.logger.info("Starting the scraping process.")
 
-        self.download_blob(self.local_url_file_path, self.container_name)
-        self.load_processed_urls()
+        if not self.resume:
+            self.captured_pages.clear()
+        self.ledger.sync_down(legacy_blob=self.legacy_url_blob)
+        self.ledger.compact()
+        self.ledger.load_index()
+        self.logger.info(f"The {self.site_name} ledger holds {len(self.ledger)} URLs.")
+        self.download_blob(self.watermarks.path, self.container_name)
+        self.watermarks.load()
 
         # Web scraping işlemi
         for keyword in self.key_words:
             self.create_folder_structure(keyword)
-            pdf_urls, non_pdf_urls = self.get_urls(keyword, self.limited_pages)
+            pending = self.open_checkpoint(keyword)
+            if self.checkpoint.done and not pending:
+                self.logger.info(f"Keyword '{keyword}' was already completed according to its checkpoint.")
+                continue
+
+            if self.pipeline_workers > 0:
+                self.run_pipelined(keyword, pending)
+                self.captured_pages.clear()
+                self.save_watermark(keyword)
+                self.close_checkpoint()
+                self.ledger.sync_up()
+                continue
+
+            if self.checkpoint.discovery_done:
+                pdf_urls, non_pdf_urls = [], []
+            else:
+                pdf_urls, non_pdf_urls = self.get_urls(keyword, self.limited_pages)
+                self.finish_discovery()
+            self.logger.info(f"Skipped {self.skipped_known_urls} already processed URLs during discovery.")
 
-            new_pdf_urls = [url for url in pdf_urls if url[0] not in self.processed_urls]
-            new_non_pdf_urls = [url for url in non_pdf_urls if url[0] not in self.processed_urls]
+            # Checkpoint'ten gelen ve henüz indirilmeyen sonuçları ekle
+            pdf_urls = list(pdf_urls) + [item for kind, item in pending if kind == 'pdf']
+            non_pdf_urls = list(non_pdf_urls) + [item for kind, item in pending if kind != 'pdf']
 
-            self.save_all_urls_to_single_file(new_pdf_urls, new_non_pdf_urls)
-            pdf_data = self.download_pdf_files(new_pdf_urls, keyword)
-            self.save_pdf_data(keyword, pdf_data)
+            new_pdf_urls, new_non_pdf_urls = self.new_results(pdf_urls, non_pdf_urls)
+
+            self.queue_urls(new_pdf_urls, new_non_pdf_urls)
+            self.download_pdf_files(new_pdf_urls, keyword)
             self.process_non_pdf_urls(new_non_pdf_urls, keyword)
+            self.captured_pages.clear()
+            self.save_watermark(keyword)
+            self.close_checkpoint()
+            self.ledger.sync_up()
 
         # Güncellenen dosyayı Azure Blob Storage'a yükle
-        self.upload_blob(self.local_url_file_path, self.container_name)
+        if self.upload_state:
+            self.upload_blob(self.watermarks.path, self.container_name)
+        self.ledger.close()
+        self.http.log_metrics(self.logger)
+        self.http_cache.log_summary(self.logger)
+        self.http_cache.close()
+        self.waits.log_summary()
+        self.log_page_summary()
+        if self.pdf_capture and self.pdf_capture.captured_bytes:
+            self.logger.info(f"Captured {self.pdf_capture.captured_bytes / 2 ** 20:.1f} MiB of PDFs from the browser.")
+        if self.politeness.waited:
+            self.logger.info(f"Politeness delay: {self.politeness.waited:.1f}s between page loads.")
+        if self.session_bridge:
+            self.session_bridge.clear()
 
-        self.driver.quit()
+        # The driver belongs to the runner's DriverPool, which resets or recycles it after the job
         self.logger.info("Scraping process completed.")
 
-    def load_processed_urls(self):
+    def run_pipelined(self, keyword: str, pending: List[Tuple[str, Tuple[str, str, str, str]]] = None):
+        """
+        Discovers and downloads the results of a keyword at the same time.
+
+        `get_urls` runs on the current thread and publishes every result it appends to the lists built by
+        `result_lists`; `pipeline_workers` threads download and parse them from a bounded queue meanwhile.
+
+        :param keyword: The keyword to search for.
+        :param pending: `(kind, result)` pairs restored from a checkpoint, queued before discovery starts.
+        """
+        pipeline = DownloadPipeline(lambda kind, item: self.consume_url(kind, item, keyword),
+                                    workers=self.pipeline_workers,
+                                    queue_size=self.pipeline_queue_size,
+                                    logger=self.logger)
+        self.result_sink = pipeline
+        pipeline.start()
+        try:
+            for kind, item in pending or []:
+                pipeline.put(kind, item)
+            if not self.checkpoint.discovery_done:
+                self.get_urls(keyword, self.limited_pages)
+                self.finish_discovery()
+        finally:
+            self.result_sink = None
+            pipeline.close()
+        self.logger.info(f"Skipped {self.skipped_known_urls} already processed URLs during discovery.")
+        self.logger.info(f"Pipeline handled {pipeline.processed} results for keyword: {keyword}")
+
+    def result_lists(self) -> Tuple[ResultList, ResultList]:
+        """
+        Creates the `pdf_urls` and `non_pdf_urls` lists a bot fills in `get_urls`.
+
+        In pipelined mode every appended result is also handed to the download workers right away.
+
+        :return: The PDF result list and the non-PDF result list.
+        """
+        return (ResultList(lambda item: self.publish_url('pdf', item)),
+                ResultList(lambda item: self.publish_url('non_pdf', item)))
+
+    def publish_url(self, kind: str, item: Tuple[str, str, str, str]):
+        """
+        Records a discovered result in the checkpoint when it is going to be downloaded, and forwards it to
+        the running pipeline, if there is one.
+
+        Results the ledger knows and repeats of a document are left out of the checkpoint, like `new_results`
+        leaves them out of the downloads, so resuming never marks a finished document as interrupted.
+
+        :param kind: 'pdf' or 'non_pdf'.
+        :param item: The `(url, date, name, description)` tuple.
+        """
+        if self.checkpoint is not None:
+            key = self.url_key(item[0])
+            with self._url_lock:
+                queued = key not in self.checkpoint_keys and not self.in_ledger(item[0])
+                if queued:
+                    self.checkpoint_keys.add(key)
+            if queued:
+                self.checkpoint.record_discovered(kind, item)
+                self.checkpoint.save()
+        if self.result_sink is not None:
+            self.result_sink.put(kind, item)
+
+    def consume_url(self, kind: str, item: Tuple[str, str, str, str], keyword: str):
+        """
+        Downloads or parses a single discovered result on a pipeline worker thread.
+
+        :param kind: 'pdf' or 'non_pdf'.
+        :param item: The `(url, date, name, description)` tuple.
+        :param keyword: The keyword associated with the search.
+        """
+        with self._url_lock:
+            if self.in_ledger(item[0]):
+                return
+            self.new_urls.add(self.url_key(item[0]))
+            if kind == 'pdf':
+                self.queue_urls([item], [])
+            else:
+                self.queue_urls([], [item])
+
+        if kind == 'pdf':
+            self.download_pdf(*item, keyword)
+        else:
+            self.process_non_pdf_url(*item, keyword)
+
+    def capture_html(self, url: str, html: str):
+        """
+        Keeps the HTML of a detail page the bot rendered during discovery, so the non-PDF processing step
+        extracts its tables and summary from it instead of downloading the page again. Call it before the
+        result is appended, since in pipelined mode a worker may pick the result up right away.
+
+        :param url: The URL of the result, as it appears in the result tuple.
+        :param html: The page source.
+        """
+        self.captured_pages.put(url, html)
+
+    def extract_result_rows(self, row_selector: str = None, fields: Dict[str, Field] = None) -> List[dict]:
+        """
+        Reads every result row of the current page in a single `execute_script` round trip, instead of one
+        WebDriver call per element and attribute.
+
+        :param row_selector: XPath or CSS selector of the rows, `result_row_selector` by default.
+        :param fields: The values to read from each row, `result_fields` by default.
+        :return: One dictionary per row mapping the field names to their values.
+        """
+        return extract_rows(self.driver, row_selector or self.result_row_selector, fields or self.result_fields)
+
+    def search_url(self, keyword: str) -> Optional[str]:
+        """
+        :param keyword: The keyword to search for.
+        :return: The URL of the search results of the keyword, or None if the site has no known URL form.
+        """
+        if not self.search_url_template:
+            return None
+        url = urljoin(self.base_url, self.search_url_template.format(query=quote_plus(keyword)))
+        if self.page_size and self.page_size_param:
+            url += f"{'&' if '?' in url else '?'}{self.page_size_param}={self.page_size}"
+        return url
+
+    def open_search_results(self, keyword: str, results_selector: str = None) -> bool:
+        """
+        Navigates straight to the search results of a keyword, skipping the homepage and the search form.
+
+        Bots call it first and drive the search UI only when it returns False: when the site has no URL form,
+        direct search is off or the results did not appear in time. After `direct_search_attempts` failed
+        attempts in a row the URL form is not tried again for the rest of the job.
+
+        :param keyword: The keyword to search for.
+        :param results_selector: XPath or CSS selector of the results, `result_row_selector` by default.
+        :return: True if the results are shown.
+        """
+        url = self.search_url(keyword)
+        if not url or not self.direct_search:
+            return False
+
+        start = time.monotonic()
+        try:
+            self.politeness.wait()
+            self.driver.get(url)
+            self.waits.element(locator(results_selector or self.result_row_selector),
+                               timeout=self.wait_profile.page_load)
+        except (TimeoutException, WebDriverException) as e:
+            self._direct_search_failures += 1
+            self.logger.info(f"{url} did not show search results ({type(e).__name__}), using the search form.")
+            if self._direct_search_failures >= self.direct_search_attempts:
+                self.logger.warning(f"Giving up the search URL of {self.site_name} after "
+                                    f"{self._direct_search_failures} failures.")
+                self.direct_search = False
+            return False
+
+        self._direct_search_failures = 0
+        self.logger.info(f"Opened the search results of '{keyword}' by URL in {time.monotonic() - start:.2f}s.")
+        return True
+
+    def learn_search_url(self, keyword: str):
+        """
+        Takes the URL form of the search from the results page the search form led to, when the bot declares
+        none and a query parameter of the URL holds the keyword, so later keywords skip the form. Call it once
+        the results are shown and before anything that changes them without changing the URL.
+
+        :param keyword: The keyword that was searched for.
+        """
+        if self.search_url_template or not self.direct_search:
+            return
+        parts = urlsplit(self.driver.current_url)
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        if not any(value == keyword for _, value in params):
+            return
+        query = '&'.join(f"{quote_plus(name)}={'{query}' if value == keyword else quote_plus(value)}"
+                         for name, value in params)
+        base = urlunsplit((parts.scheme, parts.netloc, parts.path, '', '')).replace('{', '{{').replace('}', '}}')
+        self.search_url_template = f"{base}?{query}"
+        self.logger.info(f"Later searches open {self.search_url_template} directly.")
+
+    def set_page_size(self) -> bool:
+        """
+        Switches the result list that is shown to `page_size` results per page through the UI. Bots whose page
+        size is no URL parameter override this; `result_pages` calls it before reading the first page.
+
+        :return: True if the page size was changed.
+        """
+        return False
+
+    def page_url(self, keyword: str, page: int) -> Optional[str]:
+        """
+        Bots whose result pages are addressable by URL override this, see `result_pages`.
+
+        :param keyword: The keyword searched for.
+        :param page: The page number, starting at 1.
+        :return: The URL of the result page, or None if pages can only be turned in the UI.
         """
-        `all_urls.txt` dosyasını okuyarak daha önce işlenen URL'leri bir kümede saklar.
+        return None
+
+    def next_page_url(self) -> Optional[str]:
+        """
+        :return: The URL the `next_page_link` of the current page leads to, None on the last page.
+        """
+        links = self.driver.find_elements(*locator(self.next_page_link))
+        if not links:
+            return None
+        href = links[0].get_attribute('href')
+        if not href or href.startswith('javascript:') or 'disabled' in (links[0].get_attribute('class') or ''):
+            return None
+        return href
+
+    def result_pages(self, keyword: str, limited_pages: int, next_page: Callable[[], bool],
+                     by_url: bool = False) -> Iterator[Tuple[int, List[dict]]]:
+        """
+        Yields the rows of every result page of a keyword, read with `extract_result_rows`, starting with the
+        page that is shown.
+
+        The largest page size is asked for first: by the search URL when the results were opened by URL and
+        the site has a `page_size_param`, with `set_page_size` otherwise. When the results were opened by URL
+        and `page_url` builds page URLs, the next `page_tabs` pages load in browser tabs while the bot
+        processes the rows of the current one, see `pager.ResultPager`. On sites with a `next_page_link` the
+        page it leads to loads in a second tab meanwhile instead, with `prefetch_pages`. Otherwise
+        `next_page` turns the page in the current tab after the rows were processed and returns False after
+        the last one.
+
+        :param keyword: The keyword searched for.
+        :param limited_pages: The number of pages to read, 0 for no limit.
+        :param next_page: Turns to the next page in the UI and waits for it.
+        :param by_url: The results were opened with `open_search_results`, so page URLs lead to the same list.
+        :return: `(page number, rows)` pairs in page order.
+        """
+        rows_locator = locator(self.result_row_selector)
+        self.waits.elements(rows_locator)
+        if self.page_size and not (by_url and self.page_size_param):
+            self.set_page_size()
+            self.waits.elements(rows_locator)
+        rows = self.extract_result_rows()
+        pager = ResultPager(self.driver, self.extract_result_rows, rows_locator, self.waits,
+                            lambda page: self.page_url(keyword, page), self.apply_browser_profile, self.page_tabs,
+                            self.politeness, self.logger)
+        if by_url and self.page_tabs > 0 and self.page_url(keyword, 2):
+            yield from pager.pages(rows, limited_pages)
+            return
+        if self.prefetch_pages and self.next_page_link:
+            yield from pager.follow(rows, self.next_page_url, limited_pages)
+            return
+
+        page = 1
+        while True:
+            yield page, rows
+            if (limited_pages and page >= limited_pages) or not next_page():
+                return
+            page += 1
+            self.waits.elements(rows_locator)
+            rows = self.extract_result_rows()
+
+    def load_detail_pages(self, urls: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Loads the detail pages of results.
+
+        With the 'http' engine the pages are fetched concurrently by the async engine, spaced by the politeness
+        delay, and kept when they contain `detail_selector`; pages where it is missing, e.g. because they are built by JavaScript, and
+        failed fetches are rendered in a browser tab one by one.
+
+        :param urls: The URLs of the detail pages.
+        :return: The HTML of every URL, None where the page could not be loaded.
+        """
+        pages = {}
+        if self.detail_fetch_engine == 'http' and urls:
+            self.sync_browser_session()
+            def on_done(url, content):
+                html = UnicodeDammit(content, is_html=True).unicode_markup
+                if BeautifulSoup(html, 'html.parser').select_one(self.detail_selector) is not None:
+                    pages[url] = html
+                else:
+                    self.logger.info(f"'{self.detail_selector}' is missing from {url}, rendering it in Selenium.")
+
+            start = time.monotonic()
+            self.downloader.fetch([(url, url) for url in urls], on_done,
+                                  lambda url, e: self.logger.info(f"HTTP fetch of {url} failed ({e}), "
+                                                                  f"rendering it in Selenium."),
+                                  self.http_cache, self.politeness)
+            self.logger.info(f"Loaded {len(pages)}/{len(urls)} detail pages over HTTP "
+                             f"in {time.monotonic() - start:.2f}s.")
+
+        for url in urls:
+            if url not in pages:
+                pages[url] = self.render_detail_page(url)
+        return pages
+
+    def render_detail_page(self, url: str) -> Optional[str]:
+        """
+        Opens a detail page in a new browser tab and waits for `detail_selector`.
+
+        :param url: The URL of the detail page.
+        :return: The page source, or None if the page could not be loaded.
+        """
+        try:
+            current_window = self.driver.current_window_handle
+            self.driver.execute_script("window.open('');")
+            self.driver.switch_to.window(self.driver.window_handles[-1])
+            # The page is only read, so it does not need its stylesheets either
+            self.apply_browser_profile('stylesheet')
+            try:
+                self.politeness.wait()
+                self.driver.get(url)
+                try:
+                    self.waits.element((By.CSS_SELECTOR, self.detail_selector))
+                except TimeoutException:
+                    self.logger.info(f"'{self.detail_selector}' did not appear on {url}.")
+                return self.driver.page_source
+            finally:
+                self.collect_browser_pdfs()
+                self.driver.close()
+                self.driver.switch_to.window(current_window)
+        except Exception as e:
+            self.log_error(e, url)
+            return None
+
+    def canonicalize(self, url: str) -> str:
+        """
+        Normalises a result link with the rules of this site (see `urlCanonical.canonical_url`). Bots pass
+        every link through this before using it, so that one document is stored and downloaded under one URL.
+
+        :param url: The link as found on the page, absolute or relative.
+        :return: The canonical, absolute URL.
+        """
+        return canonical_url(url, self.site_name, self.base_url)
+
+    def url_key(self, url: str) -> str:
+        """
+        :param url: The URL or discovery key of a result.
+        :return: The key the result is stored under in the ledger.
+        """
+        return document_key(url, self.site_name, self.base_url)
+
+    def in_ledger(self, url: str) -> bool:
+        """
+        Checks the ledger for the document key of a URL, for the URL itself as it was stored before keys
+        were canonical, and for the keys earlier versions gave the document (see `urlCanonical.legacy_keys`).
+
+        :param url: The URL or discovery key of a result.
+        :return: True if the ledger knows the result.
+        """
+        key = self.url_key(url)
+        if key in self.ledger or url in self.ledger:
+            return True
+        return any(legacy in self.ledger for legacy in legacy_keys(url, self.site_name, self.base_url))
+
+    def new_results(self, pdf_urls: List[Tuple[str, str, str, str]], non_pdf_urls: List[Tuple[str, str, str, str]]):
+        """
+        Drops the results that are in the ledger and the repeated documents within the lists, keeping the
+        first link of each document key. Keys tell the formats of a document apart, so its PDF and its HTML
+        rendition are both kept.
+
+        :param pdf_urls: A list of tuples containing PDF URLs.
+        :param non_pdf_urls: A list of tuples containing non-PDF URLs.
+        :return: The new PDF results and the new non-PDF results.
+        """
+        seen = set()
+        new_lists = ([], [])
+        for urls, new_urls in zip((pdf_urls, non_pdf_urls), new_lists):
+            for item in urls:
+                key = self.url_key(item[0])
+                if key in seen or self.in_ledger(item[0]):
+                    continue
+                seen.add(key)
+                new_urls.append(item)
+        return new_lists
+
+    def is_known_url(self, url: str) -> bool:
+        """
+        Checks whether a result was already processed in an earlier run.
+
+        Bots call this with the bare URL (or discovery key) of a result before any per-result work such as
+        opening a tab or clicking a row, so that known results cost no extra page loads.
+
+        :param url: The URL or discovery key of the result.
+        :return: True if the result can be skipped.
+        """
+        with self._url_lock:
+            known = self.in_ledger(url) or url in self.resumed_urls
+        if known:
+            self.skipped_known_urls += 1
+        return known
+
+    def add_discovery_key(self, url: str, key: str):
+        """
+        Records an extra dedup key for a result, stored in the ledger together with its URL.
+
+        Used when the link a bot sees before enrichment differs from the final document URL, so that
+        `is_known_url(key)` recognises the result in the next run.
+
+        :param url: The final URL of the result.
+        :param key: The key the bot can check before enrichment.
+        """
+        if key and key != url:
+            self.discovery_keys.setdefault(url, []).append(key)
+
+    def page_is_stale(self, keyword: str, page_items: List[Tuple[str, str]]) -> bool:
+        """
+        Decides whether pagination can stop after a page, for sites whose results are sorted newest first.
+
+        A page is stale when every result on it was seen before: its URL is in the ledger, or it is
+        older than the keyword's watermark from the previous run. The newest result of the page is also
+        remembered as the next watermark.
+
+        :param keyword: The keyword being searched.
+        :param page_items: `(url, date)` pairs of every result on the page, including skipped ones.
+        :return: True if the following pages can only contain already seen results.
+        """
+        if not page_items:
+            return False
+
+        for url, date in page_items:
+            newest = self.newest_seen.get(keyword)
+            if date and (newest is None or date > newest[0]):
+                self.newest_seen[keyword] = (date, url)
+
+        watermark = self.watermarks.get(self.site_name, keyword)
+        watermark_date = watermark['date'] if watermark else ''
+
+        with self._url_lock:
+            return all((self.in_ledger(url) and self.url_key(url) not in self.new_urls)
+                       or (date and date < watermark_date)
+                       for url, date in page_items)
+
+    def save_watermark(self, keyword: str):
+        """
+        Stores the newest result seen for the keyword as its watermark for the next run.
+
+        :param keyword: The keyword that was searched.
+        """
+        newest = self.newest_seen.get(keyword)
+        if newest:
+            self.watermarks.update(self.site_name, keyword, newest[0], newest[1])
+            self.watermarks.save()
+            self.logger.info(f"Watermark for keyword '{keyword}' is now {newest[0]} ({newest[1]}).")
+
+    def open_checkpoint(self, keyword: str) -> List[Tuple[str, Tuple[str, str, str, str]]]:
+        """
+        Prepares the checkpoint of a keyword.
+
+        Without `resume` the keyword starts from scratch. With `resume` the last checkpoint is loaded (from
+        Blob Storage if it is not on disk): finished downloads whose files still exist are marked done in
+        the ledger, the others are fetched again, and every restored result is skipped by discovery.
+
+        :param keyword: The keyword to search for.
+        :return: `(kind, result)` pairs that were discovered but not downloaded yet.
         """
-        if os.path.exists(self.local_url_file_path):
-            with open(self.local_url_file_path, 'r', encoding='utf-8') as file:
-                self.processed_urls = {line.strip() for line in file.readlines()}
+        self.checkpoint = Checkpoint(self.work_dir, self.site_name, keyword)
+        self.resumed_urls = set()
+        self.checkpoint_keys = set()
 
-        self.logger.info(f"Loaded {len(self.processed_urls)} processed URLs from {self.local_url_file_path}.")
+        if not self.resume:
+            self.checkpoint.save(force=True)
+            return []
+
+        if not os.path.exists(self.checkpoint.path):
+            self.download_blob(self.checkpoint.path, self.container_name, blob_name=self.checkpoint.blob_name)
+        if not self.checkpoint.load():
+            self.logger.info(f"No checkpoint found for keyword '{keyword}', starting from scratch.")
+            return []
+
+        for kind, item in self.checkpoint.discovered:
+            if item[0] not in self.checkpoint.completed:
+                continue
+            if not self.output_exists(keyword, kind, item[2]):
+                # Dosyalar kaybolmuş, yeniden indir
+                self.checkpoint.completed.discard(item[0])
+                continue
+            record = self.ledger.get(self.url_key(item[0]))
+            if record is None or record['status'] != 'done':
+                # The crashed run may not have synced its ledger, so finished results are recorded here
+                self.ledger.record([self.url_key(item[0])], 'done')
+
+        self.resumed_urls = self.checkpoint.discovered_urls()
+        self.checkpoint_keys = {self.url_key(url) for url in self.resumed_urls}
+        pending = []
+        for kind, item in self.checkpoint.pending():
+            record = self.ledger.get(self.url_key(item[0]))
+            # Finished by an earlier run or another job; downloading it again would only repeat it
+            if record is not None and record['status'] == 'done':
+                continue
+            pending.append((kind, item))
+        # Results are queued in the ledger before downloading, so unfinished ones would count as known
+        self.ledger.record([self.url_key(item[0]) for _, item in pending], 'interrupted')
+        self.logger.info(f"Resuming keyword '{keyword}' after page {self.checkpoint.page}: "
+                         f"{len(self.checkpoint.completed)} downloads completed, {len(pending)} pending.")
+        return pending
+
+    def output_exists(self, keyword: str, kind: str, name: str) -> bool:
+        """
+        Checks whether the files of a finished download are still on disk.
+
+        :param keyword: The keyword associated with the search.
+        :param kind: 'pdf' or 'non_pdf'.
+        :param name: The name of the document.
+        :return: True if the summary (and for PDFs the PDF itself) exists.
+        """
+        folder = self.keyword_folder(keyword)
+        if not os.path.exists(os.path.join(folder, 'text', f"{name}.txt")):
+            return False
+        return kind != 'pdf' or os.path.exists(os.path.join(folder, 'pdf', f"{name}.pdf"))
+
+    def record_page(self, page: int):
+        """
+        Records the result page a bot reached and writes the checkpoint. Bots call this once per page.
+
+        :param page: The page number being processed.
+        """
+        self.log_page_load(page)
+        self.sync_browser_session()
+        self._pages_read += 1
+        if self.checkpoint is None:
+            return
+        self.checkpoint.record_page(page)
+        self.flush_checkpoint()
+
+    def apply_browser_profile(self, *extra_types: str):
+        """
+        Blocks the resources `browser_profile` excludes in the current browser tab. Blocking is per tab, so
+        call it again right after switching to a newly opened blank tab.
+
+        :param extra_types: Resource types blocked on top of the profile, e.g. 'stylesheet'.
+        """
+        if not self.block_resources:
+            return
+        try:
+            block_urls(self.driver, self.browser_profile.patterns(*extra_types))
+        except (WebDriverException, AttributeError) as e:
+            self.logger.info(f"Resource blocking is not available: {str(e).splitlines()[0]}")
+            self.block_resources = False
+
+    def log_page_load(self, page: int):
+        """
+        Logs the network cost since the previous result page: requests sent and blocked, bytes transferred
+        and, when a new document was loaded, its DOMContentLoaded and load times.
+
+        :param page: The page number being processed.
+        """
+        self.waits.network.poll()
+        requests, blocked, size = self.page_stats.take()
+        try:
+            timing = self.driver.execute_script(NAVIGATION_TIMING_SCRIPT)
+        except WebDriverException:
+            timing = None
+
+        message = f"Page {page}: {requests} requests, {blocked} blocked, {size / 1024:.0f} KiB transferred"
+        totals = self.page_totals
+        totals[0] += 1
+        totals[1] += requests
+        totals[2] += blocked
+        totals[3] += size
+        if timing and timing[0] != self._last_document:
+            self._last_document = timing[0]
+            totals[4] += 1
+            totals[5] += timing[1] / 1000
+            message += f", DOMContentLoaded after {timing[1] / 1000:.2f}s"
+            if timing[2]:
+                message += f", load after {timing[2] / 1000:.2f}s"
+        self.logger.info(f"{message}.")
+
+    def log_page_summary(self):
+        """
+        Logs the network cost of every result page of the run and the number of result pages per keyword.
+        Compared with a run without resource blocking it shows the bytes and the time the browser profile
+        saves per page.
+        """
+        if self.keyword_pages:
+            self.logger.info("Result pages per keyword: " +
+                             ", ".join(f"'{keyword}' {pages}" for keyword, pages in self.keyword_pages.items()))
+        pages, requests, blocked, size, documents, seconds = self.page_totals
+        if not pages:
+            return
+        self.logger.info(f"Browser: {pages} pages, {requests} requests of which {blocked} blocked, "
+                         f"{size / 2 ** 20:.1f} MiB transferred ({size / 1024 / pages:.0f} KiB per page), "
+                         f"DOMContentLoaded after {seconds / max(documents, 1):.2f}s on average "
+                         f"(resource blocking {'on' if self.block_resources else 'off'}, "
+                         f"page load strategy {self.driver.capabilities.get('pageLoadStrategy', 'normal')}).")
+
+    def record_completed(self, url: str, content_hash: str = None):
+        """
+        Records a finished download in the ledger and in the checkpoint.
+
+        :param url: The URL of the downloaded result.
+        :param content_hash: The SHA-256 of the downloaded content.
+        """
+        self.ledger.record([self.url_key(url)] + self.discovery_keys.get(url, []), 'done', content_hash)
+        if self.checkpoint is None:
+            return
+        self.checkpoint.record_completed(url)
+        self.checkpoint.save()
+
+    def record_failed(self, url: str):
+        """
+        Marks a result whose download failed, so that the next run tries it again.
+
+        :param url: The URL of the result.
+        """
+        self.ledger.record([self.url_key(url)] + self.discovery_keys.get(url, []), 'failed')
+
+    def finish_discovery(self):
+        """
+        Marks the discovery of the current keyword as complete, so a resumed run only downloads, and logs the
+        number of result pages it took.
+        """
+        keyword = self.checkpoint.keyword
+        self.keyword_pages[keyword] = self._pages_read
+        self.logger.info(f"Read {self._pages_read} result pages for keyword '{keyword}'"
+                         f"{f' at up to {self.page_size} results per page' if self.page_size else ''}.")
+        self._pages_read = 0
+        self.checkpoint.discovery_done = True
+        self.flush_checkpoint()
+
+    def close_checkpoint(self):
+        """
+        Marks the current keyword as done and uploads its final checkpoint.
+        """
+        self.checkpoint.done = True
+        self.flush_checkpoint(force_upload=True)
+
+    def flush_checkpoint(self, force_upload: bool = False):
+        """
+        Writes the checkpoint to disk and mirrors it to Blob Storage at most every `checkpoint_upload_interval`
+        seconds, so that it survives the container.
+
+        :param force_upload: Upload regardless of the interval.
+        """
+        self.checkpoint.save(force=True)
+        now = time.monotonic()
+        if force_upload or now - self._last_checkpoint_upload >= self.checkpoint_upload_interval:
+            self._last_checkpoint_upload = now
+            self.upload_blob(self.checkpoint.path, self.container_name, blob_name=self.checkpoint.blob_name)
 
     def create_folder_structure(self, keyword):
         """
         Creates the folder structure for storing raw data (PDFs, metadata, text, etc.) based on the keyword.
         """
-        keyword_folder = os.path.join(f"data/raw/{self.site_name}", keyword.replace(':', '').replace(' ', '_'))
+        keyword_folder = self.keyword_folder(keyword)
         os.makedirs(keyword_folder, exist_ok=True)
         os.makedirs(os.path.join(keyword_folder, 'pdf'), exist_ok=True)
         os.makedirs(os.path.join(keyword_folder, 'text'), exist_ok=True)
         os.makedirs(os.path.join(keyword_folder, 'metadata'), exist_ok=True)
         os.makedirs(os.path.join(keyword_folder, 'json'), exist_ok=True)
 
-    def save_all_urls_to_single_file(self, pdf_urls: List[Tuple[str, str, str, str]],
-                                     non_pdf_urls: List[Tuple[str, str, str, str]]):
+    def keyword_folder(self, keyword: str) -> str:
         """
-        Saves all the new URLs (both PDF and non-PDF) into the all_urls.txt file for all keywords.
+        Returns the raw data folder of the given keyword.
 
-        :param pdf_urls: A list of tuples containing PDF URLs.
-        :param non_pdf_urls: A list of tuples containing non-PDF URLs.
+        :param keyword: The keyword associated with the search.
+        :return: The path of the keyword folder under the raw staging area.
         """
-        with open(self.local_url_file_path, 'a', encoding='utf-8') as url_file:
-            # PDF URL'leri yaz
-            for url, _, _, _ in pdf_urls:
-                url_file.write(f"{url}\n")
+        return os.path.join(self.raw_dir, keyword.replace(':', '').replace(' ', '_'))
 
-            # Non-PDF URL'leri yaz
-            for url, _, _, _ in non_pdf_urls:
-                url_file.write(f"{url}\n")
+    def queue_urls(self, pdf_urls: List[Tuple[str, str, str, str]], non_pdf_urls: List[Tuple[str, str, str, str]]):
+        """
+        Records the document keys of the new URLs (both PDF and non-PDF) and their discovery keys as queued in
+        the site ledger.
 
-        self.logger.info(f"New URLs saved to {self.local_url_file_path}")
+        :param pdf_urls: A list of tuples containing PDF URLs.
+        :param non_pdf_urls: A list of tuples containing non-PDF URLs.
+        """
+        urls = []
+        for url, _, _, _ in list(pdf_urls) + list(non_pdf_urls):
+            urls.append(self.url_key(url))
+            urls.extend(self.discovery_keys.get(url, []))
+        self.ledger.record(urls, 'queued')
+        self.logger.info(f"Queued {len(pdf_urls) + len(non_pdf_urls)} new URLs in the {self.site_name} ledger.")
 
-    def upload_blob(self, local_file_path: str, container_name: str):
+    def upload_blob(self, local_file_path: str, container_name: str, blob_name: str = None):
         """
-        Belirtilen dosyayı (all_urls.txt) Azure Blob Storage'a yükler.
+        Belirtilen dosyayı (watermarks.json, checkpoint) Azure Blob Storage'a yükler.
 
         :param local_file_path: Yüklenecek dosyanın yerel yolu.
         :param container_name: Blob Storage'daki konteynerin adı.
+        :param blob_name: Blob adı; verilmezse dosya adı kullanılır.
         """
-        blob_name = os.path.basename(local_file_path)  # Dosya adını blob adı olarak kullanıyoruz
+        blob_name = blob_name or os.path.basename(local_file_path)  # Dosya adını blob adı olarak kullanıyoruz
         blob_client = self.blob_service_client.get_blob_client(container=container_name, blob=blob_name)
 
         try:
@@ -154,19 +997,22 @@ class BaseScraper(ABC):
         except Exception as e:
             self.logger.error(f"Error while uploading {local_file_path}: {str(e)}")
 
-    def download_blob(self, local_file_path: str, container_name: str):
+    def download_blob(self, local_file_path: str, container_name: str, blob_name: str = None):
         """
         Azure Blob Storage'dan belirtilen dosyayı indirir.
 
         :param local_file_path: İndirilecek dosyanın yerel yolu.
         :param container_name: Blob Storage'daki konteynerin adı.
+        :param blob_name: Blob adı; verilmezse dosya adı kullanılır.
         """
-        blob_name = os.path.basename(local_file_path)
+        blob_name = blob_name or os.path.basename(local_file_path)
         blob_client = self.blob_service_client.get_blob_client(container=container_name, blob=blob_name)
 
         try:
+            content = blob_client.download_blob().readall()
+            os.makedirs(os.path.dirname(local_file_path) or '.', exist_ok=True)
             with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
+                download_file.write(content)
 
             self.logger.info(f"Downloaded {blob_name} from Azure Blob Storage to {local_file_path}.")
         except Exception as e:
@@ -176,34 +1022,213 @@ class BaseScraper(ABC):
         """
         Downloads PDF files from the provided list of URLs and saves their metadata and descriptions.
 
+        With a `download_concurrency` above 1 the files are fetched concurrently by the async engine. Every
+        file is written to disk while it downloads, so memory use does not grow with the number of results.
+
         :param urls: A list of tuples containing the URL, date, file name, and description.
         :param keyword: The keyword associated with the search.
-        :return: A list of dictionaries containing PDF file data and metadata.
+        :return: A list of dictionaries describing the saved PDF files, see `download_pdf`.
         """
         self.logger.info(f"Downloading PDF files for keyword: {keyword}")
         data = []
+        urls = self.use_browser_pdfs(urls, keyword, data)
+        self.sync_browser_session()
+        if self.download_concurrency > 1 and len(urls) > 1:
+            failed = []
+
+            def on_done(item, content_hash, size):
+                data.append(self.finish_pdf(*item, keyword, content_hash, size))
+
+            start = time.monotonic()
+            self.downloader.download_to_store([(item[0], item) for item in urls], self.document_store, on_done,
+                                              lambda item, e: failed.append((item, e)), self.http_cache)
+            # The browser is driven from this thread only, so failed downloads are retried there afterwards
+            for item, error in failed:
+                pdf = self.download_pdf_in_browser(*item, keyword, error)
+                if pdf:
+                    data.append(pdf)
+            self.logger.info(f"Downloaded {len(data)}/{len(urls)} PDF files in {time.monotonic() - start:.1f}s.")
+            return data
+
         for url, date, name, description in urls:
-            try:
-                pdf_response = requests.get(url)
-                data.append({
-                    'url': url,
-                    'date': date,
-                    'file_name': name,
-                    'content': pdf_response.content
-                })
-                self.logger.info(f"Downloaded: {name}")
-                self.save_metadata(keyword, {
-                    "name": name,
-                    "notified_date": date,
-                    "notified_country": "Eu",
-                    "URL": url,
-                    "keyword": keyword
-                })
-                self.save_summary(keyword, url, date, name, description)
-            except Exception as e:
-                self.logger.error(f"Error downloading {url}: {str(e)}")
+            pdf = self.download_pdf(url, date, name, description, keyword, browser_fallback=True)
+            if pdf:
+                data.append(pdf)
         return data
 
+    def sync_browser_session(self, force: bool = False):
+        """
+        Hands the browser's cookies, User-Agent and Accept-Language over to the HTTP client, so downloads pass
+        the consent and session checks the browser passed. Without `force` the copy is only renewed once a
+        copied cookie expired or it became old; bots force it right after accepting a cookie banner or passing
+        a security check. `record_page` and the download steps call it, always on the browser's thread. Does
+        nothing unless `share_browser_session` is on.
+
+        :param force: Copy the session even if the last copy is still fresh.
+        """
+        if not self.session_bridge:
+            return
+        try:
+            if force:
+                self.session_bridge.sync()
+            else:
+                self.session_bridge.refresh()
+        except WebDriverException as e:
+            self.logger.warning(f"Could not hand the browser session over to the HTTP client: {e}")
+
+    def collect_browser_pdfs(self):
+        """
+        Takes the PDFs the browser loaded so far into the document store, while it still holds their bodies.
+        Call it before closing a tab that may have shown a PDF. Does nothing unless `capture_pdfs` is on.
+        """
+        if self.pdf_capture:
+            self.waits.network.poll()
+
+    def use_browser_pdfs(self, urls: List[Tuple[str, str, str, str]], keyword: str,
+                         data: List[dict]) -> List[Tuple[str, str, str, str]]:
+        """
+        Saves the PDFs the browser already loaded during discovery without downloading them again.
+
+        :param urls: A list of tuples containing the URL, date, file name, and description.
+        :param keyword: The keyword associated with the search.
+        :param data: The list the saved PDFs are appended to, see `finish_pdf`.
+        :return: The tuples still to be downloaded.
+        """
+        if not self.pdf_capture:
+            return urls
+        self.collect_browser_pdfs()
+        remaining = []
+        for url, date, name, description in urls:
+            captured = self.pdf_capture.pop(url)
+            if captured:
+                self.logger.info(f"{name} was loaded by the browser during discovery.")
+                data.append(self.finish_pdf(url, date, name, description, keyword, *captured))
+            else:
+                remaining.append((url, date, name, description))
+        return remaining
+
+    def download_pdf_in_browser(self, url: str, date: str, name: str, description: str, keyword: str,
+                                error: Exception) -> Optional[dict]:
+        """
+        Loads a PDF the HTTP client could not download through the browser, which holds the site's cookies.
+        Without `capture_pdfs` the download is marked as failed.
+
+        :param url: The URL of the PDF.
+        :param date: The distribution date of the document.
+        :param name: The name of the document.
+        :param description: The description or summary of the document.
+        :param keyword: The keyword associated with the search.
+        :param error: The exception raised by the HTTP download.
+        :return: The saved PDF, see `finish_pdf`, or None if the browser could not load it either.
+        """
+        if not self.pdf_capture:
+            self.download_failed(url, error)
+            return None
+        self.logger.info(f"HTTP download of {url} failed ({error}), loading it through the browser.")
+        try:
+            content_hash, size = self.pdf_capture.load(url)
+        except Exception as e:
+            self.download_failed(url, e)
+            return None
+        self.http.record_bytes(url, size)
+        return self.finish_pdf(url, date, name, description, keyword, content_hash, size)
+
+    def download_pdf(self, url: str, date: str, name: str, description: str, keyword: str,
+                     browser_fallback: bool = False):
+        """
+        Downloads a single PDF file and saves it together with its metadata and description.
+
+        The body is streamed in `download_chunk_size` chunks into the document store, hashed on the way, and
+        linked into the keyword's `pdf` folder once complete, so a failed download leaves no partial file.
+        A URL fetched before is requested conditionally; when it is unchanged the stored copy is used.
+
+        :param url: The URL of the PDF.
+        :param date: The distribution date of the document.
+        :param name: The name of the document.
+        :param description: The description or summary of the document.
+        :param keyword: The keyword associated with the search.
+        :param browser_fallback: Load the PDF through the browser when the download fails, see
+                                 `download_pdf_in_browser`. Only on the thread that drives the browser.
+        :return: A dictionary with the URL, date, file name, path, content hash and size of the saved PDF,
+                 or None if the download failed.
+        """
+        if self.pdf_capture:
+            captured = self.pdf_capture.pop(url)
+            if captured:
+                self.logger.info(f"{name} was loaded by the browser during discovery.")
+                return self.finish_pdf(url, date, name, description, keyword, *captured)
+        try:
+            headers = self.http_cache.headers(url)
+            with self.http.get(url, logger=self.logger, stream=True, headers=headers) as pdf_response:
+                if pdf_response.status_code == 304 and headers:
+                    content_hash, size = self.http_cache.not_modified(url)
+                    self.logger.info(f"{name} is unchanged since the last download.")
+                    return self.finish_pdf(url, date, name, description, keyword, content_hash, size)
+                pdf_response.raise_for_status()
+                content_hash, size = self.document_store.put_stream(
+                    pdf_response.iter_content(chunk_size=self.download_chunk_size))
+                self.http_cache.update(url, pdf_response.headers, content_hash, size)
+            self.http.record_bytes(url, size)
+            return self.finish_pdf(url, date, name, description, keyword, content_hash, size)
+        except Exception as e:
+            if browser_fallback:
+                return self.download_pdf_in_browser(url, date, name, description, keyword, e)
+            self.download_failed(url, e)
+            return None
+
+    def finish_pdf(self, url: str, date: str, name: str, description: str, keyword: str, content_hash: str,
+                   size: int) -> dict:
+        """
+        Links a PDF that was stored in the document store into the keyword folder and saves its metadata
+        and description. Called by both download engines.
+
+        :param url: The URL of the PDF.
+        :param date: The distribution date of the document.
+        :param name: The name of the document.
+        :param description: The description or summary of the document.
+        :param keyword: The keyword associated with the search.
+        :param content_hash: The hex SHA-256 of the PDF.
+        :param size: The size of the PDF in bytes.
+        :return: A dictionary with the URL, date, file name, path, content hash and size of the saved PDF.
+        """
+        pdf_name = self.save_pdf(keyword, name, content_hash)
+        self.logger.info(f"Downloaded: {name} ({size / 2 ** 20:.1f} MiB)")
+        metadata = {
+            "name": name,
+            "notified_date": date,
+            "notified_country": "Eu",
+            "URL": url,
+            "keyword": keyword,
+            "content_hash": content_hash
+        }
+        # The same bytes were delivered under another URL before; the zip step leaves the PDF out
+        duplicate_of = self.ledger.find_content(content_hash, exclude=[self.url_key(url)] +
+                                                self.discovery_keys.get(url, []))
+        if duplicate_of:
+            self.logger.info(f"{name} has the same content as {duplicate_of}.")
+            metadata["duplicate_of"] = duplicate_of
+        self.save_metadata(keyword, metadata)
+        self.save_summary(keyword, url, date, name, description)
+        self.record_completed(url, content_hash)
+        return {
+            'url': url,
+            'date': date,
+            'file_name': name,
+            'path': pdf_name,
+            'content_hash': content_hash,
+            'size': size
+        }
+
+    def download_failed(self, url: str, error: Exception):
+        """
+        Logs a failed PDF download and marks its URL for a retry in the next run.
+
+        :param url: The URL of the PDF.
+        :param error: The exception raised by the download.
+        """
+        self.logger.error(f"Error downloading {url}: {str(error)}")
+        self.record_failed(url)
+
     @abstractmethod
     def search_for_keyword(self, keyword):
         """
@@ -228,26 +1253,99 @@ class BaseScraper(ABC):
         """
         Processes non-PDF URLs by downloading the content, extracting tables, and saving the metadata and description.
 
+        Pages captured during discovery are processed from their captured HTML. With a `download_concurrency`
+        above 1 the other pages are fetched concurrently by the async engine.
+
         :param urls: A list of tuples containing the URL, date, file name, and description.
         :param keyword: The keyword associated with the search.
         """
         self.logger.info(f"Processing non-PDF URLs for keyword: {keyword}")
-        for url, date, name, description in urls:
+        remaining = []
+        for item in urls:
+            html = self.captured_pages.pop(item[0])
+            if html is None:
+                remaining.append(item)
+                continue
             try:
-                response = requests.get(url)
-                soup = BeautifulSoup(response.content, 'html.parser')
-                self.save_summary(keyword, url, date, name, description)
-                self.extract_and_save_tables(soup, keyword, name, date)
-                self.logger.info(f"Extracted summary and checked for tables from: {url}")
-                self.save_metadata(keyword, {
-                    "name": name,
-                    "notified_date": date,
-                    "notified_country": "Eu",
-                    "URL": url,
-                    "keyword": keyword
-                })
+                self.process_non_pdf_content(*item, keyword, html.encode('utf-8'))
             except Exception as e:
-                self.logger.error(f"Error processing {url}: {str(e)}")
+                self.processing_failed(item[0], e)
+        if len(remaining) < len(urls):
+            self.logger.info(f"Reused {len(urls) - len(remaining)} pages rendered during discovery.")
+        urls = remaining
+        self.sync_browser_session()
+
+        if self.download_concurrency > 1 and len(urls) > 1:
+            self.downloader.fetch([(item[0], item) for item in urls],
+                                  lambda item, content: self.process_non_pdf_content(*item, keyword, content),
+                                  lambda item, e: self.processing_failed(item[0], e), self.http_cache)
+            return
+
+        for url, date, name, description in urls:
+            self.process_non_pdf_url(url, date, name, description, keyword)
+
+    def process_non_pdf_url(self, url: str, date: str, name: str, description: str, keyword: str):
+        """
+        Processes a single non-PDF URL: saves the description, extracts tables and saves the metadata.
+        The HTML captured during discovery is used when there is one.
+
+        :param url: The URL of the page.
+        :param date: The distribution date of the document.
+        :param name: The name of the document.
+        :param description: The description or summary of the document.
+        :param keyword: The keyword associated with the search.
+        """
+        try:
+            html = self.captured_pages.pop(url)
+            if html is not None:
+                self.process_non_pdf_content(url, date, name, description, keyword, html.encode('utf-8'))
+                return
+            headers = self.http_cache.headers(url)
+            response = self.http.get(url, logger=self.logger, headers=headers)
+            if response.status_code == 304 and headers:
+                content = self.http_cache.read(url)
+            else:
+                response.raise_for_status()
+                content = response.content
+                self.http_cache.update_content(url, response.headers, content)
+            self.process_non_pdf_content(url, date, name, description, keyword, content)
+        except Exception as e:
+            self.processing_failed(url, e)
+
+    def process_non_pdf_content(self, url: str, date: str, name: str, description: str, keyword: str,
+                                content: bytes):
+        """
+        Saves the description, tables and metadata of a fetched non-PDF page. Called by both download engines.
+
+        :param url: The URL of the page.
+        :param date: The distribution date of the document.
+        :param name: The name of the document.
+        :param description: The description or summary of the document.
+        :param keyword: The keyword associated with the search.
+        :param content: The HTML of the page.
+        """
+        soup = BeautifulSoup(content, 'html.parser')
+        self.save_summary(keyword, url, date, name, description)
+        self.extract_and_save_tables(soup, keyword, name, date)
+        self.logger.info(f"Extracted summary and checked for tables from: {url}")
+        self.save_metadata(keyword, {
+            "name": name,
+            "notified_date": date,
+            "notified_country": "Eu",
+            "URL": url,
+            "keyword": keyword
+        })
+        self.record_completed(url, hashlib.sha256(content).hexdigest())
+
+    def processing_failed(self, url: str, error: Exception):
+        """
+        Logs a failed non-PDF page and marks its URL for a retry in the next run.
+
+        :param url: The URL of the page.
+        :param error: The exception raised while fetching or parsing the page.
+        """
+        self.logger.error(f"Error processing {url}: {str(error)}")
+        self.record_failed(url)
 
     def save_metadata(self, keyword: str, metadata: dict):
         """
@@ -256,12 +1354,14 @@ class BaseScraper(ABC):
         :param keyword: The keyword associated with the search.
         :param metadata: A dictionary containing metadata information.
         """
-        metadata_folder = os.path.join(f'data/raw/{self.site_name}', keyword.replace(':', '').replace(' ', '_'),
-                                       'metadata')
+        metadata_folder = os.path.join(self.keyword_folder(keyword), 'metadata')
         os.makedirs(metadata_folder, exist_ok=True)
         metadata_file_name = os.path.join(metadata_folder, f"metadata_{metadata['name']}.json")
-        with open(metadata_file_name, 'w', encoding='utf-8') as metadata_file:
+        # Written next to the target and renamed, so a crash never leaves a truncated metadata file
+        temp_file_name = f"{metadata_file_name}.tmp"
+        with open(temp_file_name, 'w', encoding='utf-8') as metadata_file:
             json.dump(metadata, metadata_file, ensure_ascii=False, indent=4)
+        os.replace(temp_file_name, metadata_file_name)
         self.logger.info(f"Metadata saved to {metadata_file_name}")
 
     def save_summary(self, keyword: str, url: str, date: str, name: str, description: str):
@@ -274,7 +1374,7 @@ class BaseScraper(ABC):
         :param name: The name of the document.
         :param description: The description or summary of the document.
         """
-        text_folder = os.path.join(f'data/raw/{self.site_name}', keyword.replace(':', '').replace(' ', '_'), 'text')
+        text_folder = os.path.join(self.keyword_folder(keyword), 'text')
         os.makedirs(text_folder, exist_ok=True)
         summary_file_name = os.path.join(text_folder, f"{name}.txt")
         with open(summary_file_name, 'w', encoding='utf-8') as summary_file:
@@ -284,20 +1384,19 @@ class BaseScraper(ABC):
             summary_file.write(f"Summary: {description}\n")
         self.logger.info(f"Summary saved to {summary_file_name}")
 
-    def save_pdf_data(self, keyword: str, data: List[dict]):
+    def save_pdf(self, keyword: str, name: str, content_hash: str) -> str:
         """
-        Saves downloaded PDF files to the appropriate directory.
+        Links a stored PDF into the keyword's `pdf` folder.
 
         :param keyword: The keyword associated with the search.
-        :param data: A list of dictionaries containing the PDF file content and metadata.
+        :param name: The name of the document.
+        :param content_hash: The hex SHA-256 of the PDF in the document store.
+        :return: The path of the PDF in the keyword's folder.
         """
-        pdf_folder = os.path.join(f'data/raw/{self.site_name}', keyword.replace(':', '').replace(' ', '_'), 'pdf')
-        os.makedirs(pdf_folder, exist_ok=True)
-        for item in data:
-            pdf_name = os.path.join(pdf_folder, f"{item['file_name']}.pdf")
-            with open(pdf_name, 'wb') as pdf_file:
-                pdf_file.write(item['content'])
-            self.logger.info(f"PDF saved to {pdf_name}")
+        pdf_name = os.path.join(self.keyword_folder(keyword), 'pdf', f"{name}.pdf")
+        self.document_store.link(content_hash, pdf_name)
+        self.logger.info(f"PDF saved to {pdf_name} ({content_hash[:12]})")
+        return pdf_name
 
     def extract_and_save_tables(self, soup: BeautifulSoup, keyword: str, name: str, date: str):
         """
@@ -324,7 +1423,7 @@ class BaseScraper(ABC):
                 }
                 tables_data.append(table_data)
         if tables_data:
-            json_folder = os.path.join(f'data/raw/{self.site_name}', keyword.replace(':', '').replace(' ', '_'), 'json')
+            json_folder = os.path.join(self.keyword_folder(keyword), 'json')
             os.makedirs(json_folder, exist_ok=True)
             table_file_name = os.path.join(json_folder, f"{name}.json")
             with open(table_file_name, 'w', encoding='utf-8') as table_file:
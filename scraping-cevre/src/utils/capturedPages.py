@@ -0,0 +1,74 @@
+import gzip
+import hashlib
+import os
+import threading
+from typing import Optional
+
+
+class CapturedPages:
+    """
+    The HTML of detail pages a bot already rendered in Selenium during discovery, handed on to the non-PDF
+    processing step so that tables and summaries are extracted from it instead of fetching the page again.
+
+    Pages are kept in memory, or, with a `spill_dir`, gzip-compressed on disk: a few KB per page instead of
+    the full HTML, and they survive an interruption, so a resumed keyword still finds them.
+    """
+
+    def __init__(self, spill_dir: str = None, compress_level: int = 6):
+        """
+        :param spill_dir: The directory the compressed pages are written to. Without it pages stay in memory.
+        :param compress_level: The gzip level of spilled pages.
+        """
+        self.spill_dir = spill_dir
+        self.compress_level = compress_level
+        self._pages = {}
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def _spill_path(self, url: str) -> str:
+        return os.path.join(self.spill_dir, f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.html.gz")
+
+    def put(self, url: str, html: str):
+        """
+        :param url: The canonical URL of the page, as it appears in the result tuple.
+        :param html: The rendered HTML of the page.
+        """
+        if self.spill_dir:
+            path = self._spill_path(url)
+            temp_path = f"{path}.tmp"
+            with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=self.compress_level) as file:
+                file.write(html)
+            os.replace(temp_path, path)
+        else:
+            with self._lock:
+                self._pages[url] = html
+
+    def pop(self, url: str) -> Optional[str]:
+        """
+        Takes the captured HTML of a page.
+
+        :param url: The URL of the result.
+        :return: The HTML, or None if the page was not captured.
+        """
+        if self.spill_dir:
+            path = self._spill_path(url)
+            try:
+                with gzip.open(path, 'rt', encoding='utf-8') as file:
+                    html = file.read()
+            except (FileNotFoundError, OSError, EOFError):
+                return None
+            os.remove(path)
+            return html
+        with self._lock:
+            return self._pages.pop(url, None)
+
+    def clear(self):
+        """
+        Drops every captured page, e.g. those of results that turned out to be processed already.
+        """
+        with self._lock:
+            self._pages.clear()
+        if self.spill_dir:
+            for file_name in os.listdir(self.spill_dir):
+                os.remove(os.path.join(self.spill_dir, file_name))
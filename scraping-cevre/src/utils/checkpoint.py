@@ -0,0 +1,116 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import List, Tuple
+
+
+class Checkpoint:
+    """
+    Crawl progress of one (site, keyword) job, written periodically so that a crashed run can be resumed.
+
+    It records the page reached, every result discovered so far (with its kind, 'pdf' or 'non_pdf') and the
+    URLs whose download finished. Writes go through a temporary file and `os.replace`, so a crash never
+    leaves a half written checkpoint behind.
+    """
+
+    def __init__(self, work_dir: str, site_name: str, keyword: str, save_interval: float = 5.0):
+        """
+        :param work_dir: The data directory the `checkpoints` folder is created in.
+        :param site_name: The name of the site being scraped.
+        :param keyword: The keyword being searched.
+        :param save_interval: Minimum number of seconds between two unforced writes.
+        """
+        slug = re.sub(r'[^\w-]+', '_', keyword)
+        self.blob_name = f"checkpoints/{site_name}/{slug}.json"
+        self.path = os.path.join(work_dir, 'checkpoints', site_name, f"{slug}.json")
+        self.site_name = site_name
+        self.keyword = keyword
+        self.save_interval = save_interval
+        self.page = 0
+        self.discovered = []
+        self.completed = set()
+        self.discovery_done = False
+        self.done = False
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+        # Download threads and the main thread both save; writes share the temp file and must not overlap
+        self._save_lock = threading.Lock()
+
+    def load(self) -> bool:
+        """
+        Loads the checkpoint file if it exists.
+
+        :return: True if a checkpoint was found.
+        """
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+        except (ValueError, OSError):
+            return False
+
+        self.page = state.get('page', 0)
+        self.discovered = [(kind, tuple(item)) for kind, item in state.get('discovered', [])]
+        self.completed = set(state.get('completed', []))
+        self.discovery_done = state.get('discovery_done', False)
+        self.done = state.get('done', False)
+        return True
+
+    def save(self, force: bool = False) -> bool:
+        """
+        Writes the checkpoint if `save_interval` seconds passed since the last write, or if forced.
+
+        :param force: Write regardless of the interval.
+        :return: True if the file was written.
+        """
+        # The state is taken inside the write, so the last write always holds the newest state
+        with self._save_lock:
+            with self._lock:
+                now = time.monotonic()
+                if not force and now - self._last_save < self.save_interval:
+                    return False
+                self._last_save = now
+                state = {
+                    'site': self.site_name,
+                    'keyword': self.keyword,
+                    'page': self.page,
+                    'discovered': [[kind, list(item)] for kind, item in self.discovered],
+                    'completed': sorted(self.completed),
+                    'discovery_done': self.discovery_done,
+                    'done': self.done,
+                    'updated': datetime.utcnow().isoformat(timespec='seconds')
+                }
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(state, file, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+            return True
+
+    def record_page(self, page: int):
+        with self._lock:
+            self.page = max(self.page, page)
+
+    def record_discovered(self, kind: str, item: Tuple[str, str, str, str]):
+        with self._lock:
+            self.discovered.append((kind, tuple(item)))
+
+    def record_completed(self, url: str):
+        with self._lock:
+            self.completed.add(url)
+
+    def discovered_urls(self) -> set:
+        with self._lock:
+            return {item[0] for _, item in self.discovered}
+
+    def pending(self) -> List[Tuple[str, Tuple[str, str, str, str]]]:
+        """
+        :return: The discovered results whose download has not finished, in discovery order.
+        """
+        with self._lock:
+            return [(kind, item) for kind, item in self.discovered if item[0] not in self.completed]
@@ -0,0 +1,210 @@
+import json
+import time
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from selenium.common.exceptions import WebDriverException
+
+# The Chrome logging preferences that put the DevTools Network events into the driver's performance log
+PERFORMANCE_LOGGING_PREFS = {'performance': 'ALL'}
+PERF_LOGGING_OPTIONS = {'enableNetwork': True, 'enablePage': False}
+
+
+def _extensions(*extensions: str) -> Tuple[str, ...]:
+    # `Network.setBlockedURLs` matches whole URLs with '*' wildcards; cover URLs with and without a query
+    return tuple(pattern for extension in extensions for pattern in (f"*.{extension}", f"*.{extension}?*"))
+
+
+# The URL patterns blocked for each resource type a BrowserProfile names
+RESOURCE_PATTERNS = {
+    'image': _extensions('png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp'),
+    'font': _extensions('woff', 'woff2', 'ttf', 'otf', 'eot'),
+    'media': _extensions('mp4', 'webm', 'ogg', 'mp3', 'm4a', 'mov', 'avi'),
+    'stylesheet': _extensions('css'),
+    'analytics': ('*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*hotjar.com*',
+                  '*connect.facebook.net*', '*matomo.js*', '*piwik.js*', '*youtube.com/embed*',
+                  '*player.vimeo.com*'),
+}
+
+
+class BrowserProfile(NamedTuple):
+    """
+    What the browser loads for a site. Bots only read text and links, so images, fonts, media and analytics
+    scripts are blocked by default. Stylesheets are only blocked where no click or visibility wait depends
+    on them, and `eager` lets navigations return at DOMContentLoaded where the bot waits for its elements
+    anyway instead of relying on the load event.
+    """
+    blocked: FrozenSet[str] = frozenset({'image', 'font', 'media', 'analytics'})
+    # Extra URL patterns to block, e.g. a site's chat widget
+    blocked_urls: Tuple[str, ...] = ()
+    eager: bool = False
+
+    def patterns(self, *extra_types: str) -> List[str]:
+        """
+        :param extra_types: Resource types blocked on top of the profile, e.g. 'stylesheet' for a page that is
+                            only read.
+        :return: The URL patterns for `Network.setBlockedURLs`.
+        """
+        types = sorted(self.blocked.union(extra_types))
+        return [pattern for kind in types for pattern in RESOURCE_PATTERNS[kind]] + list(self.blocked_urls)
+
+
+def block_urls(driver, patterns: List[str]):
+    """
+    Blocks requests matching the patterns in the current tab through DevTools. Tabs opened later need their
+    own call, and an empty list lifts the blocking.
+
+    :param driver: The Selenium Chrome WebDriver.
+    :param patterns: URL patterns with '*' wildcards.
+    """
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+
+
+# The time origin of the current document and its DOMContentLoaded and load times in milliseconds
+NAVIGATION_TIMING_SCRIPT = """
+const navigation = performance.getEntriesByType('navigation')[0];
+return navigation ? [performance.timeOrigin, navigation.domContentLoadedEventEnd, navigation.loadEventEnd] : null;
+"""
+
+
+def target_id(handle: str) -> str:
+    """
+    :param handle: A Selenium window handle.
+    :return: The DevTools target ID of the tab, as the performance log entries name it.
+    """
+    # Old ChromeDriver versions prefix the target ID
+    return handle[len('CDwindow-'):] if handle.startswith('CDwindow-') else handle
+
+
+class NetworkLog:
+    """
+    Follows the Chrome DevTools `Network.*` events of a driver, read from its performance log.
+
+    The log is a buffer the driver fills in the background and every read drains, so a single reader per
+    driver hands the events on to the listeners that need them. It keeps track of the requests in flight per
+    tab, which is what `PageWaits.network_idle` waits on: the result pages loading in background tabs (see
+    `pager.ResultPager`) do not keep the tab the bot works in from counting as idle. Each log entry names
+    the tab (DevTools target) it came from, which is the tab's window handle.
+
+    Drivers started without performance logging have no such log; `available` is False then and the
+    callers fall back to waiting on the DOM.
+    """
+
+    def __init__(self, driver):
+        """
+        :param driver: The Selenium Chrome WebDriver.
+        """
+        self.driver = driver
+        self.available = True
+        # Request IDs in flight and the time of the last event, per tab; None holds entries without a tab
+        self.in_flight: Dict[Optional[str], Set[str]] = {}
+        self.last_activity: Dict[Optional[str], float] = {}
+        self.started = time.monotonic()
+        self.listeners: List[Callable[[List[dict]], None]] = []
+
+    def poll(self) -> List[dict]:
+        """
+        Drains the performance log.
+
+        :return: The `Network.*` DevTools messages logged since the last poll, each with `method` and `params`.
+        """
+        if not self.available:
+            return []
+        try:
+            entries = self.driver.get_log('performance')
+        except (WebDriverException, ValueError):
+            self.available = False
+            return []
+
+        events = []
+        now = time.monotonic()
+        for entry in entries:
+            logged = json.loads(entry['message'])
+            message = logged.get('message', {})
+            method = message.get('method', '')
+            if not method.startswith('Network.'):
+                continue
+            tab = logged.get('webview')
+            request_id = message.get('params', {}).get('requestId')
+            if method == 'Network.requestWillBeSent':
+                self.in_flight.setdefault(tab, set()).add(request_id)
+            elif method in ('Network.loadingFinished', 'Network.loadingFailed'):
+                requests = self.in_flight.get(tab)
+                if requests is not None:
+                    requests.discard(request_id)
+                    if not requests:
+                        del self.in_flight[tab]
+            self.last_activity[tab] = now
+            events.append(message)
+
+        if events:
+            for listener in self.listeners:
+                listener(events)
+        return events
+
+    def idle_for(self, tab: str = None) -> float:
+        """
+        Polls the log and tells how long the network of a tab has been quiet.
+
+        :param tab: The DevTools target ID of the tab, the current tab by default.
+        :return: Seconds since the last network event of the tab, 0 while it has requests in flight.
+        """
+        self.poll()
+        if tab is None:
+            tab = self.current_tab()
+        # Entries without a tab cannot be told apart, so they count for every tab
+        tabs = (tab, None)
+        if any(self.in_flight.get(key) for key in tabs):
+            return 0.0
+        return time.monotonic() - max(self.last_activity.get(key, self.started) for key in tabs)
+
+    def current_tab(self) -> Optional[str]:
+        """
+        :return: The DevTools target ID of the current tab, None if the browser does not tell.
+        """
+        try:
+            return target_id(self.driver.current_window_handle)
+        except WebDriverException:
+            return None
+
+    def forget(self, tab: str):
+        """
+        Drops the state of a closed tab, whose pending requests will never log their end.
+
+        :param tab: The window handle of the tab.
+        """
+        self.poll()
+        tab = target_id(tab)
+        self.in_flight.pop(tab, None)
+        self.last_activity.pop(tab, None)
+
+
+class PageLoadStats:
+    """
+    A `NetworkLog` listener counting the requests, blocked requests and transferred bytes between two calls
+    of `take`, i.e. per result page.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.blocked = 0
+        self.bytes = 0
+
+    def __call__(self, events: List[dict]):
+        for event in events:
+            method = event['method']
+            params = event.get('params', {})
+            if method == 'Network.requestWillBeSent':
+                self.requests += 1
+            elif method == 'Network.loadingFinished':
+                self.bytes += int(params.get('encodedDataLength', 0))
+            elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+                self.blocked += 1
+
+    def take(self) -> Tuple[int, int, int]:
+        """
+        :return: `(requests, blocked, bytes)` since the last call.
+        """
+        counts = self.requests, self.blocked, self.bytes
+        self.requests = self.blocked = self.bytes = 0
+        return counts
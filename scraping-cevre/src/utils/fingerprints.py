@@ -0,0 +1,117 @@
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Iterable
+
+# Header: magic, generation, number of fingerprints, Bloom filter size in bits, number of Bloom hashes
+_HEADER = struct.Struct('=8sQQQQ')
+_MAGIC = b'URLFP001'
+
+
+def fingerprint(url: str) -> int:
+    """
+    Hashes a URL to a 64-bit fingerprint. Collisions become likely only around four billion URLs.
+
+    :param url: The URL or discovery key.
+    :return: The fingerprint as an unsigned integer.
+    """
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _bloom_positions(value: int, bits: int, hashes: int):
+    # Double hashing on the two halves of the fingerprint
+    h1 = value & 0xFFFFFFFF
+    h2 = (value >> 32) | 1
+    return ((h1 + i * h2) % bits for i in range(hashes))
+
+
+class FingerprintSet:
+    """
+    A read-only set of URLs stored as sorted 64-bit fingerprints, optionally fronted by a Bloom filter.
+
+    The set is built once into a file and memory-mapped, so it costs 8 bytes per URL (plus the Bloom
+    filter) in the page cache, shared by every process that opens it, instead of a Python string per URL
+    in every worker. Lookups are a Bloom probe followed by a binary search.
+
+    File layout: a header, the fingerprints as unsigned 64-bit integers in ascending order, then the Bloom
+    filter bits. Integers use the native byte order; the file is a local cache and never leaves the machine.
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens a file written by `build`.
+
+        :param path: Path of the fingerprint file.
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.generation, self.count, self.bloom_bits, self.bloom_hashes = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a fingerprint file")
+
+        view = memoryview(self._map)
+        end = _HEADER.size + self.count * 8
+        self._fingerprints = view[_HEADER.size:end].cast('Q')
+        self._bloom = view[end:end + (self.bloom_bits + 7) // 8]
+
+    @staticmethod
+    def build(path: str, urls: Iterable[str], generation: int = 0, bloom_bits_per_url: int = 0,
+              bloom_hashes: int = 7):
+        """
+        Writes the fingerprint file of the given URLs, atomically replacing an existing one.
+
+        :param path: Path of the fingerprint file.
+        :param urls: The URLs of the set.
+        :param generation: A version number stored in the header, used by callers to detect a stale file.
+        :param bloom_bits_per_url: Size of the Bloom filter; 10 bits give about 1% false positives. Off by
+                                   default: probing it in pure Python costs more than the binary search it
+                                   saves (see `benchmarks/membership_benchmark.py`).
+        :param bloom_hashes: Number of Bloom filter hash functions.
+        """
+        fingerprints = array('Q', sorted({fingerprint(url) for url in urls}))
+        bloom_bits = len(fingerprints) * bloom_bits_per_url if bloom_bits_per_url else 0
+        bloom = bytearray((bloom_bits + 7) // 8)
+        if bloom_bits:
+            for value in fingerprints:
+                for position in _bloom_positions(value, bloom_bits, bloom_hashes):
+                    bloom[position >> 3] |= 1 << (position & 7)
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, generation, len(fingerprints), bloom_bits,
+                                    bloom_hashes if bloom_bits else 0))
+            fingerprints.tofile(file)
+            file.write(bloom)
+        os.replace(temp_path, path)
+
+    def contains_fingerprint(self, value: int) -> bool:
+        """
+        :param value: A fingerprint computed with `fingerprint`.
+        :return: True if the fingerprint is in the set.
+        """
+        if self.bloom_bits:
+            for position in _bloom_positions(value, self.bloom_bits, self.bloom_hashes):
+                if not self._bloom[position >> 3] & (1 << (position & 7)):
+                    return False
+        index = bisect_left(self._fingerprints, value)
+        return index < self.count and self._fingerprints[index] == value
+
+    def __contains__(self, url: str) -> bool:
+        return self.contains_fingerprint(fingerprint(url))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        """
+        Unmaps the file.
+        """
+        self._fingerprints.release()
+        self._bloom.release()
+        self._map.close()
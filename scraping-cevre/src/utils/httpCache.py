@@ -0,0 +1,168 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Mapping, Optional, Tuple
+
+from src.utils.documentStore import DocumentStore
+from src.utils.urlCanonical import canonical_url
+
+
+class HttpCache:
+    """
+    A persistent validator cache for conditional GETs, keyed by canonical URL.
+
+    For every response that carried an `ETag` or `Last-Modified` header the cache keeps those validators and
+    the hash of the body, which itself lives in the document store. When the URL is fetched again, `headers`
+    turns them into `If-None-Match` / `If-Modified-Since`, and a `304 Not Modified` answer is served from the
+    stored object instead of downloading the body again.
+
+    Validators are only sent while the stored object exists, so a 304 can always be answered. The database is
+    local, like the ledger database, and shared by parallel jobs of a site.
+    """
+
+    def __init__(self, path: str, site_name: str, store: DocumentStore):
+        """
+        :param path: Local path of the SQLite database.
+        :param site_name: The site the cache belongs to, selecting the canonicalisation rules.
+        :param store: The document store holding the cached bodies.
+        """
+        self.path = path
+        self.site_name = site_name
+        self.store = store
+        self._lock = threading.Lock()
+        # Statistics of the current run
+        self.unchanged = 0
+        self.bytes_saved = 0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                extension TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                updated TEXT NOT NULL
+            )""")
+        self.connection.commit()
+
+    def get(self, url: str) -> Optional[Tuple[Optional[str], Optional[str], str, str, int]]:
+        """
+        :param url: The URL, canonicalised before the lookup.
+        :return: `(etag, last_modified, content_hash, extension, size)` of the URL, or None if it is not cached.
+        """
+        with self._lock:
+            return self.connection.execute(
+                "SELECT etag, last_modified, content_hash, extension, size FROM validators WHERE url = ?",
+                (canonical_url(url, self.site_name),)).fetchone()
+
+    def headers(self, url: str) -> dict:
+        """
+        Builds the conditional request headers of a URL.
+
+        :param url: The URL about to be fetched.
+        :return: `If-None-Match` and/or `If-Modified-Since`, or an empty dict when the URL is not cached or
+                 its body is gone from the document store.
+        """
+        entry = self.get(url)
+        if entry is None:
+            return {}
+        etag, last_modified, content_hash, extension, _ = entry
+        if not os.path.exists(self.store.object_path(content_hash, extension)):
+            return {}
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def not_modified(self, url: str) -> Tuple[str, int]:
+        """
+        Answers a 304 response from the cache and counts the bytes it saved.
+
+        :param url: The URL that was not modified.
+        :return: The content hash and the size of the cached body.
+        :raises KeyError: When the URL is not cached, i.e. the server answered 304 to an unconditional request.
+        """
+        _, _, content_hash, _, size = self._hit(url)
+        return content_hash, size
+
+    def read(self, url: str) -> bytes:
+        """
+        Answers a 304 response for a small body, like an HTML page, with the cached content.
+
+        :param url: The URL that was not modified.
+        :return: The cached body.
+        """
+        _, _, content_hash, extension, _ = self._hit(url)
+        with open(self.store.object_path(content_hash, extension), 'rb') as file:
+            return file.read()
+
+    def _hit(self, url: str):
+        entry = self.get(url)
+        if entry is None:
+            raise KeyError(f"304 Not Modified for {url}, which is not cached")
+        with self._lock:
+            self.unchanged += 1
+            self.bytes_saved += entry[4]
+        return entry
+
+    def update(self, url: str, response_headers: Mapping[str, str], content_hash: str, size: int,
+               extension: str = '.pdf'):
+        """
+        Remembers the validators of a full response whose body is in the document store. Responses without
+        validators are not cached.
+
+        :param url: The URL that was fetched.
+        :param response_headers: The headers of the response.
+        :param content_hash: The hex SHA-256 of the body.
+        :param size: The size of the body in bytes.
+        :param extension: The file extension of the body in the document store.
+        """
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO validators (url, etag, last_modified, content_hash, extension, size, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (canonical_url(url, self.site_name), etag, last_modified, content_hash, extension, size,
+                 datetime.utcnow().isoformat()))
+            self.connection.commit()
+
+    def update_content(self, url: str, response_headers: Mapping[str, str], content: bytes,
+                       extension: str = '.html'):
+        """
+        Like `update`, for a body held in memory: it is put into the document store when the response has
+        validators.
+
+        :param url: The URL that was fetched.
+        :param response_headers: The headers of the response.
+        :param content: The body.
+        :param extension: The file extension of the body in the document store.
+        """
+        if response_headers.get('ETag') or response_headers.get('Last-Modified'):
+            content_hash = self.store.put(content, extension)
+            self.update(url, response_headers, content_hash, len(content), extension)
+
+    def log_summary(self, logger):
+        """
+        Logs the unchanged responses and the bytes they saved in this run.
+
+        :param logger: The logger to write to.
+        """
+        logger.info(f"HTTP cache: {self.unchanged} unchanged responses, "
+                    f"{self.bytes_saved / 2 ** 20:.1f} MiB not downloaded again.")
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        with self._lock:
+            self.connection.close()
@@ -0,0 +1,243 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Statuses worth retrying: throttling and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                      "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+
+
+class HostMetrics:
+    """
+    Request statistics of one host: counts, retries, failures and latencies of the last `max_samples` requests.
+    """
+
+    def __init__(self, max_samples: int = 1000):
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.bytes = 0
+        self.latencies = []
+        self.max_samples = max_samples
+
+    def add_latency(self, seconds: float):
+        self.latencies.append(seconds)
+        if len(self.latencies) > self.max_samples:
+            del self.latencies[0]
+
+    def percentile(self, fraction: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class HttpClient:
+    """
+    The HTTP client every document fetch goes through.
+
+    A single `requests.Session` keeps a keep-alive connection pool per host, so repeated downloads from the
+    same site reuse their TCP and TLS connections. Every request has a connect and a read timeout, and
+    connection errors, timeouts, 429 and 5xx answers are retried with jittered exponential backoff,
+    honouring `Retry-After`. Latency, retries and failures are collected per host.
+
+    The client is thread-safe and meant to be shared within a process, see `get_http_client`.
+    """
+
+    def __init__(self, connect_timeout: float = 10, read_timeout: float = 60, max_retries: int = 4,
+                 backoff_base: float = 1.0, backoff_cap: float = 60.0, pool_maxsize: int = 10,
+                 user_agent: str = DEFAULT_USER_AGENT):
+        """
+        :param connect_timeout: Seconds to wait for a connection.
+        :param read_timeout: Seconds to wait between two bytes of the answer.
+        :param max_retries: Number of retries after the first attempt.
+        :param backoff_base: The first backoff in seconds, doubled on every retry.
+        :param backoff_cap: The longest backoff or `Retry-After` wait in seconds.
+        :param pool_maxsize: Connections kept alive per host, roughly the number of concurrent downloads.
+        :param user_agent: The User-Agent header sent with every request.
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = user_agent
+        # The headers the async engine sends as well; see `use_headers`
+        self.shared_headers = {'User-Agent': user_agent}
+
+        self.metrics = defaultdict(HostMetrics)
+        self._lock = threading.Lock()
+
+    def get(self, url: str, logger=None, **kwargs) -> requests.Response:
+        """
+        Sends a GET request, retrying transient failures.
+
+        :param url: The URL to fetch.
+        :param logger: The logger retries are reported to; they are printed when it is not given.
+        :param kwargs: Passed on to `requests.Session.get`, e.g. `stream=True` or `headers`.
+        :return: The response. After the last retry a 429/5xx response is returned as is; call
+                 `raise_for_status` to turn it into an error.
+        :raises requests.RequestException: When the last attempt failed without a response.
+        """
+        return self.request('GET', url, logger=logger, **kwargs)
+
+    def request(self, method: str, url: str, logger=None, **kwargs) -> requests.Response:
+        """
+        Sends a request, retrying transient failures. See `get`.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.record_request(host, time.monotonic() - start, failed=attempt >= self.max_retries)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                error = type(e).__name__
+            else:
+                retry = response.status_code in RETRY_STATUSES and attempt < self.max_retries
+                self.record_request(host, time.monotonic() - start,
+                                    failed=response.status_code >= 400 and not retry,
+                                    size=0 if kwargs.get('stream') else len(response.content))
+                if not retry:
+                    return response
+                delay = self.retry_after(response)
+                if delay is None:
+                    delay = self.backoff(attempt)
+                error = f"HTTP {response.status_code}"
+                response.close()
+
+            self.record_retry(host)
+            message = f"{error} from {url}, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})."
+            if logger:
+                logger.warning(message)
+            else:
+                print(message)
+            time.sleep(delay)
+            attempt += 1
+
+    def use_headers(self, headers: dict):
+        """
+        Sends the headers with every later request of both download engines, e.g. the User-Agent of the
+        browser whose cookies the requests carry.
+
+        :param headers: Header names and values.
+        """
+        self.session.headers.update(headers)
+        self.shared_headers.update(headers)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Full jitter backoff: a random wait between 0 and `backoff_base * 2 ** attempt`, capped.
+
+        :param attempt: The number of the failed attempt, starting from 0.
+        :return: The wait in seconds.
+        """
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def retry_after(self, response: requests.Response) -> Optional[float]:
+        """
+        Reads the `Retry-After` header, given either in seconds or as an HTTP date.
+
+        :param response: The 429/503 response.
+        :return: The wait in seconds (capped at `backoff_cap`), or None if the header is missing or invalid.
+        """
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return None
+        return min(self.backoff_cap, max(0.0, seconds))
+
+    def record_request(self, host: str, seconds: float, failed: bool, size: int = 0):
+        """
+        Adds one request to the host metrics. Also used by the async download engine.
+
+        :param host: The host of the request.
+        :param seconds: The time until the response headers arrived.
+        :param failed: True if the request finally failed.
+        :param size: The number of body bytes, when already known.
+        """
+        with self._lock:
+            metrics = self.metrics[host]
+            metrics.requests += 1
+            metrics.bytes += size
+            metrics.add_latency(seconds)
+            if failed:
+                metrics.failures += 1
+
+    def record_retry(self, host: str):
+        """
+        :param host: The host of a request that is about to be retried.
+        """
+        with self._lock:
+            self.metrics[host].retries += 1
+
+    def record_bytes(self, url: str, size: int):
+        """
+        Adds the size of a streamed body, which is unknown when the request returns, to the host metrics.
+
+        :param url: The URL that was fetched.
+        :param size: The number of bytes read.
+        """
+        with self._lock:
+            self.metrics[urlsplit(url).netloc].bytes += size
+
+    def log_metrics(self, logger):
+        """
+        Logs the request statistics of every host.
+
+        :param logger: The logger to write to.
+        """
+        with self._lock:
+            for host, metrics in sorted(self.metrics.items()):
+                logger.info(f"HTTP {host}: {metrics.requests} requests, {metrics.retries} retries, "
+                            f"{metrics.failures} failures, {metrics.bytes / 2 ** 20:.1f} MiB, "
+                            f"latency p50 {metrics.percentile(0.5):.2f}s p95 {metrics.percentile(0.95):.2f}s")
+
+    def close(self):
+        """
+        Closes the pooled connections.
+        """
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client(**options) -> HttpClient:
+    """
+    Returns the HTTP client of the current process, creating it on the first call.
+
+    :param options: `HttpClient` options, used only when the client is created.
+    :return: The shared client.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(**options)
+        return _client
@@ -0,0 +1,365 @@
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from src.utils.fingerprints import FingerprintSet, fingerprint
+
+
+# Statuses that make a URL count as known; 'failed' and 'interrupted' results are tried again next run
+KNOWN_STATUSES = ('queued', 'done', 'legacy')
+
+
+class UrlLedger:
+    """
+    The dedup ledger of one site: every result the site produced, under its document key (see
+    `urlCanonical.document_key`) or discovery key, with the date it was first seen, the hash of its content
+    and its status.
+
+    The ledger lives in a local SQLite database, so membership checks are indexed lookups and nothing has
+    to be read into memory. It is synchronised with Blob Storage as append-only segments below
+    `ledger/<site>/`: every sync uploads only the records that changed since the previous one as a new
+    gzipped JSON lines blob, and only segments that were not applied locally yet are downloaded.
+
+    Records merge by last write (`updated`), keeping the earliest `first_seen` and the last known
+    `content_hash`, so segments can be applied in any order and more than once.
+
+    After `load_index` membership checks are answered by a memory-mapped `FingerprintSet` of the known
+    URLs plus the changes made since it was built. Only URLs the index does not know are looked up in the
+    database, since parallel jobs of the same site record into it meanwhile.
+    """
+
+    def __init__(self, path: str, site_name: str, container_client=None, logger=None):
+        """
+        :param path: Local path of the SQLite database.
+        :param site_name: The site the ledger belongs to; also its blob prefix.
+        :param container_client: The Blob Storage container holding the segments. Without it the ledger is
+                                 local only.
+        :param logger: Logger used to report sync progress.
+        """
+        self.path = path
+        self.site_name = site_name
+        self.prefix = f"ledger/{site_name}/"
+        self.container_client = container_client
+        self.logger = logger
+        self._lock = threading.Lock()
+        self.index_path = f"{os.path.splitext(path)[0]}.fp"
+        self.index = None
+        # Fingerprints whose known state changed after the index was built
+        self._added = set()
+        self._removed = set()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Parallel jobs of the same site share the database, so wait for the other writer instead of failing
+        self.connection = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                first_seen TEXT NOT NULL,
+                content_hash TEXT,
+                status TEXT NOT NULL,
+                updated TEXT NOT NULL,
+                dirty INTEGER NOT NULL DEFAULT 0,
+                seq INTEGER NOT NULL DEFAULT 0
+            )""")
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(urls)")}
+        if 'seq' not in columns:
+            self.connection.execute("ALTER TABLE urls ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS urls_seq ON urls (seq)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS urls_content_hash ON urls (content_hash)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS segments (name TEXT PRIMARY KEY)")
+        # A change counter; every merged batch gets the next value, so the index can tell what it misses
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.connection.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('seq', 0)")
+        self.connection.commit()
+
+    def _log(self, message: str, error: bool = False):
+        if self.logger:
+            (self.logger.error if error else self.logger.info)(message)
+
+    def __contains__(self, url: str) -> bool:
+        if self.index is not None:
+            value = fingerprint(url)
+            with self._lock:
+                if value in self._added:
+                    return True
+                if value in self._removed:
+                    return False
+            if self.index.contains_fingerprint(value):
+                return True
+
+        with self._lock:
+            row = self.connection.execute("SELECT status FROM urls WHERE url = ?", (url,)).fetchone()
+            known = row is not None and row[0] in KNOWN_STATUSES
+            if known and self.index is not None:
+                # Recorded by another job after the index was built
+                self._added.add(fingerprint(url))
+        return known
+
+    def load_index(self, max_changes: int = 10000):
+        """
+        Opens the fingerprint index of the known URLs, rebuilding it when it is missing or when more than
+        `max_changes` records changed since it was built. Smaller changes are kept next to the index.
+
+        :param max_changes: Number of changed records tolerated before rebuilding.
+        """
+        index = None
+        if os.path.exists(self.index_path):
+            try:
+                index = FingerprintSet(self.index_path)
+            except (ValueError, OSError):
+                index = None
+
+        with self._lock:
+            generation = index.generation if index else 0
+            changes = self.connection.execute("SELECT COUNT(*) FROM urls WHERE seq > ?", (generation,)).fetchone()[0]
+            if index is None or changes > max_changes:
+                if index:
+                    index.close()
+                current = self.connection.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()[0]
+                placeholders = ', '.join('?' * len(KNOWN_STATUSES))
+                rows = self.connection.execute(f"SELECT url FROM urls WHERE status IN ({placeholders})",
+                                               KNOWN_STATUSES)
+                FingerprintSet.build(self.index_path, (row[0] for row in rows), generation=current)
+                index = FingerprintSet(self.index_path)
+                changed = []
+            else:
+                changed = self.connection.execute("SELECT url, status FROM urls WHERE seq > ?",
+                                                  (generation,)).fetchall()
+
+            if self.index:
+                self.index.close()
+            self.index = index
+            self._added, self._removed = set(), set()
+            for url, status in changed:
+                self._track(url, status)
+        self._log(f"Loaded the {self.site_name} URL index with {len(index)} fingerprints "
+                  f"and {len(changed)} later changes.")
+
+    def _track(self, url: str, status: str):
+        value = fingerprint(url)
+        if status in KNOWN_STATUSES:
+            self._added.add(value)
+            self._removed.discard(value)
+        else:
+            self._removed.add(value)
+            self._added.discard(value)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def get(self, url: str) -> Optional[dict]:
+        """
+        :param url: The URL or discovery key.
+        :return: The record of the URL, or None if it was never seen.
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT url, first_seen, content_hash, status, updated FROM urls WHERE url = ?", (url,)).fetchone()
+        return dict(zip(('url', 'first_seen', 'content_hash', 'status', 'updated'), row)) if row else None
+
+    def find_content(self, content_hash: str, exclude: Iterable[str] = ()) -> Optional[str]:
+        """
+        Looks for another finished result with the same content.
+
+        :param content_hash: The SHA-256 of the content.
+        :param exclude: Keys of the result itself.
+        :return: The key of a finished result with that content, or None.
+        """
+        exclude = list(exclude)
+        placeholders = ', '.join('?' * len(exclude))
+        with self._lock:
+            row = self.connection.execute(
+                f"SELECT url FROM urls WHERE content_hash = ? AND status = 'done' AND url NOT IN ({placeholders}) "
+                f"LIMIT 1", [content_hash] + exclude).fetchone()
+        return row[0] if row else None
+
+    def record(self, urls: Iterable[str], status: str, content_hash: str = None):
+        """
+        Records the status of one or more URLs. New URLs get today's date as `first_seen`; the change is
+        uploaded with the next `sync_up`.
+
+        :param urls: The URLs (and discovery keys) to record.
+        :param status: 'queued', 'done', 'failed', 'interrupted' or 'legacy'.
+        :param content_hash: The SHA-256 of the downloaded content, if known.
+        """
+        now = datetime.utcnow().isoformat(timespec='seconds')
+        rows = [{'url': url, 'first_seen': now[:10], 'content_hash': content_hash, 'status': status,
+                 'updated': now} for url in urls if url]
+        with self._lock:
+            self._merge(rows, dirty=1)
+            self.connection.commit()
+            if self.index is not None:
+                for row in rows:
+                    self._track(row['url'], status)
+
+    def _merge(self, rows: List[dict], dirty: int):
+        self.connection.execute("UPDATE meta SET value = value + 1 WHERE key = 'seq'")
+        self.connection.executemany("""
+            INSERT INTO urls (url, first_seen, content_hash, status, updated, dirty, seq)
+            VALUES (:url, :first_seen, :content_hash, :status, :updated, :dirty,
+                    (SELECT value FROM meta WHERE key = 'seq'))
+            ON CONFLICT(url) DO UPDATE SET
+                first_seen = MIN(first_seen, excluded.first_seen),
+                content_hash = CASE WHEN excluded.updated >= updated
+                                    THEN COALESCE(excluded.content_hash, content_hash)
+                                    ELSE COALESCE(content_hash, excluded.content_hash) END,
+                status = CASE WHEN excluded.updated >= updated THEN excluded.status ELSE status END,
+                updated = MAX(updated, excluded.updated),
+                dirty = MAX(dirty, excluded.dirty),
+                seq = excluded.seq
+            """, [dict(row, dirty=dirty) for row in rows])
+
+    def sync_down(self, legacy_blob: str = None):
+        """
+        Downloads and applies the segments of the site that were not applied locally yet.
+
+        When the site has no segments at all, the URLs of the old `legacy_blob` (the shared `all_urls.txt`)
+        are imported once as 'legacy' records and uploaded as the first segment.
+
+        :param legacy_blob: Name of the flat URL list the ledger replaces.
+        """
+        if self.container_client is None:
+            return
+        try:
+            names = sorted(blob.name for blob in self.container_client.list_blobs(name_starts_with=self.prefix))
+        except Exception as e:
+            self._log(f"Error while listing ledger segments of {self.site_name}: {str(e)}", error=True)
+            return
+
+        if not names and legacy_blob:
+            self.import_legacy(legacy_blob)
+            return
+
+        with self._lock:
+            applied = {row[0] for row in self.connection.execute("SELECT name FROM segments")}
+        new_names = [name for name in names if name not in applied]
+        for name in new_names:
+            try:
+                data = self.container_client.get_blob_client(name).download_blob().readall()
+            except Exception as e:
+                # Segments disappear when another job compacts them; its snapshot is picked up next time
+                self._log(f"Error while downloading ledger segment {name}: {str(e)}", error=True)
+                continue
+            rows = [json.loads(line) for line in gzip.decompress(data).decode('utf-8').splitlines() if line]
+            with self._lock:
+                self._merge(rows, dirty=0)
+                self.connection.execute("INSERT OR IGNORE INTO segments (name) VALUES (?)", (name,))
+                self.connection.commit()
+        self._log(f"Applied {len(new_names)} new ledger segments of {self.site_name} "
+                  f"({len(names) - len(new_names)} already applied).")
+
+    def import_legacy(self, legacy_blob: str):
+        """
+        Imports the flat URL list used before the ledger existed.
+
+        :param legacy_blob: Name of the blob holding one URL per line.
+        """
+        try:
+            data = self.container_client.get_blob_client(legacy_blob).download_blob().readall()
+        except Exception as e:
+            self._log(f"No legacy URL list imported for {self.site_name}: {str(e)}")
+            return
+        urls = {line.strip() for line in data.decode('utf-8').splitlines() if line.strip()}
+        # The legacy list is shared by every site and cannot be split reliably, so all of it is imported
+        self.record(urls, 'legacy')
+        self._log(f"Imported {len(urls)} legacy URLs from {legacy_blob} into the {self.site_name} ledger.")
+        self.sync_up()
+
+    def sync_up(self) -> Optional[str]:
+        """
+        Uploads the records changed since the last sync as a new segment.
+
+        :return: The name of the uploaded segment, or None if there was nothing to upload.
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT url, first_seen, content_hash, status, updated FROM urls WHERE dirty = 1").fetchall()
+        if not rows or self.container_client is None:
+            return None
+
+        name = self._segment_name()
+        if not self._upload_segment(name, rows):
+            return None
+        with self._lock:
+            # Records changed again during the upload stay dirty for the next segment
+            self.connection.executemany("UPDATE urls SET dirty = 0 WHERE url = ? AND updated = ?",
+                                        [(row[0], row[4]) for row in rows])
+            self.connection.execute("INSERT OR IGNORE INTO segments (name) VALUES (?)", (name,))
+            self.connection.commit()
+        self._log(f"Uploaded {len(rows)} ledger records of {self.site_name} as {name}.")
+        return name
+
+    def compact(self, max_segments: int = 50):
+        """
+        Replaces the segments of the site with a single snapshot once there are more than `max_segments`.
+
+        Only segments that were applied locally are deleted, so segments uploaded meanwhile by other jobs
+        survive. Call it right after `sync_down`.
+
+        :param max_segments: Number of segments tolerated before compacting.
+        """
+        if self.container_client is None:
+            return
+        try:
+            names = [blob.name for blob in self.container_client.list_blobs(name_starts_with=self.prefix)]
+        except Exception as e:
+            self._log(f"Error while listing ledger segments of {self.site_name}: {str(e)}", error=True)
+            return
+        if len(names) <= max_segments:
+            return
+
+        with self._lock:
+            applied = {row[0] for row in self.connection.execute("SELECT name FROM segments")}
+            rows = self.connection.execute(
+                "SELECT url, first_seen, content_hash, status, updated FROM urls").fetchall()
+        name = self._segment_name()
+        if not self._upload_segment(name, rows):
+            return
+
+        merged = [old_name for old_name in names if old_name in applied]
+        with self._lock:
+            # The snapshot carries pending changes too
+            self.connection.executemany("UPDATE urls SET dirty = 0 WHERE url = ? AND updated = ?",
+                                        [(row[0], row[4]) for row in rows])
+            self.connection.execute("INSERT OR IGNORE INTO segments (name) VALUES (?)", (name,))
+            self.connection.executemany("DELETE FROM segments WHERE name = ?", [(old,) for old in merged])
+            self.connection.commit()
+
+        for old_name in merged:
+            try:
+                self.container_client.delete_blob(old_name)
+            except Exception as e:
+                self._log(f"Error while deleting ledger segment {old_name}: {str(e)}", error=True)
+        self._log(f"Compacted {len(merged)} ledger segments of {self.site_name} into {name}.")
+
+    def _segment_name(self) -> str:
+        # Names sort by creation time; the random suffix keeps concurrent jobs apart
+        return f"{self.prefix}{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.jsonl.gz"
+
+    def _upload_segment(self, name: str, rows) -> bool:
+        lines = (json.dumps(dict(zip(('url', 'first_seen', 'content_hash', 'status', 'updated'), row)),
+                            ensure_ascii=False) for row in rows)
+        data = gzip.compress('\n'.join(lines).encode('utf-8'))
+        try:
+            self.container_client.upload_blob(name, data, overwrite=False, timeout=300)
+            return True
+        except Exception as e:
+            self._log(f"Error while uploading ledger segment {name}: {str(e)}", error=True)
+            return False
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        with self._lock:
+            if self.index:
+                self.index.close()
+                self.index = None
+            self.connection.close()
@@ -1,7 +1,11 @@
+import json
 import zlib
 import zipfile
 import os
 import shutil
+from pathlib import Path
+
+from src.utils.documentStore import file_sha256
 
 def copy_raw_data(source_dir, dest_dir):
     if not os.path.exists(dest_dir):
@@ -61,14 +65,55 @@ def zip_files_with_same_names(source_dir, dest_dir):
 
     return filenames, destination_path_list
 
-def compress(file_names, path_to_write, zip_name):
+def drop_duplicate_documents(file_names, zip_path, zipped_documents):
+    """
+    Leaves out the PDF of a document whose content is already in another zip of this run, or was delivered
+    in an earlier run (`duplicate_of` in its metadata), so that every unique document is uploaded once.
+
+    Returns the files to zip and a reference to the earlier copy of the left out PDF (or None). Zips are
+    referred to by their blob name, `<site>/<keyword>/<name>.zip`.
+    """
+    metadata = {}
+    for file_name in file_names:
+        if os.path.basename(file_name).startswith('metadata_'):
+            try:
+                with open(file_name, 'r', encoding='utf-8') as metadata_file:
+                    metadata = json.load(metadata_file)
+            except (OSError, ValueError):
+                pass
+
+    kept, reference = [], None
+    for file_name in file_names:
+        if file_name.endswith('.pdf'):
+            try:
+                content_hash = metadata.get('content_hash') or file_sha256(file_name)
+            except OSError:
+                content_hash = None
+            earlier = metadata.get('duplicate_of') or zipped_documents.get(content_hash)
+            if content_hash and earlier:
+                reference = {'content_hash': content_hash, 'duplicate_of': earlier}
+                print(f"Skipping {file_name}: same content as {earlier}.")
+                continue
+            if content_hash:
+                zipped_documents[content_hash] = '/'.join(Path(zip_path).parts[-3:])
+        kept.append(file_name)
+    return kept, reference
+
+def compress(file_names, path_to_write, zip_name, zipped_documents=None):
     compression = zipfile.ZIP_DEFLATED
 
+    reference = None
+    if zipped_documents is not None:
+        file_names, reference = drop_duplicate_documents(file_names, os.path.join(path_to_write, zip_name),
+                                                         zipped_documents)
+
     try:
         zf = zipfile.ZipFile(os.path.join(path_to_write, zip_name), mode="w")
         try:
             for file_name in file_names:
                 zf.write(file_name, file_name.split('/')[-1], compress_type=compression)
+            if reference:
+                zf.writestr(os.path.splitext(zip_name)[0] + '.document.json', json.dumps(reference))
         except FileNotFoundError:
             print(f"File not found: {file_name}. Skipping.")
         except Exception as e:
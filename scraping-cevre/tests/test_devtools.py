@@ -0,0 +1,41 @@
+import json
+
+from src.utils.devtools import NetworkLog
+
+
+class Driver:
+    """Hands out queued performance log entries, like ChromeDriver does."""
+
+    def __init__(self):
+        self.current_window_handle = 'main'
+        self.entries = []
+
+    def log(self, tab, method, request_id):
+        message = {'message': {'method': method, 'params': {'requestId': request_id}}, 'webview': tab}
+        self.entries.append({'message': json.dumps(message)})
+
+    def get_log(self, kind):
+        entries, self.entries = self.entries, []
+        return entries
+
+
+def test_requests_of_a_background_tab_do_not_keep_the_current_tab_busy():
+    driver = Driver()
+    network = NetworkLog(driver)
+    driver.log('main', 'Network.requestWillBeSent', '1')
+    driver.log('prefetch', 'Network.requestWillBeSent', '2')
+    assert network.idle_for() == 0.0
+
+    driver.log('main', 'Network.loadingFinished', '1')
+    assert network.idle_for() > 0.0
+    assert network.idle_for('prefetch') == 0.0
+
+
+def test_a_closed_tab_is_forgotten():
+    driver = Driver()
+    network = NetworkLog(driver)
+    driver.log('prefetch', 'Network.requestWillBeSent', '1')
+    network.poll()
+    network.forget('CDwindow-prefetch')
+    assert network.in_flight == {}
+    assert network.idle_for('prefetch') > 0.0
@@ -0,0 +1,39 @@
+import pytest
+
+from src.utils.fingerprints import FingerprintSet, fingerprint
+
+URLS = [f"https://echa.europa.eu/documents/10162/{number:08x}.pdf" for number in range(500)]
+OTHERS = [f"https://eur-lex.europa.eu/legal-content/EN/TXT/PDF/?uri=CELEX:3{number:09d}" for number in range(500)]
+
+
+@pytest.mark.parametrize('bloom_bits_per_url', [0, 10])
+def test_membership(tmp_path, bloom_bits_per_url):
+    path = str(tmp_path / 'urls.fp')
+    # Duplicates are stored once
+    FingerprintSet.build(path, URLS + URLS[:10], generation=7, bloom_bits_per_url=bloom_bits_per_url)
+    urls = FingerprintSet(path)
+    try:
+        assert len(urls) == len(URLS)
+        assert urls.generation == 7
+        assert (urls.bloom_bits > 0) == bool(bloom_bits_per_url)
+        assert all(url in urls for url in URLS)
+        assert not any(url in urls for url in OTHERS)
+        assert urls.contains_fingerprint(fingerprint(URLS[0]))
+    finally:
+        urls.close()
+
+
+def test_empty_set(tmp_path):
+    path = str(tmp_path / 'urls.fp')
+    FingerprintSet.build(path, [], bloom_bits_per_url=10)
+    urls = FingerprintSet(path)
+    assert len(urls) == 0
+    assert URLS[0] not in urls
+    urls.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'urls.fp'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        FingerprintSet(str(path))
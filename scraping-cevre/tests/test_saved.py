@@ -0,0 +1,25 @@
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+import pytest
+
+import src.saved as saved
+from config import setup_shared_logger
+
+
+@pytest.mark.parametrize('sessions', [0, -1])
+def test_runner_rejects_sessions_below_one(sessions):
+    with pytest.raises(ValueError):
+        saved.ScriptRunner(workers=2, max_sessions_per_site=sessions)
+
+
+def test_run_job_closes_the_log_stream_of_its_job(tmp_path, monkeypatch):
+    logger = setup_shared_logger('site_log', log_root=str(tmp_path / 'logs'))
+    scraper = SimpleNamespace(logger=logger, start=lambda: None)
+    # No browser: the worker's pool hands out no driver and the scraper is a stand-in
+    monkeypatch.setattr(saved, '_worker_pool', SimpleNamespace(driver=lambda strategy: nullcontext()))
+    monkeypatch.setattr(saved, 'create_scraper', lambda *args, **kwargs: scraper)
+
+    job = (0, 'echaWebScraping.py', 'https://example.org', 'keyword', 1)
+    assert saved.run_job(job, str(tmp_path), None, None, {}) == (job, None)
+    assert logger.handlers == []
@@ -0,0 +1,91 @@
+"""
+Compares the URL membership structures: the plain `set` of URL strings the scrapers used to keep, the
+memory-mapped `FingerprintSet` with and without its Bloom filter, and plain SQLite lookups in the ledger.
+
+Run from the project folder:
+
+    python -m benchmarks.membership_benchmark --urls 500000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from src.utils.fingerprints import FingerprintSet
+from src.utils.urlLedger import UrlLedger
+
+
+def make_urls(count, seed):
+    """
+    Generates URLs shaped like the long EUR-Lex and ECHA result links.
+    """
+    rng = random.Random(seed)
+    urls = []
+    for i in range(count):
+        if i % 2:
+            urls.append(f"https://eur-lex.europa.eu/legal-content/EN/TXT/PDF/?uri=CELEX:3{rng.randint(1990, 2024)}"
+                        f"R{rng.randint(0, 99999):05d}&qid={rng.getrandbits(40)}&from=EN")
+        else:
+            urls.append(f"https://echa.europa.eu/documents/10162/{rng.getrandbits(32):08x}-{rng.getrandbits(16):04x}"
+                        f"-{rng.getrandbits(16):04x}-{rng.getrandbits(48):012x}/{rng.getrandbits(20)}.pdf")
+    return urls
+
+
+def time_lookups(structure, urls):
+    start = time.perf_counter()
+    found = sum(1 for url in urls if url in structure)
+    return (time.perf_counter() - start) / len(urls) * 1e6, found
+
+
+def report(name, build_seconds, size_bytes, structure, hits, misses):
+    hit_us, hit_found = time_lookups(structure, hits)
+    miss_us, miss_found = time_lookups(structure, misses)
+    print(f"{name:<26} build {build_seconds:7.2f} s  size {size_bytes / 2 ** 20:8.1f} MiB  "
+          f"hit {hit_us:6.2f} us ({hit_found}/{len(hits)})  "
+          f"miss {miss_us:6.2f} us ({miss_found} false positives)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark URL membership structures.')
+    parser.add_argument('--urls', type=int, default=200000, help='Number of URLs in the history.')
+    parser.add_argument('--lookups', type=int, default=50000, help='Number of hit and of miss lookups.')
+    args = parser.parse_args()
+
+    history = make_urls(args.urls, seed=1)
+    hits = random.Random(2).sample(history, min(args.lookups, len(history)))
+    misses = make_urls(args.lookups, seed=3)
+    print(f"{args.urls} URLs, average length {sum(map(len, history)) / len(history):.0f} characters")
+
+    # The strings are copied so that the measured set owns its URLs, as in a scraper process
+    tracemalloc.start()
+    start = time.perf_counter()
+    url_set = {''.join(url) for url in history}
+    build_seconds = time.perf_counter() - start
+    size_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    report('set of strings', build_seconds, size_bytes, url_set, hits, misses)
+    del url_set
+
+    with tempfile.TemporaryDirectory() as folder:
+        for name, bloom_bits in (('fingerprints', 0), ('fingerprints + bloom', 10)):
+            path = os.path.join(folder, f"{bloom_bits}.fp")
+            start = time.perf_counter()
+            FingerprintSet.build(path, history, bloom_bits_per_url=bloom_bits)
+            build_seconds = time.perf_counter() - start
+            fingerprints = FingerprintSet(path)
+            report(name, build_seconds, os.path.getsize(path), fingerprints, hits, misses)
+            fingerprints.close()
+
+        path = os.path.join(folder, 'ledger.sqlite')
+        ledger = UrlLedger(path, 'benchmark')
+        start = time.perf_counter()
+        ledger.record(history, 'done')
+        build_seconds = time.perf_counter() - start
+        report('sqlite ledger', build_seconds, os.path.getsize(path), ledger, hits, misses)
+        ledger.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,7 @@ from azure.storage.blob import BlobServiceClient
 
 from dotenv import load_dotenv
 
+import argparse
 import os
 
 def check_for_zip_files(main_folder):
@@ -34,10 +35,121 @@ ACCOUNT_URL = os.getenv("account_url")
 # Account Key
 ACCOUNT_KEY = os.getenv("account_key")
 
+def parse_engines(value):
+    """
+    Parses the --detail-fetch-engine value: one engine for every site ('http'), or engines per site name
+    ('ECHA=selenium,eur_lex=http').
+    """
+    engines = {}
+    for part in value.split(','):
+        if part.strip():
+            site, _, engine = part.rpartition('=')
+            engines[site.strip() or '*'] = engine.strip()
+    return engines
+
+def parse_delays(value):
+    """
+    Parses the --politeness-delay value: seconds for every site ('1.5'), or per site name
+    ('bundesanzeiger=2,*=0.5').
+    """
+    return {site: float(delay) for site, delay in parse_engines(value).items()}
+
+def positive_int(value):
+    """
+    Parses a count that must be at least 1, such as --max-sessions-per-site.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Run the scraping bots listed in scripts.txt.')
+    parser.add_argument('--workers', type=int, default=int(os.getenv("scraper_workers", 1)),
+                        help='Number of worker processes, each with its own headless Chrome (1 = sequential).')
+    parser.add_argument('--max-sessions-per-site', type=positive_int,
+                        default=os.getenv("max_sessions_per_site", "1"),
+                        help='Maximum number of concurrent jobs against the same site.')
+    parser.add_argument('--max-jobs-per-driver', type=int, default=int(os.getenv("max_jobs_per_driver", 20)),
+                        help='Number of keywords a warm browser serves before it is recycled.')
+    parser.add_argument('--pipeline-workers', type=int, default=int(os.getenv("pipeline_workers", 0)),
+                        help='Download threads consuming results while pagination continues (0 = phased).')
+    parser.add_argument('--pipeline-queue-size', type=int, default=int(os.getenv("pipeline_queue_size", 100)),
+                        help='Maximum number of discovered results waiting for a download thread.')
+    parser.add_argument('--resume', action='store_true',
+                        default=os.getenv("scraper_resume", "").lower() in ("1", "true", "yes"),
+                        help='Continue every keyword from its last checkpoint instead of starting from scratch.')
+    parser.add_argument('--http-timeout', type=float, default=float(os.getenv("http_timeout", 60)),
+                        help='Read timeout in seconds of document downloads.')
+    parser.add_argument('--http-retries', type=int, default=int(os.getenv("http_retries", 4)),
+                        help='Retries of a download after a connection error, 429 or 5xx answer.')
+    parser.add_argument('--download-concurrency', type=int, default=int(os.getenv("download_concurrency", 16)),
+                        help='Documents of a keyword downloaded at the same time. 1 downloads them one by one.')
+    parser.add_argument('--per-host-concurrency', type=int, default=int(os.getenv("per_host_concurrency", 4)),
+                        help='Concurrent downloads allowed against one host.')
+    parser.add_argument('--no-http2', action='store_true',
+                        default=os.getenv("disable_http2", "").lower() in ("1", "true", "yes"),
+                        help='Download over HTTP/1.1 only.')
+    parser.add_argument('--spill-captured-html', action='store_true',
+                        default=os.getenv("spill_captured_html", "").lower() in ("1", "true", "yes"),
+                        help='Keep detail pages rendered during discovery compressed on disk instead of in memory.')
+    parser.add_argument('--detail-fetch-engine', type=parse_engines, default=os.getenv("detail_fetch_engine", ""),
+                        help="How detail pages are loaded: 'http' (Selenium only when the content is missing) or "
+                             "'selenium', for every site or per site, e.g. 'ECHA=selenium,eur_lex=http'. "
+                             "Defaults to the engine each bot declares.")
+    parser.add_argument('--politeness-delay', type=parse_delays, default=os.getenv("politeness_delay", ""),
+                        help="Minimum seconds between two page loads of the browser or detail page fetches, for "
+                             "every site or per site, e.g. 'bundesanzeiger=2'. Defaults to the delay each bot "
+                             "declares. Page waits are condition driven; this is only a rate limit.")
+    parser.add_argument('--no-resource-blocking', action='store_true',
+                        default=os.getenv("disable_resource_blocking", "").lower() in ("1", "true", "yes"),
+                        help='Let the browser load images, fonts, media and analytics, with normal page loads '
+                             'on every site.')
+    parser.add_argument('--capture-pdfs', action='store_true',
+                        default=os.getenv("capture_pdfs", "").lower() in ("1", "true", "yes"),
+                        help='Keep PDFs the browser loads during discovery instead of downloading them again, and '
+                             'load PDFs the HTTP client fails on through the browser with its cookies.')
+    parser.add_argument('--no-session-bridge', action='store_true',
+                        default=os.getenv("disable_session_bridge", "").lower() in ("1", "true", "yes"),
+                        help="Keep the browser's cookies and User-Agent out of the HTTP downloads.")
+    parser.add_argument('--no-direct-search', action='store_true',
+                        default=os.getenv("disable_direct_search", "").lower() in ("1", "true", "yes"),
+                        help='Search through the search form of every site instead of opening the search '
+                             'results URL directly.')
+    parser.add_argument('--page-tabs', type=int, default=int(os.getenv("page_tabs", 4)),
+                        help='Result pages loaded at the same time in browser tabs on sites whose result pages '
+                             'have URLs (0 = click through the pages).')
+    parser.add_argument('--no-prefetch', action='store_true',
+                        default=os.getenv("disable_prefetch", "").lower() in ("1", "true", "yes"),
+                        help="Turn result pages with the 'Next' button after processing them instead of loading "
+                             "the next page in a second tab meanwhile.")
+    return parser.parse_args()
+
 if __name__ == '__main__':
+    args = parse_args()
     scripts_file_path = 'scripts.txt'
 
-    runner = ScriptRunner()
+    runner = ScriptRunner(workers=args.workers, max_sessions_per_site=args.max_sessions_per_site,
+                          max_jobs_per_driver=args.max_jobs_per_driver,
+                          scraper_options={
+                              'pipeline_workers': args.pipeline_workers,
+                              'pipeline_queue_size': args.pipeline_queue_size,
+                              'resume': args.resume,
+                              'http_timeout': args.http_timeout,
+                              'http_retries': args.http_retries,
+                              'download_concurrency': args.download_concurrency,
+                              'per_host_concurrency': args.per_host_concurrency,
+                              'http2': not args.no_http2,
+                              'spill_captured_html': args.spill_captured_html,
+                              'detail_fetch_engines': args.detail_fetch_engine,
+                              'politeness_delays': args.politeness_delay,
+                              'block_resources': not args.no_resource_blocking,
+                              'capture_pdfs': args.capture_pdfs,
+                              'share_browser_session': not args.no_session_bridge,
+                              'direct_search': not args.no_direct_search,
+                              'page_tabs': args.page_tabs,
+                              'prefetch_pages': not args.no_prefetch,
+                          })
     scripts = runner.read_scripts_from_file(scripts_file_path)
     runner.run_scripts(scripts)
 
@@ -46,8 +158,10 @@ if __name__ == '__main__':
     files_, destination = zip_files_with_same_names(source_directory, destination_directory)
 
     index = 0
+    # content hash -> the zip that carries the document
+    zipped_documents = {}
     for item, values in files_.items():
-        compress(values, destination[index], item + '.zip')
+        compress(values, destination[index], item + '.zip', zipped_documents)
         index += 1
 
     os.chdir(ROOT_DIR)
@@ -13,6 +13,8 @@ import json
 import logging
 from config import setup_shared_logger
 from src.utils.baseScrapper import BaseScraper
+from src.utils.devtools import BrowserProfile
+from src.utils.domExtract import Field
 
 class Enhesa(BaseScraper):
     """
@@ -20,6 +22,19 @@ class Enhesa(BaseScraper):
     cookies. This scraper is derived from a base scraper class and customized for the Enhesa website.
     """
 
+    # The search result rows with their title and link
+    result_row_selector = "//div[@class='row pb-4']"
+    result_fields = {
+        'name': Field('.//h3', 'text'),
+        'url': Field('.//a', 'href'),
+    }
+
+    # Every step waits for its elements, so navigations need not wait for the load event
+    browser_profile = BrowserProfile(eager=True)
+
+    # The WordPress search results page
+    search_url_template = '/?s={query}'
+
     def search_for_keyword(self, keyword):
         """
         Searches for the given keyword on the specific website using the search bar.
@@ -35,8 +50,10 @@ class Enhesa(BaseScraper):
             search_box.clear()  # Clear any existing content in the search bar
             search_box.send_keys(keyword)  # Enter the keyword
 
-            # Simulate pressing the Enter key
+            # Simulate pressing the Enter key and wait for the results page
+            page = self.driver.find_element(By.TAG_NAME, 'html')
             search_box.send_keys(Keys.RETURN)
+            self.waits.page_turned(page)
 
             self.logger.info(f"Keyword '{keyword}' is searched using Enter key.")
         except Exception as e:
@@ -56,14 +73,17 @@ class Enhesa(BaseScraper):
             Tuple[List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]:
             A tuple containing two lists: one for PDF URLs and another for non-PDF URLs.
         """
-        pdf_urls = []
-        non_pdf_urls = []
+        pdf_urls, non_pdf_urls = self.result_lists()
         matching_links = []
 
-        # Open the base URL
-        self.driver.get(self.base_url)
-        self.accept_cookies()  # Accept cookies if the banner appears
-        self.search_for_keyword(keyword)
+        # Open the search results directly, or the base URL and its search bar if that fails
+        if self.open_search_results(keyword):
+            self.accept_cookies()  # Accept cookies if the banner appears
+        else:
+            self.politeness.wait()
+            self.driver.get(self.base_url)
+            self.accept_cookies()
+            self.search_for_keyword(keyword)
 
         page_number = 1
         if limited_page == 0:
@@ -71,16 +91,13 @@ class Enhesa(BaseScraper):
 
         while page_number <= limited_page:
             self.logger.info(f"Processing page {page_number}")
+            self.record_page(page_number)
 
             try:
-                # Find the rows containing search result elements
-                row_elements = self.driver.find_elements(By.XPATH,
-                                                         "//div[@class='row pb-4']")
-
-                for row_index in range(len(row_elements) - 1):
-                    row_elements = self.driver.find_elements(By.XPATH,
-                                                             "//div[@class='row pb-4']")
-                    current_row = row_elements[row_index]
+                # Read the title and link of every result row with a single execute_script call
+                rows = self.extract_result_rows()
+
+                for current_row in rows[:-1]:
                     name = self.extract_name_from_row(current_row)
                     date = self.extract_date_from_row()
                     url, description = self.extract_url_from_row(current_row)
@@ -109,7 +126,10 @@ class Enhesa(BaseScraper):
                     next_button = self.driver.find_elements(By.XPATH,
                                                             "//a[@class='next page-numbers']")
                     if next_button and next_button[0].get_attribute('href'):
+                        page = self.driver.find_element(By.TAG_NAME, 'html')
+                        self.politeness.wait()
                         next_button[0].click()  # Click the "Next" button to load more results
+                        self.waits.page_turned(page)
                         page_number += 1
                     else:
                         self.logger.info("Reached the last page. No href attribute found for the 'Next' button.")
@@ -135,24 +155,21 @@ class Enhesa(BaseScraper):
             )
             cookie_button.click()  # Click the cookie consent button
             self.logger.info("Cookies accepted.")
+            self.sync_browser_session(force=True)  # Downloads carry the consent cookie too
         except Exception as e:
             self.logger.info(f"No cookies banner found or error in clicking: {e}")
 
     def extract_name_from_row(self, row):
         """
-        Extracts the document name from a row element.
+        Extracts the document name from a row.
 
         Args:
-            row: The WebElement representing a row in the search results.
+            row (dict): The row values read by `extract_result_rows`.
 
         Returns:
             str: The name of the document.
         """
-        try:
-            name = row.find_element(By.XPATH, ".//h3").text
-            return name.strip()
-        except:
-            return ""
+        return (row['name'] or "").strip()
 
     def extract_date_from_row(self):
         """
@@ -169,22 +186,28 @@ class Enhesa(BaseScraper):
         Extracts the URL and description from a row element by navigating to the page and scraping the description.
 
         Args:
-            row: The WebElement representing a row in the search results.
+            row (dict): The row values read by `extract_result_rows`.
 
         Returns:
             Tuple[str, str]: A tuple containing the URL and the description from the page.
         """
         try:
-            # Extract the href attribute from the 'a' tag
-            url_element = row.find_element(By.XPATH, ".//a")
-            url = url_element.get_attribute("href")
+            if not row['url']:
+                return "", ""
+            url = self.canonicalize(row['url'])
+
+            # Skip already processed results without leaving the search results page
+            if self.is_known_url(url):
+                return "", ""
 
             # Navigate to the URL to extract the description
+            self.politeness.wait()
             self.driver.get(url)
             description = self.extract_description_from_page()
 
             # Navigate back to the search results page
             self.driver.back()
+            self.waits.elements((By.XPATH, self.result_row_selector))
 
             return url, description
         except Exception as e:
@@ -199,13 +222,13 @@ class Enhesa(BaseScraper):
             str: The combined text from all sections on the page.
         """
         try:
-            # Find all sections with the 'b-editor' class
-            section_elements = self.driver.find_elements(By.XPATH, "//section[contains(@class, 'b-editor')]")
+            # Read the text of all sections with the 'b-editor' class in one call
+            sections = self.extract_result_rows("//section[contains(@class, 'b-editor')]", {'text': Field()})
 
             # Collect all text from the sections into a list
             all_text = []
-            for section in section_elements:
-                text = section.text.strip()  # Extract and clean the text from the section
+            for section in sections:
+                text = section['text'].strip()  # Extract and clean the text from the section
                 if text:  # Only add non-empty text
                     all_text.append(text)
 
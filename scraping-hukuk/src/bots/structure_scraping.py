@@ -5,7 +5,6 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-import time
 from typing import List, Tuple
 from bs4 import BeautifulSoup
 import json
@@ -28,8 +27,10 @@ class Structure(BaseScraper):
         )
         search_box.clear()
         search_box.send_keys(keyword)
+        page = self.driver.find_element(By.TAG_NAME, 'html')
         search_box.send_keys(Keys.RETURN)
-        time.sleep(10)
+        # Wait on a condition instead of sleeping, see `waits.PageWaits`
+        self.waits.page_turned(page)
 
     def get_urls(self, keyword: str, limited_page: int) -> Tuple[
         List[Tuple[str, str, str, str]], List[Tuple[str, str, str, str]]]:
@@ -49,12 +50,14 @@ class Structure(BaseScraper):
                 - name (str): The name or title of the document.
                 - description_text (str): A brief description or summary of the document.
         """
-        pdf_urls = []
-        non_pdf_urls = []
+        pdf_urls, non_pdf_urls = self.result_lists()
 
-        self.driver.get(self.base_url)
+        # Declare `search_url_template` where the search results have a URL form
+        if not self.open_search_results(keyword):
+            self.politeness.wait()
+            self.driver.get(self.base_url)
 
-        self.search_for_keyword(keyword)
+            self.search_for_keyword(keyword)
         # Site-specific URL retrieval logic goes here.
 
         # Example of how to append to the lists:
@@ -0,0 +1,171 @@
+import hashlib
+import os
+import shutil
+import uuid
+from typing import Iterable, Tuple
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Hashes a file without reading it into memory at once.
+
+    :param path: Path of the file.
+    :param chunk_size: Number of bytes read per step.
+    :return: The hex SHA-256 of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_or_copy(source: str, destination: str):
+    """
+    Hard-links `source` to `destination`, copying it when the file system does not support links.
+    An existing destination is replaced.
+
+    :param source: The existing file.
+    :param destination: The path of the new entry.
+    """
+    if os.path.lexists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+class DocumentStore:
+    """
+    A content-addressed store for downloaded documents: every distinct content is kept once, as
+    `<root>/<first two hex digits>/<sha256><extension>`.
+
+    The per-keyword `pdf/<name>.pdf` entries are hard links to the stored object, so the same bytes fetched
+    under another keyword, name or site take no extra disk space, and the zip step can recognise them.
+    """
+
+    def __init__(self, root: str):
+        """
+        :param root: The directory holding the objects.
+        """
+        self.root = root
+
+    def object_path(self, content_hash: str, extension: str = '.pdf') -> str:
+        """
+        :param content_hash: The hex SHA-256 of the content.
+        :param extension: The file extension of the object.
+        :return: The path of the object with that hash.
+        """
+        return os.path.join(self.root, content_hash[:2], f"{content_hash}{extension}")
+
+    def put(self, content: bytes, extension: str = '.pdf') -> str:
+        """
+        Stores the content unless an object with the same hash exists already.
+
+        :param content: The document bytes.
+        :param extension: The file extension of the object.
+        :return: The hex SHA-256 of the content.
+        """
+        return self.put_stream([content], extension)[0]
+
+    def put_stream(self, chunks: Iterable[bytes], extension: str = '.pdf') -> Tuple[str, int]:
+        """
+        Stores content arriving in chunks, e.g. `response.iter_content()` of a streamed download.
+
+        Only one chunk is held in memory at a time, and a failed download leaves no partial object behind.
+
+        :param chunks: The content in order.
+        :param extension: The file extension of the object.
+        :return: The hex SHA-256 of the content and its size in bytes.
+        """
+        writer = self.open_writer(extension)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit(), writer.size
+
+    def open_writer(self, extension: str = '.pdf') -> 'DocumentWriter':
+        """
+        Starts storing a document whose content is written piece by piece, for producers that push chunks
+        instead of yielding them, like the async download engine.
+
+        :param extension: The file extension of the object.
+        :return: The writer; call `commit` when the content is complete or `abort` on failure.
+        """
+        temp_folder = os.path.join(self.root, 'tmp')
+        os.makedirs(temp_folder, exist_ok=True)
+        return DocumentWriter(self, os.path.join(temp_folder, f"{uuid.uuid4().hex}.tmp"), extension)
+
+    def link(self, content_hash: str, destination: str, extension: str = '.pdf'):
+        """
+        Creates a per-keyword entry that refers to a stored object.
+
+        :param content_hash: The hex SHA-256 of the stored content.
+        :param destination: The path of the entry, e.g. `raw/<site>/<keyword>/pdf/<name>.pdf`.
+        :param extension: The file extension of the object.
+        """
+        os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+        link_or_copy(self.object_path(content_hash, extension), destination)
+
+
+class DocumentWriter:
+    """
+    A document being written to a temp file inside the store and hashed on the way.
+
+    `commit` renames the file to its object path, or drops it when that object exists already.
+    """
+
+    def __init__(self, store: DocumentStore, temp_path: str, extension: str):
+        """
+        :param store: The store the document belongs to.
+        :param temp_path: The temp file, on the same file system as the objects so the rename is atomic.
+        :param extension: The file extension of the object.
+        """
+        self.store = store
+        self.temp_path = temp_path
+        self.extension = extension
+        self.size = 0
+        self._digest = hashlib.sha256()
+        # Parallel jobs may store the same document at once; every download gets its own temp file
+        self._file = open(temp_path, 'wb')
+
+    def write(self, chunk: bytes):
+        """
+        :param chunk: The next piece of the content.
+        """
+        if chunk:
+            self._digest.update(chunk)
+            self._file.write(chunk)
+            self.size += len(chunk)
+
+    def commit(self) -> str:
+        """
+        Moves the complete content into the store.
+
+        :return: The hex SHA-256 of the content.
+        """
+        self._file.close()
+        content_hash = self._digest.hexdigest()
+        path = self.store.object_path(content_hash, self.extension)
+        try:
+            if os.path.exists(path):
+                os.remove(self.temp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(self.temp_path, path)
+        except BaseException:
+            self.abort()
+            raise
+        return content_hash
+
+    def abort(self):
+        """
+        Discards the partial content.
+        """
+        self._file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
@@ -0,0 +1,95 @@
+import re
+from typing import Dict, List, NamedTuple, Tuple
+
+from selenium.webdriver.common.by import By
+
+
+class Field(NamedTuple):
+    """
+    A value read from every result row.
+
+    `selector` is relative to the row: an XPath when it is '.' or starts with './', '..', '/' or '(', a CSS
+    selector otherwise, so class selectors like '.date' stay CSS; the row itself when empty. `attribute` is
+    'text' for the rendered text (what `WebElement.text` returns) or the name of a property or attribute,
+    e.g. 'href' for the absolute link. With `many` the values of every matching element are returned as a
+    list, otherwise the value of the first one, or None.
+    """
+    selector: str = ''
+    attribute: str = 'text'
+    many: bool = False
+
+
+# The selectors read as XPath; kept in step with `findAll` in EXTRACT_ROWS_SCRIPT
+_XPATH = re.compile(r'^(\.$|\./|\.\.|/|\()')
+
+
+def is_xpath(selector: str) -> bool:
+    """
+    :param selector: A selector as in `Field`.
+    :return: True if it is read as an XPath, False for a CSS selector.
+    """
+    return bool(_XPATH.match(selector))
+
+
+# Runs in the page: finds the rows and reads every field of every row, so a page costs one round trip to
+# the driver instead of one per element and attribute
+EXTRACT_ROWS_SCRIPT = """
+const [rowSelector, fields] = arguments;
+
+function findAll(root, selector) {
+    if (!selector) {
+        return [root];
+    }
+    if (/^(\\.$|\\.\\/|\\.\\.|\\/|\\()/.test(selector)) {
+        const snapshot = document.evaluate(selector, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const nodes = [];
+        for (let i = 0; i < snapshot.snapshotLength; i++) {
+            nodes.push(snapshot.snapshotItem(i));
+        }
+        return nodes;
+    }
+    return Array.from(root.querySelectorAll(selector));
+}
+
+function read(node, attribute) {
+    if (attribute === 'text') {
+        return node.innerText !== undefined ? node.innerText : node.textContent;
+    }
+    const value = attribute === 'class' ? undefined : node[attribute];
+    if (value !== undefined && value !== null && typeof value !== 'object' && typeof value !== 'function') {
+        return String(value);
+    }
+    return node.getAttribute(attribute);
+}
+
+return findAll(document, rowSelector).map(row => {
+    const values = {};
+    for (const [name, [selector, attribute, many]] of Object.entries(fields)) {
+        const nodes = findAll(row, selector);
+        values[name] = many ? nodes.map(node => read(node, attribute))
+                            : (nodes.length ? read(nodes[0], attribute) : null);
+    }
+    return values;
+});
+"""
+
+
+def locator(selector: str) -> Tuple[str, str]:
+    """
+    :param selector: An XPath or a CSS selector, told apart as in `Field`.
+    :return: The `(By, selector)` pair for Selenium's find and wait calls.
+    """
+    return (By.XPATH, selector) if is_xpath(selector) else (By.CSS_SELECTOR, selector)
+
+
+def extract_rows(driver, row_selector: str, fields: Dict[str, Field]) -> List[dict]:
+    """
+    Reads all result rows of the current page with a single `execute_script` call.
+
+    :param driver: The Selenium WebDriver showing the page.
+    :param row_selector: XPath or CSS selector of the rows, evaluated against the document.
+    :param fields: The values to read from each row, by name.
+    :return: One dictionary per row, in document order, mapping every field name to its value.
+    """
+    return driver.execute_script(EXTRACT_ROWS_SCRIPT, row_selector,
+                                 {name: list(field) for name, field in fields.items()})
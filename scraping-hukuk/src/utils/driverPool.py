@@ -0,0 +1,229 @@
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from src.utils.devtools import PERF_LOGGING_OPTIONS, PERFORMANCE_LOGGING_PREFS
+
+
+def find_free_port() -> int:
+    """
+    Asks the OS for a free TCP port, used as the remote debugging port of a Chrome instance.
+
+    :return: A port number that was free at the time of the call.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def create_driver(debug_port: int, page_load_strategy: str = 'normal') -> webdriver.Chrome:
+    """
+    Creates a headless Chrome WebDriver. Its DevTools Network events go to the performance log, which the
+    network idle waits read.
+
+    :param debug_port: The remote debugging port of the browser. Concurrent browsers need distinct ports.
+    :param page_load_strategy: 'normal' waits for the load event after a navigation, 'eager' only for
+                               DOMContentLoaded.
+    :return: The started driver.
+    """
+    chrome_options = webdriver.ChromeOptions()
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument(f"--remote-debugging-port={debug_port}")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.set_capability('goog:loggingPrefs', PERFORMANCE_LOGGING_PREFS)
+    chrome_options.add_experimental_option('perfLoggingPrefs', PERF_LOGGING_OPTIONS)
+    chrome_options.page_load_strategy = page_load_strategy
+
+    return webdriver.Chrome(options=chrome_options)
+
+
+class PooledDriver:
+    """
+    A browser owned by a DriverPool, together with its debugging port, its page load strategy and the number
+    of jobs it has served.
+    """
+
+    def __init__(self, driver: webdriver.Chrome, debug_port: int, page_load_strategy: str = 'normal'):
+        self.driver = driver
+        self.debug_port = debug_port
+        self.page_load_strategy = page_load_strategy
+        self.jobs = 0
+
+
+class DriverPool:
+    """
+    Keeps up to `size` headless Chrome instances alive for a whole run.
+
+    Browsers are started lazily, handed out one job at a time, reset between jobs (extra tabs closed,
+    cookies and web storage cleared) and recycled after `max_jobs_per_driver` jobs or whenever they
+    crash. Every browser gets its own remote debugging port. The page load strategy is fixed when a browser
+    starts, so a browser is also replaced when a job asks for a different one.
+    """
+
+    def __init__(self, size: int = 1, max_jobs_per_driver: int = 20, logger=None):
+        """
+        :param size: The maximum number of browsers kept alive at once.
+        :param max_jobs_per_driver: Number of jobs after which a browser is replaced by a fresh one.
+        :param logger: Optional logger; messages are printed when it is not given.
+        """
+        self.size = size
+        self.max_jobs_per_driver = max_jobs_per_driver
+        self.logger = logger
+        self._idle = queue.LifoQueue()
+        self._started = 0
+        self._lock = threading.Lock()
+        self._all = []
+
+    def _log(self, message: str):
+        if self.logger:
+            self.logger.info(message)
+        else:
+            print(message)
+
+    def _start_driver(self, page_load_strategy: str) -> PooledDriver:
+        debug_port = find_free_port()
+        pooled = PooledDriver(create_driver(debug_port, page_load_strategy), debug_port, page_load_strategy)
+        with self._lock:
+            self._all.append(pooled)
+        self._log(f"Started Chrome on debugging port {debug_port} ({page_load_strategy} page loads).")
+        return pooled
+
+    def _quit_driver(self, pooled: PooledDriver):
+        with self._lock:
+            if pooled in self._all:
+                self._all.remove(pooled)
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def _take(self, page_load_strategy: str) -> PooledDriver:
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            else:
+                if pooled.page_load_strategy == page_load_strategy:
+                    return pooled
+                self._replace(pooled, f"{page_load_strategy} page loads needed")
+                continue
+
+            with self._lock:
+                can_start = self._started < self.size
+                if can_start:
+                    self._started += 1
+
+            if can_start:
+                try:
+                    return self._start_driver(page_load_strategy)
+                except Exception:
+                    with self._lock:
+                        self._started -= 1
+                    raise
+
+            # Every browser is busy; wait for one to come back or for a recycled slot to free up
+            try:
+                pooled = self._idle.get(timeout=1)
+            except queue.Empty:
+                continue
+            if pooled.page_load_strategy == page_load_strategy:
+                return pooled
+            self._replace(pooled, f"{page_load_strategy} page loads needed")
+
+    def _replace(self, pooled: PooledDriver, reason: str):
+        self._log(f"Recycling Chrome on debugging port {pooled.debug_port}: {reason}.")
+        self._quit_driver(pooled)
+        with self._lock:
+            self._started -= 1
+
+    def is_alive(self, pooled: PooledDriver) -> bool:
+        """
+        Checks whether the browser still answers WebDriver commands.
+
+        :param pooled: The pooled browser to check.
+        :return: True if the browser is responsive.
+        """
+        try:
+            _ = pooled.driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def reset(self, pooled: PooledDriver):
+        """
+        Brings a browser back to a clean state: a single blank tab, no cookies and no web storage.
+
+        :param pooled: The pooled browser to reset.
+        """
+        driver = pooled.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except WebDriverException:
+            # about:blank and some error pages have no storage
+            pass
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {'urls': []})
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+        try:
+            # Drop the network events of the last job, nobody reads them anymore
+            driver.get_log('performance')
+        except (WebDriverException, ValueError):
+            pass
+
+    @contextmanager
+    def driver(self, page_load_strategy: str = 'normal'):
+        """
+        Borrows a warm browser for one job.
+
+        :param page_load_strategy: The page load strategy the job needs, see `create_driver`.
+
+        The browser is returned to the pool after the job. It is recycled instead when it crashed,
+        could not be reset or has served `max_jobs_per_driver` jobs.
+
+        Usage::
+
+            with pool.driver() as driver:
+                scraper = EchaWebScraper(..., driver=driver)
+        """
+        pooled = self._take(page_load_strategy)
+        try:
+            yield pooled.driver
+        finally:
+            pooled.jobs += 1
+            if not self.is_alive(pooled):
+                self._replace(pooled, "browser crashed")
+            elif pooled.jobs >= self.max_jobs_per_driver:
+                self._replace(pooled, f"served {pooled.jobs} jobs")
+            else:
+                try:
+                    self.reset(pooled)
+                    self._idle.put(pooled)
+                except Exception as e:
+                    self._replace(pooled, f"reset failed ({e})")
+
+    def close(self):
+        """
+        Quits every browser of the pool.
+        """
+        with self._lock:
+            pooled_drivers = list(self._all)
+        for pooled in pooled_drivers:
+            self._quit_driver(pooled)
+        with self._lock:
+            self._started = 0
+        self._idle = queue.LifoQueue()
@@ -0,0 +1,211 @@
+import json
+from collections import deque
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from selenium.common.exceptions import WebDriverException
+
+from src.utils.waits import PageWaits, RateLimiter
+
+# Holds once the result rows are there or the document finished loading without them
+ROWS_OR_LOADED_SCRIPT = """
+const [selector, isXPath] = arguments;
+const found = isXPath
+    ? document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+    : document.querySelector(selector);
+return Boolean(found) || document.readyState === 'complete';
+"""
+
+
+def row_key(row: dict) -> str:
+    """
+    :param row: A result row read by `domExtract.extract_rows`.
+    :return: A key equal for rows with the same values, used to recognise a page that was already seen.
+    """
+    return json.dumps(row, sort_keys=True)
+
+
+class ResultPager:
+    """
+    Loads the next result pages in background tabs while the bot processes the rows of the current one, so
+    a page costs about the longer of loading and processing instead of their sum.
+
+    Every page gets a new tab with the site's browser profile and navigates there without waiting, since
+    `window.location` returns at once. The bot keeps working in its own tab meanwhile. A page's rows are
+    read in its tab, which is then closed, so the bot can use the browser between two pages.
+
+    `pages` addresses pages by number and keeps `tabs` of them loading. It stops at the page limit, at the
+    first page without rows and at the first page whose rows were all seen on an earlier page, which is what
+    many sites return for a page past the last one. At most `tabs` pages past the end are loaded in vain.
+    `follow` serves sites whose pages have no URL of their own but whose 'Next' link does: the linked page
+    loads in a second tab while the current page is processed, and then takes over from it.
+    """
+
+    def __init__(self, driver, read_rows: Callable[[], List[dict]], rows_locator: Tuple[str, str],
+                 waits: PageWaits, page_url: Callable[[int], str] = None, prepare_tab: Callable[[], None] = None,
+                 tabs: int = 4, politeness: RateLimiter = None, logger=None):
+        """
+        :param driver: The Selenium WebDriver.
+        :param read_rows: Reads the result rows of the current tab, e.g. `BaseScraper.extract_result_rows`.
+        :param rows_locator: A `(By, selector)` pair of the result rows.
+        :param waits: The page waits of the bot, whose timeouts bound every page.
+        :param page_url: Builds the URL of a result page from its number, starting at 1; needed by `pages`.
+        :param prepare_tab: Called in every new tab before it navigates, e.g. to block resources.
+        :param tabs: The number of pages `pages` keeps loading.
+        :param politeness: The rate limit every navigation waits for.
+        :param logger: The logger pages are reported to.
+        """
+        self.driver = driver
+        self.read_rows = read_rows
+        self.rows_locator = rows_locator
+        self.waits = waits
+        self.page_url = page_url
+        self.prepare_tab = prepare_tab
+        self.tabs = max(1, tabs)
+        self.politeness = politeness
+        self.logger = logger
+
+    def pages(self, first_rows: List[dict], limit: int = 0) -> Iterator[Tuple[int, List[dict]]]:
+        """
+        Yields the rows of every result page, starting with the page that is shown, while the following pages
+        load by URL.
+
+        :param first_rows: The rows of page 1, read from the current tab.
+        :param limit: The number of pages to read, 0 for no limit.
+        :return: `(page number, rows)` pairs in page order.
+        """
+        seen = {row_key(row) for row in first_rows}
+        loading = deque()
+        next_number = 2
+        number, rows = 1, first_rows
+        try:
+            while True:
+                # Keep `tabs` pages loading while the rows of the current one are processed
+                while rows and len(loading) < self.tabs and (not limit or next_number <= limit):
+                    loading.append((next_number, self.open(self.page_url(next_number))))
+                    next_number += 1
+                yield number, rows
+                if not loading:
+                    return
+                number, handle = loading.popleft()
+                rows = self.take(number, handle)
+                keys = {row_key(row) for row in rows}
+                if not rows or keys <= seen:
+                    if self.logger:
+                        self.logger.info(f"Result page {number} is {'empty' if not rows else 'a repeat'}, "
+                                         f"stopping pagination.")
+                    return
+                seen |= keys
+        finally:
+            for _, handle in loading:
+                self.discard(handle)
+
+    def follow(self, first_rows: List[dict], next_url: Callable[[], Optional[str]],
+               limit: int = 0) -> Iterator[Tuple[int, List[dict]]]:
+        """
+        Yields the rows of every result page, starting with the page that is shown, while the page its 'Next'
+        link leads to loads in a second tab. That tab then replaces the current one, so the bot always works
+        in the tab of the page it was handed.
+
+        :param first_rows: The rows of page 1, read from the current tab.
+        :param next_url: Reads the URL of the 'Next' link of the current tab, None on the last page.
+        :param limit: The number of pages to read, 0 for no limit.
+        :return: `(page number, rows)` pairs in page order.
+        """
+        number, rows = 1, first_rows
+        handle = None
+        try:
+            while True:
+                url = next_url() if not limit or number < limit else None
+                handle = self.open(url) if url else None
+                yield number, rows
+                if handle is None:
+                    return
+                # The prefetched page takes over from the current one
+                self.waits.network.forget(self.driver.current_window_handle)
+                self.driver.close()
+                self.driver.switch_to.window(handle)
+                handle = None
+                number += 1
+                rows = self._read(number)
+                if not rows:
+                    if self.logger:
+                        self.logger.info(f"Result page {number} is empty, stopping pagination.")
+                    return
+        finally:
+            if handle is not None:
+                self.discard(handle)
+
+    def open(self, url: str) -> str:
+        """
+        Starts loading a URL in a new tab and returns to the current tab without waiting for it.
+
+        :param url: The URL of a result page.
+        :return: The handle of the new tab.
+        """
+        current = self.driver.current_window_handle
+        self.driver.switch_to.new_window('tab')
+        handle = self.driver.current_window_handle
+        try:
+            if self.prepare_tab:
+                self.prepare_tab()
+            if self.politeness:
+                self.politeness.wait()
+            self.driver.execute_script("window.location.href = arguments[0];", url)
+        except BaseException:
+            self.driver.close()
+            raise
+        finally:
+            self.driver.switch_to.window(current)
+        return handle
+
+    def take(self, number: int, handle: str) -> List[dict]:
+        """
+        Reads the rows of a page opened with `open` and closes its tab.
+
+        :param number: The page number, for the log.
+        :param handle: The handle of the page's tab.
+        :return: The rows, none where the page did not load.
+        """
+        current = self.driver.current_window_handle
+        self.driver.switch_to.window(handle)
+        try:
+            return self._read(number)
+        finally:
+            self.driver.close()
+            self.driver.switch_to.window(current)
+            self.waits.network.forget(handle)
+
+    def discard(self, handle: str):
+        """
+        Closes the tab of a page that is no longer needed.
+
+        :param handle: The handle of the page's tab.
+        """
+        current = self.driver.current_window_handle
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        except WebDriverException:
+            pass
+        finally:
+            self.driver.switch_to.window(current)
+            self.waits.network.forget(handle)
+
+    def _read(self, number: int) -> List[dict]:
+        by, selector = self.rows_locator
+        loaded = self.waits.until('result page',
+                                  lambda driver: driver.execute_script(ROWS_OR_LOADED_SCRIPT, selector, by == 'xpath'),
+                                  self.waits.profile.page_load, required=False)
+        if not loaded:
+            if self.logger:
+                self.logger.info(f"Result page {number} did not load in time.")
+            return []
+        if not self.driver.find_elements(*self.rows_locator):
+            # Rows rendered by scripts after the load event
+            self.waits.dom_settled()
+        try:
+            return self.read_rows()
+        except WebDriverException as e:
+            if self.logger:
+                self.logger.info(f"Could not read result page {number}: {str(e).splitlines()[0]}")
+            return []
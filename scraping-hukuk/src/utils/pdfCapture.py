@@ -0,0 +1,145 @@
+import base64
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from selenium.common.exceptions import WebDriverException
+
+from src.utils.documentStore import DocumentStore
+
+PDF_MAGIC = b'%PDF'
+
+
+class PdfCapture:
+    """
+    Takes PDF bodies from the browser's network layer, so a document crosses the network once.
+
+    As a `NetworkLog` listener it watches for PDF responses the browser loaded anyway, e.g. a result link
+    opened in a tab, and copies their bodies into the document store with `Network.getResponseBody` while
+    the browser still holds them. `pop` hands them to the download step instead of fetching them again.
+
+    `load` fetches a PDF through the browser's own network stack with `Network.loadNetworkResource`, with
+    its cookies, and streams the body into the document store with `IO.read`. It serves documents behind a
+    cookie wall that the HTTP client cannot download.
+
+    Bodies are only kept when they start with the PDF signature, so a consent page served in place of a
+    document is never stored as one. Everything that touches the browser must run on the thread that
+    drives it.
+    """
+
+    def __init__(self, driver, store: DocumentStore, canonicalize: Callable[[str], str], logger=None,
+                 chunk_size: int = 256 * 1024):
+        """
+        :param driver: The Selenium Chrome WebDriver.
+        :param store: The document store the bodies are written to.
+        :param canonicalize: Turns a response URL into the URL the bot reports, see `BaseScraper.canonicalize`.
+        :param logger: The logger captured documents are reported to.
+        :param chunk_size: Bytes read from the browser per `IO.read` call.
+        """
+        self.driver = driver
+        self.store = store
+        self.canonicalize = canonicalize
+        self.logger = logger
+        self.chunk_size = chunk_size
+        # requestId -> the URL first requested, before redirects
+        self._request_urls: Dict[str, str] = {}
+        # requestId -> the URLs of a PDF response that is still loading
+        self._pending: Dict[str, Set[str]] = {}
+        # canonical URL -> (content hash, size)
+        self._captured: Dict[str, Tuple[str, int]] = {}
+        self._lock = threading.Lock()
+        self.captured_bytes = 0
+
+    def __call__(self, events: List[dict]):
+        for event in events:
+            method = event['method']
+            params = event.get('params', {})
+            request_id = params.get('requestId')
+            if method == 'Network.requestWillBeSent':
+                self._request_urls.setdefault(request_id, params.get('request', {}).get('url'))
+            elif method == 'Network.responseReceived':
+                response = params.get('response', {})
+                if response.get('mimeType') == 'application/pdf' and response.get('status') == 200:
+                    self._pending[request_id] = {url for url in (self._request_urls.get(request_id),
+                                                                 response.get('url')) if url}
+            elif method == 'Network.loadingFinished':
+                self._request_urls.pop(request_id, None)
+                urls = self._pending.pop(request_id, None)
+                if urls:
+                    self._keep(request_id, urls)
+            elif method == 'Network.loadingFailed':
+                self._request_urls.pop(request_id, None)
+                self._pending.pop(request_id, None)
+
+    def _keep(self, request_id: str, urls: Set[str]):
+        try:
+            body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        except WebDriverException:
+            # The tab was closed or navigated away; the document is downloaded as usual
+            return
+        if body.get('base64Encoded'):
+            content = base64.b64decode(body['body'])
+        else:
+            content = body['body'].encode('latin-1', errors='ignore')
+        if not content.startswith(PDF_MAGIC):
+            return
+        content_hash = self.store.put(content, '.pdf')
+        with self._lock:
+            for url in urls:
+                self._captured[self.canonicalize(url)] = (content_hash, len(content))
+            self.captured_bytes += len(content)
+        if self.logger:
+            self.logger.info(f"Captured {', '.join(sorted(urls))} from the browser "
+                             f"({len(content) / 2 ** 20:.1f} MiB).")
+
+    def pop(self, url: str) -> Optional[Tuple[str, int]]:
+        """
+        Takes a PDF the browser already loaded.
+
+        :param url: The canonical URL of the result.
+        :return: The content hash and the size of the stored body, or None if the PDF was not captured.
+        """
+        with self._lock:
+            return self._captured.pop(url, None)
+
+    def load(self, url: str) -> Tuple[str, int]:
+        """
+        Loads a PDF through the browser, with its cookies, and streams it into the document store.
+
+        :param url: The URL of the PDF.
+        :return: The content hash and the size of the stored body.
+        :raises IOError: When the browser could not load the URL or the body is not a PDF.
+        """
+        frame_id = self.driver.execute_cdp_cmd('Page.getFrameTree', {})['frameTree']['frame']['id']
+        resource = self.driver.execute_cdp_cmd('Network.loadNetworkResource', {
+            'frameId': frame_id,
+            'url': url,
+            'options': {'disableCache': False, 'includeCredentials': True},
+        })['resource']
+        if not resource.get('success'):
+            raise IOError(f"The browser could not load {url}: HTTP {resource.get('httpStatusCode')} "
+                          f"{resource.get('netErrorName', '')}".strip())
+
+        handle = resource['stream']
+        writer = self.store.open_writer('.pdf')
+        try:
+            while True:
+                chunk = self.driver.execute_cdp_cmd('IO.read', {'handle': handle, 'size': self.chunk_size})
+                data = chunk.get('data', '')
+                if chunk.get('base64Encoded'):
+                    data = base64.b64decode(data)
+                else:
+                    data = data.encode('latin-1', errors='ignore')
+                if writer.size == 0 and data and not data.startswith(PDF_MAGIC):
+                    raise IOError(f"{url} did not return a PDF in the browser")
+                writer.write(data)
+                if chunk.get('eof'):
+                    break
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            try:
+                self.driver.execute_cdp_cmd('IO.close', {'handle': handle})
+            except WebDriverException:
+                pass
+        return writer.commit(), writer.size
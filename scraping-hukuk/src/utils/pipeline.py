@@ -0,0 +1,96 @@
+import queue
+import threading
+from typing import Callable, Optional, Tuple
+
+
+class ResultList(list):
+    """
+    A list of discovered `(url, date, name, description)` tuples that forwards every appended item to a callback.
+
+    Bots build their `pdf_urls` / `non_pdf_urls` lists with `BaseScraper.result_lists`, so that in pipelined
+    mode each result reaches the download workers as soon as it is discovered, while the bot keeps
+    paginating. Without a pipeline the list behaves like a plain list.
+    """
+
+    def __init__(self, on_append: Callable[[Tuple[str, str, str, str]], None]):
+        super().__init__()
+        self._on_append = on_append
+
+    def append(self, item):
+        super().append(item)
+        self._on_append(item)
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+
+class DownloadPipeline:
+    """
+    A bounded queue between URL discovery (the producer, driving Selenium) and a pool of download/parse
+    worker threads (the consumers).
+
+    `put` blocks while the queue is full, so a slow network throttles pagination instead of letting
+    discovered results pile up in memory.
+    """
+
+    def __init__(self, handle: Callable[[str, Tuple[str, str, str, str]], None], workers: int = 4,
+                 queue_size: int = 100, logger=None):
+        """
+        :param handle: Called by a worker with the kind ('pdf' or 'non_pdf') and the result tuple.
+        :param workers: Number of consumer threads.
+        :param queue_size: Maximum number of results waiting in the queue.
+        :param logger: Logger used to report failures of `handle`.
+        """
+        self.handle = handle
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.logger = logger
+        self.threads = []
+        self.processed = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Starts the consumer threads.
+        """
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"download-worker-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def put(self, kind: str, item: Tuple[str, str, str, str]):
+        """
+        Hands a discovered result to the consumers, blocking while the queue is full.
+
+        :param kind: 'pdf' or 'non_pdf'.
+        :param item: The `(url, date, name, description)` tuple.
+        """
+        self.queue.put((kind, item))
+
+    def close(self):
+        """
+        Waits until every queued result is handled and stops the consumer threads.
+        """
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def _work(self):
+        while True:
+            entry: Optional[Tuple[str, Tuple[str, str, str, str]]] = self.queue.get()
+            try:
+                if entry is None:
+                    return
+                kind, item = entry
+                try:
+                    self.handle(kind, item)
+                    with self._lock:
+                        self.processed += 1
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error(f"Error handling {item[0]}: {str(e)}")
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,108 @@
+import time
+from typing import Optional
+
+from requests.cookies import create_cookie
+from selenium.common.exceptions import WebDriverException
+
+from src.utils.httpClient import HttpClient
+
+# Reads the identity of the browser the HTTP requests should present
+BROWSER_IDENTITY_SCRIPT = "return [navigator.userAgent, (navigator.languages || [navigator.language]).join(',')];"
+
+
+class SessionBridge:
+    """
+    Hands the browser session of a bot over to the HTTP client, so that downloads leave the browser and
+    still pass the site's consent and session checks.
+
+    `sync` copies every cookie of the browser, including HttpOnly ones, read with `Network.getAllCookies`,
+    into the pooled `requests` session, whose cookie jar the async engine shares. It also copies the
+    browser's User-Agent and Accept-Language. `refresh` repeats this when a copied cookie has expired or
+    `max_age` seconds have passed, since the browser renews its cookies while the bot navigates.
+
+    Cookies are scoped by domain, so the bridges of different sites do not interfere. A bridge only replaces
+    and finally `clear`s the cookies it copied itself. Reading the browser must happen on the thread that
+    drives it.
+    """
+
+    def __init__(self, driver, http_client: HttpClient, logger=None, max_age: float = 300):
+        """
+        :param driver: The Selenium Chrome WebDriver.
+        :param http_client: The HTTP client of the process.
+        :param logger: The logger syncs are reported to.
+        :param max_age: Seconds after which `refresh` copies the cookies again.
+        """
+        self.driver = driver
+        self.http = http_client
+        self.logger = logger
+        self.max_age = max_age
+        # (domain, path, name) of the cookies copied by the last sync
+        self._copied = set()
+        self._synced_at = None
+        self._expires_at = None
+
+    def sync(self) -> int:
+        """
+        Copies the browser's cookies, User-Agent and Accept-Language into the HTTP client.
+
+        :return: The number of cookies copied.
+        """
+        try:
+            cookies = self.driver.execute_cdp_cmd('Network.getAllCookies', {})['cookies']
+        except (WebDriverException, AttributeError, KeyError):
+            # Only the cookies of the current page, without their HttpOnly flag
+            cookies = [dict(cookie, expires=cookie.get('expiry', -1)) for cookie in self.driver.get_cookies()]
+        try:
+            user_agent, languages = self.driver.execute_script(BROWSER_IDENTITY_SCRIPT)
+        except WebDriverException:
+            user_agent, languages = None, None
+
+        jar = self.http.session.cookies
+        self.clear()
+        expires_at = None
+        for cookie in cookies:
+            expires = cookie.get('expires', -1)
+            expires = int(expires) if expires and expires > 0 else None
+            jar.set_cookie(create_cookie(cookie['name'], cookie['value'], domain=cookie['domain'],
+                                         path=cookie.get('path', '/'), secure=cookie.get('secure', False),
+                                         expires=expires,
+                                         rest={'HttpOnly': None} if cookie.get('httpOnly') else {}))
+            self._copied.add((cookie['domain'], cookie.get('path', '/'), cookie['name']))
+            if expires and (expires_at is None or expires < expires_at):
+                expires_at = expires
+
+        headers = {}
+        if user_agent:
+            headers['User-Agent'] = user_agent
+        if languages:
+            headers['Accept-Language'] = languages
+        self.http.use_headers(headers)
+
+        self._synced_at = time.monotonic()
+        self._expires_at = expires_at
+        if self.logger:
+            self.logger.info(f"Handed {len(cookies)} browser cookies over to the HTTP client.")
+        return len(cookies)
+
+    def refresh(self) -> Optional[int]:
+        """
+        Copies the session again when a copied cookie has expired or the last sync is older than `max_age`.
+
+        :return: The number of cookies copied, or None when the copy was still fresh.
+        """
+        if self._synced_at is not None and time.monotonic() - self._synced_at < self.max_age and \
+                (self._expires_at is None or time.time() < self._expires_at):
+            return None
+        return self.sync()
+
+    def clear(self):
+        """
+        Removes the cookies copied by the last sync from the HTTP client.
+        """
+        jar = self.http.session.cookies
+        for domain, path, name in self._copied:
+            try:
+                jar.clear(domain, path, name)
+            except KeyError:
+                pass
+        self._copied.clear()
@@ -0,0 +1,106 @@
+import re
+from typing import List
+from urllib.parse import parse_qsl, unquote, urljoin, urlsplit, urlunsplit
+
+# Query parameters that never change the document behind a URL
+TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'jsessionid'}
+TRACKING_PREFIXES = ('utm_',)
+
+# Per-site parameters that only carry search, session or cache state
+SITE_DROP_PARAMS = {
+    # qid is a new search id every session, from/locale the UI language, rid a rendition counter
+    'eur_lex': {'qid', 'from', 'locale', 'rid'},
+    # t is a cache buster on /documents/ links, p_p_auth a per-session Liferay token
+    'ECHA': {'t', 'redirect', 'p_p_auth'},
+}
+
+_JSESSIONID = re.compile(r';jsessionid=[^/?#]*', re.IGNORECASE)
+_EURLEX_DOCUMENT = re.compile(r'^(?P<scheme>[a-z]+):(?P<id>.+)$', re.IGNORECASE)
+# The rendition segment of a `/legal-content/<lang>/TXT/<format>/` link; plain `/TXT/` links are HTML
+_EURLEX_FORMATS = ('PDF', 'HTML', 'DOC', 'XML')
+
+
+def canonical_url(url: str, site_name: str = None, base_url: str = None) -> str:
+    """
+    Normalises a result link into the URL that is stored and downloaded.
+
+    The link is made absolute against `base_url`, the scheme and host are lower-cased, default ports,
+    fragments and `;jsessionid=` path parameters are removed, tracking and per-site session parameters are
+    dropped and the remaining query parameters are sorted by name.
+
+    :param url: The link as found on the page, absolute or relative.
+    :param site_name: The `site_name` of the scraper, selecting the per-site rules.
+    :param base_url: The URL relative links are resolved against.
+    :return: The canonical URL, or the input unchanged when it is empty or not an HTTP(S) URL.
+    """
+    if not url:
+        return url
+    url = url.strip()
+    if base_url:
+        url = urljoin(base_url, url)
+
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in ('http', 'https'):
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and not (scheme == 'http' and parts.port == 80 or scheme == 'https' and parts.port == 443):
+        host = f"{host}:{parts.port}"
+    path = _JSESSIONID.sub('', parts.path) or '/'
+
+    # Parameters are kept verbatim; re-encoding would break value-less ones like Wicket's `?0-1.ILinkListener-...`
+    drop = SITE_DROP_PARAMS.get(site_name, set())
+    params = []
+    for param in parts.query.split('&'):
+        key = unquote(param.split('=', 1)[0])
+        if not param or key.lower() in TRACKING_PARAMS or key in drop or key.startswith(TRACKING_PREFIXES):
+            continue
+        params.append((key, param))
+    params.sort(key=lambda item: item[0])
+
+    return urlunsplit((scheme, host, path, '&'.join(param for _, param in params), ''))
+
+
+def document_key(url: str, site_name: str = None, base_url: str = None) -> str:
+    """
+    Returns the dedup key of the document behind a result link, used by the URL ledger.
+
+    Links of the same document map to the same key. For most sites this is the canonical URL. EUR-Lex
+    documents are identified by their `uri` and format (e.g. `CELEX:32020R0001:pdf`), regardless of the
+    language of the link. The PDF and the HTML rendition stay apart, since only the HTML one yields the
+    description and the tables.
+
+    :param url: The link as found on the page, absolute or relative.
+    :param site_name: The `site_name` of the scraper, selecting the per-site rules.
+    :param base_url: The URL relative links are resolved against.
+    :return: The key of the document.
+    """
+    url = canonical_url(url, site_name, base_url)
+    if site_name == 'eur_lex' and url:
+        uri = dict(parse_qsl(urlsplit(url).query)).get('uri')
+        match = _EURLEX_DOCUMENT.match(unquote(uri).strip()) if uri else None
+        if match:
+            segments = [segment.upper() for segment in urlsplit(url).path.split('/')]
+            rendition = next((segment for segment in segments if segment in _EURLEX_FORMATS), 'HTML')
+            return f"eur_lex:{match.group('scheme').upper()}:{match.group('id')}:{rendition.lower()}"
+    return url
+
+
+def legacy_keys(url: str, site_name: str = None, base_url: str = None) -> List[str]:
+    """
+    Returns the keys earlier versions of `document_key` gave the document behind a result link, so that
+    ledgers written by them keep recognising it.
+
+    EUR-Lex keys used to leave the format out (`eur_lex:CELEX:32020R0001`). Only the PDF was downloaded
+    under them, so such a key stands for the PDF rendition alone.
+
+    :param url: The link as found on the page, absolute or relative.
+    :param site_name: The `site_name` of the scraper, selecting the per-site rules.
+    :param base_url: The URL relative links are resolved against.
+    :return: The legacy keys, none when the key never changed.
+    """
+    key = document_key(url, site_name, base_url)
+    if site_name == 'eur_lex' and key and key.startswith('eur_lex:') and key.endswith(':pdf'):
+        return [key[:-len(':pdf')]]
+    return []
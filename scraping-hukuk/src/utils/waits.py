@@ -0,0 +1,267 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, NamedTuple, Tuple
+
+from selenium.common.exceptions import (JavascriptException, NoSuchElementException, StaleElementReferenceException,
+                                        TimeoutException)
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from src.utils.devtools import NetworkLog
+
+# Raised while a condition is checked in the middle of a navigation or a re-render; the check is retried
+IGNORED_EXCEPTIONS = (NoSuchElementException, StaleElementReferenceException, JavascriptException)
+
+# Records the time of the last DOM mutation of the document; installed once per document by `dom_settled`
+DOM_QUIET_SCRIPT = """
+if (!window.__scraperMutations) {
+    window.__scraperMutations = {last: performance.now()};
+    new MutationObserver(() => { window.__scraperMutations.last = performance.now(); })
+        .observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+}
+return performance.now() - window.__scraperMutations.last;
+"""
+
+
+class WaitProfile(NamedTuple):
+    """
+    The timeouts of a site, in seconds. Slow sites declare a longer profile instead of longer sleeps.
+    """
+    # An element to appear or become clickable
+    element: float = 20
+    # `document.readyState` to become 'complete' after a navigation
+    page_load: float = 30
+    # The DOM or the network to settle after an interaction
+    settle: float = 10
+    # How long the DOM or the network has to stay quiet to count as settled
+    quiet: float = 0.5
+
+
+class PageWaits:
+    """
+    Explicit waits on the page of a driver, replacing fixed `time.sleep` calls.
+
+    Every wait polls its condition and returns as soon as it holds, bounded by the site's `WaitProfile`.
+    Element waits raise `TimeoutException` like `WebDriverWait`; the settle waits (`ready_state`,
+    `page_turned`, `count_changed`, `dom_settled`, `network_idle`) are best effort and return False after
+    their timeout, since a page that keeps polling the network is usually still usable.
+
+    The time spent in each kind of wait is logged and summed up for `log_summary`.
+    """
+
+    def __init__(self, driver, profile: WaitProfile = WaitProfile(), logger=None, poll_frequency: float = 0.1):
+        """
+        :param driver: The Selenium WebDriver.
+        :param profile: The timeouts of the site.
+        :param logger: The logger wait times are written to.
+        :param poll_frequency: Seconds between two checks of a condition.
+        """
+        self.driver = driver
+        self.profile = profile
+        self.logger = logger
+        self.poll_frequency = poll_frequency
+        self.network = NetworkLog(driver)
+        # wait name -> [count, seconds, timeouts]
+        self.totals = defaultdict(lambda: [0, 0.0, 0])
+
+    def until(self, name: str, condition: Callable, timeout: float, required: bool = True):
+        """
+        Waits for a condition and records how long it took.
+
+        :param name: The kind of wait, used in the log and the summary.
+        :param condition: A callable taking the driver, e.g. an `expected_conditions` instance.
+        :param timeout: The longest wait in seconds.
+        :param required: Raise `TimeoutException` after the timeout instead of returning False.
+        :return: The truthy value returned by the condition, or False when a best-effort wait timed out.
+        """
+        start = time.monotonic()
+        try:
+            result = WebDriverWait(self.driver, timeout, poll_frequency=self.poll_frequency,
+                                   ignored_exceptions=IGNORED_EXCEPTIONS).until(condition)
+            timed_out = False
+        except TimeoutException:
+            if required:
+                self._record(name, time.monotonic() - start, timed_out=True)
+                raise
+            result = False
+            timed_out = True
+        self._record(name, time.monotonic() - start, timed_out)
+        return result
+
+    def _record(self, name: str, seconds: float, timed_out: bool):
+        totals = self.totals[name]
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] += timed_out
+        if self.logger:
+            self.logger.debug(f"Waited {seconds:.2f}s for {name}{' (timed out)' if timed_out else ''}.")
+
+    def element(self, locator: Tuple[str, str], clickable: bool = False, timeout: float = None):
+        """
+        :param locator: A `(By, selector)` pair.
+        :param clickable: Wait for the element to be visible and enabled, not only present.
+        :param timeout: Seconds, the profile's `element` timeout by default.
+        :return: The element.
+        :raises TimeoutException: When the element did not appear.
+        """
+        condition = EC.element_to_be_clickable(locator) if clickable else EC.presence_of_element_located(locator)
+        return self.until('element', condition, timeout or self.profile.element)
+
+    def elements(self, locator: Tuple[str, str], timeout: float = None):
+        """
+        :param locator: A `(By, selector)` pair.
+        :param timeout: Seconds, the profile's `element` timeout by default.
+        :return: Every matching element, once there is at least one.
+        :raises TimeoutException: When no element appeared.
+        """
+        return self.until('elements', EC.presence_of_all_elements_located(locator), timeout or self.profile.element)
+
+    def ready_state(self, timeout: float = None) -> bool:
+        """
+        Waits for `document.readyState` to become 'complete'.
+
+        :param timeout: Seconds, the profile's `page_load` timeout by default.
+        :return: True if the document finished loading in time.
+        """
+        return self.until('ready state',
+                          lambda driver: driver.execute_script("return document.readyState") == 'complete',
+                          timeout or self.profile.page_load, required=False)
+
+    def page_turned(self, old_element, timeout: float = None) -> bool:
+        """
+        Waits for an element of the previous page to be detached, i.e. for a navigation or a re-rendered
+        result list after a click, and then for the new document to finish loading.
+
+        :param old_element: An element of the page before the click, e.g. the `html` element or a result row.
+        :param timeout: Seconds, the profile's `page_load` timeout by default.
+        :return: True if the page changed and loaded in time.
+        """
+        turned = self.until('page turn', EC.staleness_of(old_element), timeout or self.profile.page_load,
+                            required=False)
+        return self.ready_state(timeout) and bool(turned)
+
+    def new_window(self, handles_before: int, timeout: float = None) -> str:
+        """
+        Waits for a link clicked with target `_blank` to open its tab.
+
+        :param handles_before: The number of window handles before the click.
+        :param timeout: Seconds, the profile's `element` timeout by default.
+        :return: The handle of the newest window.
+        :raises TimeoutException: When no tab was opened.
+        """
+        self.until('new window', EC.number_of_windows_to_be(handles_before + 1), timeout or self.profile.element)
+        return self.driver.window_handles[-1]
+
+    def count_changed(self, locator: Tuple[str, str], previous: int, timeout: float = None) -> bool:
+        """
+        Waits for the number of elements matching a locator to differ from `previous`, e.g. for a result list
+        to grow after the page size was changed.
+
+        :param locator: A `(By, selector)` pair.
+        :param previous: The number of elements before the interaction.
+        :param timeout: Seconds, the profile's `settle` timeout by default.
+        :return: True if the count changed in time.
+        """
+        return self.until('result count', lambda driver: len(driver.find_elements(*locator)) != previous,
+                          timeout or self.profile.settle, required=False)
+
+    def dom_settled(self, quiet: float = None, timeout: float = None) -> bool:
+        """
+        Waits until the document has not been mutated for `quiet` seconds, watched by a MutationObserver.
+
+        :param quiet: Seconds without mutations, the profile's `quiet` period by default.
+        :param timeout: Seconds, the profile's `settle` timeout by default.
+        :return: True if the DOM settled in time.
+        """
+        quiet_ms = 1000 * (quiet if quiet is not None else self.profile.quiet)
+        return self.until('DOM settle', lambda driver: driver.execute_script(DOM_QUIET_SCRIPT) >= quiet_ms,
+                          timeout or self.profile.settle, required=False)
+
+    def network_idle(self, quiet: float = None, timeout: float = None) -> bool:
+        """
+        Waits until no request has been in flight for `quiet` seconds, following the DevTools Network events.
+        Without a performance log, as with drivers not started by `driverPool.create_driver`, it waits for
+        the DOM to settle instead.
+
+        :param quiet: Seconds without network activity, the profile's `quiet` period by default.
+        :param timeout: Seconds, the profile's `settle` timeout by default.
+        :return: True if the network went idle in time.
+        """
+        quiet = quiet if quiet is not None else self.profile.quiet
+        self.network.poll()
+        if not self.network.available:
+            return self.dom_settled(quiet, timeout)
+        # Only the current tab counts; result pages may be loading in other tabs
+        tab = self.network.current_tab()
+        return self.until('network idle', lambda driver: self.network.idle_for(tab) >= quiet,
+                          timeout or self.profile.settle, required=False)
+
+    def settled(self, timeout: float = None) -> bool:
+        """
+        Waits for the page to load and for the network and the DOM to settle after an interaction that may or
+        may not navigate, such as submitting a search.
+
+        :param timeout: Seconds per condition, the profile's timeouts by default.
+        :return: True if every condition held in time.
+        """
+        return all([self.ready_state(timeout), self.network_idle(timeout=timeout), self.dom_settled(timeout=timeout)])
+
+    def log_summary(self):
+        """
+        Logs the number of waits of each kind, the time they took and how many timed out.
+        """
+        if not self.logger:
+            return
+        for name, (count, seconds, timeouts) in sorted(self.totals.items()):
+            self.logger.info(f"Waits for {name}: {count} in {seconds:.1f}s "
+                             f"(average {seconds / count:.2f}s, {timeouts} timed out).")
+
+
+class RateLimiter:
+    """
+    A politeness delay: keeps at least `min_interval` seconds between two requests a bot makes to its site.
+
+    Unlike a fixed sleep it only waits for what is left of the interval, so time spent parsing or waiting
+    for the page counts towards it, and it does nothing when the interval is 0. The browser and the HTTP
+    fetches of detail pages share one limiter per bot, so the delay holds for every request to the site.
+    """
+
+    def __init__(self, min_interval: float = 0.0):
+        """
+        :param min_interval: Seconds between two requests.
+        """
+        self.min_interval = min_interval
+        self._last = 0.0
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def wait(self):
+        """
+        Blocks until the next request is allowed and reserves it.
+        """
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            delay = self._last + self.min_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+                self.waited += delay
+            self._last = time.monotonic()
+
+    async def wait_async(self):
+        """
+        Reserves the next allowed request time and sleeps until then without blocking the event loop, so
+        concurrent requests are spaced `min_interval` apart.
+        """
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._last + self.min_interval - now)
+            self._last = now + delay
+            self.waited += delay
+        if delay:
+            await asyncio.sleep(delay)
+
@@ -0,0 +1,81 @@
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+
+class WatermarkStore:
+    """
+    The newest document seen per (site, keyword), persisted between runs in `watermarks.json`.
+
+    Layout::
+
+        {"ECHA": {"Water": {"date": "2024-05-02", "url": "https://...", "updated": "2024-05-03T06:00:00"}}}
+
+    Dates use the YYYY-MM-DD format of the result tuples, so they compare as plain strings.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Local path of the watermark file.
+        """
+        self.path = path
+        self.watermarks = {}
+
+    def load(self):
+        """
+        Loads the watermark file if it exists. A missing or broken file starts from an empty store.
+        """
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self.watermarks = json.load(file)
+        except (ValueError, OSError):
+            self.watermarks = {}
+
+    def save(self):
+        """
+        Writes the watermarks back to the local file.
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump(self.watermarks, file, ensure_ascii=False, indent=4)
+
+    def get(self, site: str, keyword: str) -> Optional[dict]:
+        """
+        :param site: The site name.
+        :param keyword: The keyword.
+        :return: The stored watermark with `date` and `url`, or None on the first run.
+        """
+        return self.watermarks.get(site, {}).get(keyword)
+
+    def update(self, site: str, keyword: str, date: str, url: str):
+        """
+        Moves the watermark of a (site, keyword) forward. Older dates never replace a newer watermark.
+
+        :param site: The site name.
+        :param keyword: The keyword.
+        :param date: The date of the newest document seen, formatted as YYYY-MM-DD.
+        :param url: The URL of that document.
+        """
+        current = self.get(site, keyword)
+        if current and current.get('date', '') > date:
+            return
+        self.watermarks.setdefault(site, {})[keyword] = {
+            'date': date,
+            'url': url,
+            'updated': datetime.utcnow().isoformat(timespec='seconds')
+        }
+
+    def merge(self, other: 'WatermarkStore'):
+        """
+        Merges the watermarks of another store, keeping the newest entry of every (site, keyword).
+
+        :param other: The store to merge in.
+        """
+        for site, keywords in other.watermarks.items():
+            for keyword, watermark in keywords.items():
+                current = self.get(site, keyword)
+                if current is None or current.get('date', '') < watermark.get('date', ''):
+                    self.watermarks.setdefault(site, {})[keyword] = watermark
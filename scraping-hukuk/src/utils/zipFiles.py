@@ -1,7 +1,11 @@
+import json
 import zlib
 import zipfile
 import os
 import shutil
+from pathlib import Path
+
+from src.utils.documentStore import file_sha256
 
 """
 Burası tam bir mass ama gece ikide biten bir işin parçası
@@ -75,11 +79,51 @@ def zip_files_with_same_names(source_dir, dest_dir):
 
     return filenames, destination_path_list
 
-def compress(file_names, path_to_write, zip_name):
+def drop_duplicate_documents(file_names, zip_path, zipped_documents):
+    """
+    Leaves out the PDF of a document whose content is already in another zip of this run, or was delivered
+    in an earlier run (`duplicate_of` in its metadata), so that every unique document is uploaded once.
+
+    Returns the files to zip and a reference to the earlier copy of the left out PDF (or None). Zips are
+    referred to by their blob name, `<site>/<keyword>/<name>.zip`.
+    """
+    metadata = {}
+    for file_name in file_names:
+        if os.path.basename(file_name).startswith('metadata_'):
+            try:
+                with open(file_name, 'r', encoding='utf-8') as metadata_file:
+                    metadata = json.load(metadata_file)
+            except (OSError, ValueError):
+                pass
+
+    kept, reference = [], None
+    for file_name in file_names:
+        if file_name.endswith('.pdf'):
+            try:
+                content_hash = metadata.get('content_hash') or file_sha256(file_name)
+            except OSError:
+                content_hash = None
+            earlier = metadata.get('duplicate_of') or zipped_documents.get(content_hash)
+            if content_hash and earlier:
+                reference = {'content_hash': content_hash, 'duplicate_of': earlier}
+                print(f"Skipping {file_name}: same content as {earlier}.")
+                continue
+            if content_hash:
+                zipped_documents[content_hash] = '/'.join(Path(zip_path).parts[-3:])
+        kept.append(file_name)
+    return kept, reference
+
+def compress(file_names, path_to_write, zip_name, zipped_documents=None):
     # Select the compression mode ZIP_DEFLATED for compression
     # or zipfile.ZIP_STORED to just store the file
     compression = zipfile.ZIP_DEFLATED
 
+    # Aynı içerikteki PDF'ler yalnızca bir kez zip'lenir
+    reference = None
+    if zipped_documents is not None:
+        file_names, reference = drop_duplicate_documents(file_names, os.path.join(path_to_write, zip_name),
+                                                         zipped_documents)
+
     # create the zip file first parameter path/name, second mode
     zf = zipfile.ZipFile(os.path.join(path_to_write, zip_name), mode="w")
     try:
@@ -87,6 +131,8 @@ def compress(file_names, path_to_write, zip_name):
             # Add file to the zip file
             # first parameter file to zip, second filename in zip
             zf.write(file_name, file_name.split('/')[-1], compress_type=compression)
+        if reference:
+            zf.writestr(os.path.splitext(zip_name)[0] + '.document.json', json.dumps(reference))
 
     except FileNotFoundError:
         print("An error occurred")
@@ -0,0 +1,88 @@
+import logging
+import threading
+
+from src.bots.echaWebScraping import EchaWebScraper
+from src.utils.checkpoint import Checkpoint
+from src.utils.urlLedger import UrlLedger
+
+
+def test_concurrent_saves_leave_a_complete_checkpoint(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path), 'site', 'glass')
+    for number in range(200):
+        checkpoint.record_discovered('pdf', (f'https://example.org/{number}.pdf', '2024-01-01', str(number), ''))
+    errors = []
+
+    def complete(numbers):
+        # As download threads and the main thread do, via record_completed and flush_checkpoint
+        try:
+            for number in numbers:
+                checkpoint.record_completed(f'https://example.org/{number}.pdf')
+                checkpoint.save(force=True)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=complete, args=(range(start, 200, 4),)) for start in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    loaded = Checkpoint(str(tmp_path), 'site', 'glass')
+    assert loaded.load()
+    assert loaded.pending() == []
+    assert len(loaded.discovered) == 200
+
+
+def resumable_scraper(tmp_path, resume):
+    # Only the attributes checkpointing reads; no browser or storage behind it
+    scraper = object.__new__(EchaWebScraper)
+    scraper.site_name = 'ECHA'
+    scraper.base_url = 'https://echa.europa.eu'
+    scraper.work_dir = str(tmp_path)
+    scraper.raw_dir = str(tmp_path / 'raw')
+    scraper.resume = resume
+    scraper.ledger = UrlLedger(str(tmp_path / 'ledger.db'), 'ECHA')
+    scraper.logger = logging.getLogger('test_checkpoint')
+    scraper._url_lock = threading.Lock()
+    scraper.result_sink = None
+    scraper.discovery_keys = {}
+    scraper.skipped_known_urls = 0
+    return scraper
+
+
+def result(name):
+    return (f'https://echa.europa.eu/documents/{name}.pdf', '2024-01-01', name, '')
+
+
+def test_resume_keeps_finished_documents_done(tmp_path):
+    scraper = resumable_scraper(tmp_path, resume=False)
+    scraper.ledger.record([scraper.url_key(result('old')[0])], 'done')
+    scraper.open_checkpoint('glass')
+    for name in ('old', 'new', 'new'):
+        scraper.publish_url('pdf', result(name))
+    scraper.checkpoint.save(force=True)
+    # Only the result that is going to be downloaded is checkpointed, once
+    assert scraper.checkpoint.discovered == [('pdf', result('new'))]
+
+    # Another job finishes the new document before this one resumes
+    scraper.ledger.record([scraper.url_key(result('new')[0])], 'done')
+    scraper.resume = True
+    assert scraper.open_checkpoint('glass') == []
+    assert scraper.ledger.get(scraper.url_key(result('new')[0]))['status'] == 'done'
+    assert scraper.ledger.get(scraper.url_key(result('old')[0]))['status'] == 'done'
+    scraper.ledger.close()
+
+
+def test_resume_returns_unfinished_results(tmp_path):
+    scraper = resumable_scraper(tmp_path, resume=False)
+    scraper.open_checkpoint('glass')
+    scraper.publish_url('pdf', result('new'))
+    scraper.queue_urls([result('new')], [])
+    scraper.checkpoint.save(force=True)
+
+    scraper.resume = True
+    assert scraper.open_checkpoint('glass') == [('pdf', result('new'))]
+    assert scraper.ledger.get(scraper.url_key(result('new')[0]))['status'] == 'interrupted'
+    assert scraper.is_known_url(result('new')[0])
+    scraper.ledger.close()
@@ -0,0 +1,53 @@
+import hashlib
+import os
+
+import pytest
+
+from src.utils.documentStore import DocumentStore
+
+CONTENT = b'%PDF-1.7 ' + b'x' * 1000
+
+
+def stored_objects(store):
+    return sorted(os.path.relpath(os.path.join(folder, name), store.root)
+                  for folder, _, names in os.walk(store.root) for name in names)
+
+
+def test_put_stream_stores_each_content_once(tmp_path):
+    store = DocumentStore(str(tmp_path / 'documents'))
+    content_hash, size = store.put_stream([CONTENT[:100], b'', CONTENT[100:]])
+
+    assert (content_hash, size) == (hashlib.sha256(CONTENT).hexdigest(), len(CONTENT))
+    assert store.put(CONTENT) == content_hash
+    object_path = store.object_path(content_hash)
+    assert object_path.endswith(os.path.join(content_hash[:2], f"{content_hash}.pdf"))
+    assert stored_objects(store) == [os.path.relpath(object_path, store.root)]
+    with open(object_path, 'rb') as file:
+        assert file.read() == CONTENT
+
+
+def test_failed_stream_leaves_nothing_behind(tmp_path):
+    store = DocumentStore(str(tmp_path / 'documents'))
+
+    def chunks():
+        yield CONTENT[:100]
+        raise ConnectionError('reset')
+
+    with pytest.raises(ConnectionError):
+        store.put_stream(chunks())
+    assert stored_objects(store) == []
+
+
+def test_link_shares_the_stored_object(tmp_path):
+    store = DocumentStore(str(tmp_path / 'documents'))
+    content_hash = store.put(CONTENT)
+    first = str(tmp_path / 'raw' / 'site' / 'glass' / 'pdf' / 'a.pdf')
+    second = str(tmp_path / 'raw' / 'other' / 'paper' / 'pdf' / 'b.pdf')
+    store.link(content_hash, first)
+    store.link(content_hash, second)
+    # Linking again replaces the entry
+    store.link(content_hash, first)
+
+    assert os.path.samefile(first, store.object_path(content_hash))
+    assert os.path.samefile(second, store.object_path(content_hash))
+    assert os.stat(store.object_path(content_hash)).st_nlink == 3
@@ -0,0 +1,43 @@
+import re
+
+import pytest
+from selenium.webdriver.common.by import By
+
+from src.utils.domExtract import EXTRACT_ROWS_SCRIPT, Field, extract_rows, is_xpath, locator
+
+# The XPath test of `findAll`, which runs in the page
+SCRIPT_XPATH = re.compile(re.search(r"if \(/(.+)/\.test\(selector\)\)", EXTRACT_ROWS_SCRIPT).group(1))
+
+CSS = ['.entry-title', '.entry-title a', '.date', 'div.SearchResult', '#document1', 'a[href]']
+XPATH = ['.', './/h3', "..//td", '../../following-sibling::td', "//div[@id='EurlexContent']", '(//a)[1]']
+
+
+@pytest.mark.parametrize('selector', CSS)
+def test_css_selectors(selector):
+    assert not is_xpath(selector)
+    assert not SCRIPT_XPATH.match(selector)
+    assert locator(selector) == (By.CSS_SELECTOR, selector)
+
+
+@pytest.mark.parametrize('selector', XPATH)
+def test_xpath_selectors(selector):
+    assert is_xpath(selector)
+    assert SCRIPT_XPATH.match(selector)
+    assert locator(selector) == (By.XPATH, selector)
+
+
+def test_extract_rows_reads_css_and_xpath_fields_in_one_call():
+    class Driver:
+        calls = []
+
+        def execute_script(self, script, *args):
+            self.calls.append((script, args))
+            return [{'title': 'Glass', 'links': ['https://example.org/a.pdf']}]
+
+    driver = Driver()
+    rows = extract_rows(driver, "//article", {'title': Field('.entry-title'),
+                                              'links': Field(".//a[@href]", 'href', True)})
+
+    assert rows == [{'title': 'Glass', 'links': ['https://example.org/a.pdf']}]
+    assert driver.calls == [(EXTRACT_ROWS_SCRIPT, ("//article", {'title': ['.entry-title', 'text', False],
+                                                                 'links': ['.//a[@href]', 'href', True]}))]
@@ -0,0 +1,47 @@
+import threading
+import time
+
+from src.utils.pipeline import DownloadPipeline, ResultList
+
+
+def test_close_drains_the_queue():
+    handled = []
+    lock = threading.Lock()
+
+    def handle(kind, item):
+        time.sleep(0.001)
+        with lock:
+            handled.append((kind, item[0]))
+
+    pipeline = DownloadPipeline(handle, workers=3, queue_size=2)
+    pipeline.start()
+    for number in range(20):
+        pipeline.put('pdf' if number % 2 else 'non_pdf', (f'https://example.org/{number}', '', '', ''))
+    pipeline.close()
+
+    assert sorted(url for _, url in handled) == sorted(f'https://example.org/{number}' for number in range(20))
+    assert pipeline.processed == 20
+    assert pipeline.threads == []
+    assert pipeline.queue.empty()
+
+
+def test_a_failing_result_does_not_stop_the_workers():
+    errors = []
+
+    class Logger:
+        def error(self, message):
+            errors.append(message)
+
+    def handle(kind, item):
+        if item[0].endswith('bad'):
+            raise ValueError('broken')
+
+    pipeline = DownloadPipeline(handle, workers=1, logger=Logger())
+    pipeline.start()
+    results = ResultList(lambda item: pipeline.put('pdf', item))
+    results.extend([('https://example.org/bad', '', '', ''), ('https://example.org/good', '', '', '')])
+    pipeline.close()
+
+    assert len(results) == 2
+    assert pipeline.processed == 1
+    assert errors == ['Error handling https://example.org/bad: broken']
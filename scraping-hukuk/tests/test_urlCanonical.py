@@ -0,0 +1,94 @@
+import pytest
+
+from src.bots.eur_lexWebScraping import EurWebScraper
+from src.utils.urlCanonical import canonical_url, document_key, legacy_keys
+
+PDF_LINK = 'https://eur-lex.europa.eu/legal-content/EN/TXT/PDF/?uri=CELEX:32020R0001&qid=1700000000000'
+HTML_LINK = 'https://eur-lex.europa.eu/legal-content/EN/TXT/HTML/?uri=CELEX:32020R0001&qid=1700000000001'
+
+
+def eur_lex_scraper(ledger=()):
+    # Only the attributes `new_results` reads; no browser or storage behind it
+    scraper = object.__new__(EurWebScraper)
+    scraper.site_name = 'eur_lex'
+    scraper.base_url = 'https://eur-lex.europa.eu/homepage.html'
+    scraper.ledger = set(ledger)
+    return scraper
+
+
+@pytest.mark.parametrize('url, canonical', [
+    # Scheme and host lower-cased, default port, fragment and session path parameter removed
+    ('HTTPS://Example.ORG:443/a;jsessionid=ABC123?b=2&a=1#top', 'https://example.org/a?a=1&b=2'),
+    ('http://example.org:8080', 'http://example.org:8080/'),
+    # Tracking parameters are dropped on every site
+    ('https://example.org/a?utm_source=mail&id=5&fbclid=x', 'https://example.org/a?id=5'),
+    # Value-less parameters are kept verbatim
+    ('https://example.org/page?0-1.ILinkListener-form', 'https://example.org/page?0-1.ILinkListener-form'),
+    ('mailto:someone@example.org', 'mailto:someone@example.org'),
+    ('', ''),
+])
+def test_canonical_url(url, canonical):
+    assert canonical_url(url) == canonical
+
+
+def test_canonical_url_resolves_relative_links():
+    assert canonical_url('/documents/a.pdf#page=2', base_url='https://echa.europa.eu/search') == \
+        'https://echa.europa.eu/documents/a.pdf'
+
+
+@pytest.mark.parametrize('site_name, url, canonical', [
+    ('eur_lex', 'https://eur-lex.europa.eu/legal-content/EN/TXT/PDF/?uri=CELEX:32020R0001&qid=1&from=EN&rid=2',
+     'https://eur-lex.europa.eu/legal-content/EN/TXT/PDF/?uri=CELEX:32020R0001'),
+    ('ECHA', 'https://echa.europa.eu/documents/10162/abc?t=1700000000&p_p_auth=x1',
+     'https://echa.europa.eu/documents/10162/abc'),
+    # Parameters one site drops carry content on another
+    ('enhesa', 'https://www.enhesa.com/?p=12&t=1', 'https://www.enhesa.com/?p=12&t=1'),
+])
+def test_canonical_url_drops_site_session_parameters(site_name, url, canonical):
+    assert canonical_url(url, site_name) == canonical
+
+
+def test_document_key_is_the_canonical_url_outside_eur_lex():
+    url = 'https://echa.europa.eu/documents/10162/abc?t=1700000000'
+    assert document_key(url, 'ECHA') == canonical_url(url, 'ECHA')
+    # EUR-Lex links without a document id keep their URL as well
+    search = 'https://eur-lex.europa.eu/search.html?text=glass&qid=1'
+    assert document_key(search, 'eur_lex') == 'https://eur-lex.europa.eu/search.html?text=glass'
+
+
+def test_eur_lex_key_keeps_the_rendition():
+    assert document_key(PDF_LINK, 'eur_lex') == 'eur_lex:CELEX:32020R0001:pdf'
+    assert document_key(HTML_LINK, 'eur_lex') == 'eur_lex:CELEX:32020R0001:html'
+
+
+def test_eur_lex_key_ignores_language_and_search_state():
+    german = 'https://eur-lex.europa.eu/legal-content/DE/TXT/PDF/?uri=CELEX:32020R0001&from=DE'
+    assert document_key(german, 'eur_lex') == document_key(PDF_LINK, 'eur_lex')
+    plain_text = 'https://eur-lex.europa.eu/legal-content/EN/TXT/?uri=CELEX:32020R0001'
+    assert document_key(plain_text, 'eur_lex') == document_key(HTML_LINK, 'eur_lex')
+
+
+def test_legacy_keys():
+    # EUR-Lex keys without the format only ever stood for the PDF
+    assert legacy_keys(PDF_LINK, 'eur_lex') == ['eur_lex:CELEX:32020R0001']
+    assert legacy_keys(HTML_LINK, 'eur_lex') == []
+    assert legacy_keys('https://echa.europa.eu/documents/10162/abc', 'ECHA') == []
+
+
+def test_new_results_keeps_pdf_and_html_of_one_celex():
+    pdf = (PDF_LINK, '2020-01-01', 'pdf-result', 'this is a pdf url')
+    html = (HTML_LINK, '2020-01-01', 'html-result', 'Regulation text')
+
+    new_pdf, new_html = eur_lex_scraper().new_results([pdf], [html])
+
+    assert new_pdf == [pdf]
+    assert new_html == [html]
+
+
+def test_new_results_skips_renditions_in_the_ledger():
+    pdf = (PDF_LINK, '2020-01-01', 'pdf-result', 'this is a pdf url')
+    html = (HTML_LINK, '2020-01-01', 'html-result', 'Regulation text')
+    # A key written before the format was part of it stands for the PDF only
+    scraper = eur_lex_scraper(ledger={'eur_lex:CELEX:32020R0001'})
+
+    assert scraper.new_results([pdf], [html]) == ([], [html])
@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+
+from src.utils.urlLedger import UrlLedger
+
+
+def test_index_sees_records_of_other_jobs(tmp_path):
+    path = str(tmp_path / 'site.db')
+    job = UrlLedger(path, 'site')
+    job.record(['https://example.org/a'], 'done')
+    job.load_index()
+    other = UrlLedger(path, 'site')
+    other.record(['https://example.org/b'], 'queued')
+    other.record(['https://example.org/c'], 'failed')
+
+    assert 'https://example.org/a' in job
+    assert 'https://example.org/b' in job
+    assert 'https://example.org/c' not in job
+    job.close()
+    other.close()
+
+
+class Container:
+    """An in-memory stand-in for the Blob Storage container client."""
+
+    def __init__(self):
+        self.blobs = {}
+
+    def list_blobs(self, name_starts_with=''):
+        return [SimpleNamespace(name=name) for name in self.blobs if name.startswith(name_starts_with)]
+
+    def get_blob_client(self, name):
+        data = self.blobs[name]
+        return SimpleNamespace(download_blob=lambda: SimpleNamespace(readall=lambda: data))
+
+    def upload_blob(self, name, data, overwrite=False, timeout=None):
+        assert overwrite or name not in self.blobs
+        self.blobs[name] = data
+
+    def delete_blob(self, name):
+        del self.blobs[name]
+
+
+def record(url, status, updated, first_seen=None, content_hash=None):
+    return {'url': url, 'first_seen': first_seen or updated[:10], 'content_hash': content_hash,
+            'status': status, 'updated': updated}
+
+
+def test_merge_keeps_the_last_write(tmp_path):
+    ledger = UrlLedger(str(tmp_path / 'site.db'), 'site')
+    url = 'https://example.org/a'
+    ledger._merge([record(url, 'done', '2024-05-01T10:00:00', content_hash='new')], dirty=0)
+    # An older record arriving later, e.g. from a segment of another job, loses
+    ledger._merge([record(url, 'failed', '2024-04-01T10:00:00', first_seen='2024-03-01')], dirty=0)
+
+    assert ledger.get(url) == {'url': url, 'first_seen': '2024-03-01', 'content_hash': 'new', 'status': 'done',
+                               'updated': '2024-05-01T10:00:00'}
+    ledger._merge([record(url, 'failed', '2024-06-01T10:00:00')], dirty=0)
+    assert ledger.get(url)['status'] == 'failed'
+    # A newer record without a content hash keeps the known one
+    assert ledger.get(url)['content_hash'] == 'new'
+    assert url not in ledger
+    ledger.close()
+
+
+def test_record_overrides_the_status_and_keeps_first_seen(tmp_path):
+    ledger = UrlLedger(str(tmp_path / 'site.db'), 'site')
+    url = 'https://example.org/a'
+    ledger._merge([record(url, 'legacy', '2020-01-01T00:00:00')], dirty=0)
+    ledger.record([url, None], 'done', content_hash='abc')
+
+    row = ledger.get(url)
+    assert (row['first_seen'], row['status'], row['content_hash']) == ('2020-01-01', 'done', 'abc')
+    assert len(ledger) == 1
+    ledger.close()
+
+
+def test_sync_round_trip(tmp_path):
+    container = Container()
+    first = UrlLedger(str(tmp_path / 'first.db'), 'site', container)
+    first.record(['https://example.org/a', 'https://example.org/b'], 'done', content_hash='abc')
+    first.record(['https://example.org/c'], 'failed')
+    name = first.sync_up()
+    assert name.startswith('ledger/site/') and list(container.blobs) == [name]
+    # Nothing changed since
+    assert first.sync_up() is None
+
+    second = UrlLedger(str(tmp_path / 'second.db'), 'site', container)
+    second.sync_down()
+    assert second.get('https://example.org/a') == first.get('https://example.org/a')
+    assert 'https://example.org/b' in second
+    assert 'https://example.org/c' not in second
+    # Downloaded records are not uploaded again, and applied segments are not downloaded again
+    assert second.sync_up() is None
+    second.record(['https://example.org/c'], 'done')
+    second.sync_up()
+    second.sync_down()
+
+    first.sync_down()
+    assert 'https://example.org/c' in first
+    assert len(container.blobs) == 2
+    first.close()
+    second.close()
+
+
+def test_compact_replaces_applied_segments_with_a_snapshot(tmp_path):
+    container = Container()
+    ledger = UrlLedger(str(tmp_path / 'site.db'), 'site', container)
+    for number in range(3):
+        ledger.record([f'https://example.org/{number}'], 'done')
+        ledger.sync_up()
+    ledger.compact(max_segments=2)
+    assert len(container.blobs) == 1
+
+    fresh = UrlLedger(str(tmp_path / 'fresh.db'), 'site', container)
+    fresh.sync_down()
+    assert all(f'https://example.org/{number}' in fresh for number in range(3))
+    ledger.close()
+    fresh.close()
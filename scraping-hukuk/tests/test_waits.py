@@ -0,0 +1,27 @@
+import asyncio
+import time
+
+from src.utils.waits import RateLimiter
+
+
+def test_concurrent_async_requests_are_spaced_by_the_delay():
+    limiter = RateLimiter(0.05)
+    starts = []
+
+    async def request():
+        await limiter.wait_async()
+        starts.append(time.monotonic())
+
+    async def main():
+        await asyncio.gather(*(request() for _ in range(4)))
+
+    asyncio.run(main())
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
+
+
+def test_no_delay_never_waits():
+    limiter = RateLimiter()
+    asyncio.run(limiter.wait_async())
+    limiter.wait()
+    assert limiter.waited == 0